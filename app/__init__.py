@@ -1,3 +1,5 @@
+import logging
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
@@ -5,6 +7,7 @@ from flask_cors import CORS
 
 db = SQLAlchemy()
 migrate = Migrate()
+log = logging.getLogger(__name__)
 
 
 def create_app(test_config=None):
@@ -14,7 +17,13 @@ def create_app(test_config=None):
     if test_config is not None:
         app.config.update(test_config)
 
+    from .database import init_engine, init_engine_options
+    from .metrics import init_metrics
+    init_engine_options(app)
+    init_metrics(app)
+
     db.init_app(app)
+    init_engine(app)
     migrate.init_app(app, db)
 
     allowed_origins = [
@@ -24,6 +33,42 @@ def create_app(test_config=None):
     ] or "*"
     CORS(app, origins=allowed_origins, supports_credentials=True)
 
+    from . import group_stats  # noqa: F401 — registers counter events
+    from .audit import AuditWriter
+    app.extensions["audit_writer"] = AuditWriter(
+        app,
+        enabled=app.config["AUDIT_ASYNC"],
+        batch_size=app.config["AUDIT_BATCH_SIZE"],
+        flush_interval=app.config["AUDIT_FLUSH_INTERVAL_MS"] / 1000,
+        queue_size=app.config["AUDIT_QUEUE_SIZE"],
+        lookup_cache_size=app.config["AUDIT_LOOKUP_CACHE_SIZE"],
+    )
+    from .user_cache import UserCache
+    app.extensions["user_cache"] = UserCache(ttl=app.config["USER_CACHE_TTL"])
+    from .rate_limit import LoginLimiter
+    app.extensions["login_limiter"] = LoginLimiter(
+        enabled=app.config["LOGIN_RATE_LIMIT"],
+        ip_per_minute=app.config["LOGIN_IP_PER_MINUTE"],
+        ip_burst=app.config["LOGIN_IP_BURST"],
+        email_per_minute=app.config["LOGIN_EMAIL_PER_MINUTE"],
+        email_burst=app.config["LOGIN_EMAIL_BURST"],
+        negative_ttl=app.config["LOGIN_NEGATIVE_CACHE_TTL"],
+    )
+    from .catalog import CatalogCache
+    from .listing import ListingCache
+    app.extensions["catalog"] = CatalogCache(ttl=app.config["CATALOG_TTL"])
+    app.extensions["listing_cache"] = ListingCache()
+    from .group_index import GroupIndex
+    app.extensions["group_index"] = GroupIndex(
+        max_members=app.config["MAX_MEMBERS"], ttl=app.config["GROUP_INDEX_TTL"]
+    )
+
+    from .json_provider import init_json
+    init_json(app)
+
+    from .instrumentation import init_instrumentation
+    init_instrumentation(app)
+
     from .routes import api
     from .auth import auth
     from .admin import admin
@@ -39,6 +84,8 @@ def seed_db():
     _seed_courses()
     _seed_units()
     _seed_course_units()
+    _seed_listing_version()
+    _seed_audit_partitions()
 
 
 def _seed_courses():
@@ -73,3 +120,23 @@ def _seed_course_units():
             if unit and unit not in course.units:
                 course.units.append(unit)
     db.session.commit()
+
+
+def _seed_listing_version():
+    from .models import group_listing_version
+    if db.session.execute(db.select(group_listing_version.c.id)).first():
+        return
+    db.session.execute(group_listing_version.insert().values(id=1, version=0))
+    db.session.commit()
+
+
+def _seed_audit_partitions():
+    from sqlalchemy.exc import SQLAlchemyError
+    from .audit_retention import ensure_partitions
+    # Upkeep only: entries land in the default partition meanwhile, and
+    # `flask audit-archive` retries, so a failure here must not stop the boot.
+    try:
+        ensure_partitions()
+    except SQLAlchemyError:
+        db.session.rollback()
+        log.exception("Could not create audit log partitions; continuing.")
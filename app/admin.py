@@ -1,7 +1,15 @@
+import base64
+import binascii
+import hmac
 import uuid
-from flask import Blueprint, request, jsonify, session
-from . import db
+from datetime import datetime
+from flask import Blueprint, Response, current_app, request, jsonify, session
+from sqlalchemy import tuple_
+from sqlalchemy.orm import contains_eager
+from . import db, metrics
 from .models import AuditLog, Group, Student
+from .listing import groups_response
+from .rate_limit import login_limiter
 from .auth import admin_required, _audit
 
 admin = Blueprint("admin", __name__, url_prefix="/api/admin")
@@ -10,30 +18,111 @@ admin = Blueprint("admin", __name__, url_prefix="/api/admin")
 @admin.route("/groups", methods=["GET"])
 @admin_required
 def get_groups():
-    groups = Group.query.order_by(Group.id).all()
-    return jsonify([g.to_dict() for g in groups])
+    return groups_response()
+
+
+_AUDIT_FILTERS = ("action", "entity_type", "entity_id", "user_id")
+
+
+def _encode_cursor(entry: AuditLog) -> str:
+    raw = f"{entry.created_at.isoformat()}|{entry.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(token: str):
+    """Return ``(created_at, id)`` from an ``after`` token; raises ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        created_at, entry_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(entry_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
 
 
 @admin.route("/audit-log", methods=["GET"])
 @admin_required
 def get_audit_log():
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 50, type=int)
-    per_page = min(per_page, 200)
+    """Newest-first audit entries.
 
-    pagination = (
+    Pages are fetched by keyset: pass the ``next`` token from one response as
+    ``?after=`` to get the following page, which costs the same however deep
+    it is.  ``?page=`` still works for older clients but counts the table.
+    """
+    per_page = max(1, min(request.args.get("per_page", 50, type=int), 200))
+
+    query = (
         AuditLog.query
-        .order_by(AuditLog.created_at.desc())
-        .paginate(page=page, per_page=per_page, error_out=False)
+        .outerjoin(AuditLog.user)
+        .options(contains_eager(AuditLog.user))
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
     )
+    for name in _AUDIT_FILTERS:
+        value = request.args.get(name)
+        if not value:
+            continue
+        if name.endswith("_id"):
+            try:
+                value = uuid.UUID(value)
+            except ValueError:
+                return jsonify({"error": f"Invalid {name}."}), 400
+        query = query.filter(getattr(AuditLog, name) == value)
+
+    if "page" in request.args:
+        page = request.args.get("page", 1, type=int)
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        return jsonify({
+            "entries": [e.to_dict() for e in pagination.items],
+            "total": pagination.total,
+            "pages": pagination.pages,
+            "page": page,
+        })
+
+    after = request.args.get("after")
+    if after:
+        try:
+            cursor = _decode_cursor(after)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor."}), 400
+        query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < cursor)
+
+    entries = query.limit(per_page + 1).all()
+    has_more = len(entries) > per_page
+    entries = entries[:per_page]
     return jsonify({
-        "entries": [e.to_dict() for e in pagination.items],
-        "total": pagination.total,
-        "pages": pagination.pages,
-        "page": page,
+        "entries": [e.to_dict() for e in entries],
+        "next": _encode_cursor(entries[-1]) if has_more else None,
     })
 
 
+@admin.route("/metrics", methods=["GET"])
+@admin_required
+def get_metrics():
+    """Per-endpoint SQL counts and timings for this worker (SQL_INSTRUMENTATION)."""
+    metrics = current_app.extensions["sql_metrics"].snapshot()
+    return jsonify({"enabled": current_app.config["SQL_INSTRUMENTATION"], **metrics})
+
+
+def _prometheus_response():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
+@admin.route("/metrics/prometheus", methods=["GET"])
+def get_prometheus_metrics():
+    """Prometheus exposition; admins, or scrapers sending ``Bearer $METRICS_TOKEN``."""
+    token = current_app.config["METRICS_TOKEN"]
+    header = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return _prometheus_response()
+    return admin_required(_prometheus_response)()
+
+
+@admin.route("/login-limiter", methods=["GET"])
+@admin_required
+def get_login_limiter_stats():
+    return jsonify(login_limiter().stats())
+
+
 @admin.route("/groups/<uuid:group_id>", methods=["PATCH"])
 @admin_required
 def update_group(group_id):
@@ -0,0 +1,211 @@
+"""Background, batched writer for audit log entries.
+
+``_audit()`` used to add an ``AuditLog`` row and commit it on the request
+path, so every login, registration and group switch paid for a second
+transaction.  With ``AUDIT_ASYNC`` enabled, entries are instead put on a
+bounded in-process queue and a daemon thread inserts them in multi-row
+batches every ``AUDIT_FLUSH_INTERVAL_MS`` or ``AUDIT_BATCH_SIZE`` entries,
+whichever comes first.  Anything still queued is written at interpreter
+exit.  If the queue is full the entry is written synchronously rather than
+dropped.
+
+User agent, path and referrer strings are interned into lookup tables; each
+writer keeps an LRU of value → id so repeat values need no round trip.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from . import db, metrics
+from .models import AuditLog
+
+log = logging.getLogger(__name__)
+
+
+class LookupCache:
+    """Write-through LRU mapping interned strings to their lookup-table ids.
+
+    Lookup rows are never changed once written, so a cached id stays valid;
+    ids are only cached after the row inserting them has been committed.
+    """
+
+    def __init__(self, model, size: int = 1024):
+        self.model = model
+        self.size = size
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, value: str):
+        with self._lock:
+            found = self._ids.get(value)
+            if found is not None:
+                self._ids.move_to_end(value)
+            return found
+
+    def put(self, value: str, lookup_id: int) -> None:
+        with self._lock:
+            self._ids[value] = lookup_id
+            self._ids.move_to_end(value)
+            while len(self._ids) > self.size:
+                self._ids.popitem(last=False)
+
+    def fetch(self, value: str) -> int:
+        """Id for ``value`` from the database, inserting the row if needed."""
+        model = self.model
+        digest = model.hash(value)
+        query = select(model.id).where(model.value_hash == digest)
+        found = db.session.execute(query).scalar()
+        if found is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(model).values(value_hash=digest, value=value))
+            except IntegrityError:
+                pass  # another worker interned it first
+            found = db.session.execute(query).scalar()
+        return found
+
+
+class AuditWriter:
+    def __init__(self, app, enabled: bool, batch_size: int = 100,
+                 flush_interval: float = 1.0, queue_size: int = 10000,
+                 lookup_cache_size: int = 1024):
+        self.app = app
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._lookups = {
+            name: (column, LookupCache(model, lookup_cache_size))
+            for name, (column, model) in AuditLog.LOOKUPS.items()
+        }
+        atexit.register(self.close)
+
+    def submit(self, row: dict) -> None:
+        """Record one audit entry.
+
+        ``row`` holds ``AuditLog`` column values, except that user agent, path
+        and referrer are given as strings under those names.
+        """
+        if not self.enabled:
+            self._write([row])
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            log.warning("Audit queue full; writing entry synchronously.")
+            self._write([row])
+
+    def flush(self) -> None:
+        """Write everything queued so far on the calling thread."""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self) -> None:
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive gunicorn's fork, so start one per process.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _drain(self, limit: int) -> list:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, rows: list) -> None:
+        if not rows:
+            return
+        if has_app_context() and current_app._get_current_object() is self.app:
+            # Synchronous path: commit on the caller's session, as _audit did.
+            self._insert(rows)
+            return
+        with self.app.app_context():
+            self._insert(rows)
+
+    def _insert(self, rows: list) -> None:
+        started = time.perf_counter()
+        try:
+            rows = self._resolve_lookups(rows)
+            db.session.execute(insert(AuditLog), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            log.exception("Failed to write %d audit log entries.", len(rows))
+        finally:
+            metrics.AUDIT_WRITE_SECONDS.observe(time.perf_counter() - started)
+
+    def _resolve_lookups(self, rows: list) -> list:
+        """Replace interned strings with lookup ids, committing any new ones.
+
+        New lookup rows are committed before the entries that use them, so a
+        failed batch can never leave an uncommitted id in the cache.
+        """
+        missing = {}
+        resolved = []
+        for row in rows:
+            row = dict(row)
+            for name, (column, cache) in self._lookups.items():
+                value = row.pop(name, None)
+                if value is None:
+                    continue
+                lookup_id = cache.get(value)
+                if lookup_id is None:
+                    lookup_id = missing.get((name, value))
+                    if lookup_id is None:
+                        lookup_id = missing[(name, value)] = cache.fetch(value)
+                row[column] = lookup_id
+            resolved.append(row)
+        if missing:
+            db.session.commit()
+            for (name, value), lookup_id in missing.items():
+                self._lookups[name][1].put(value, lookup_id)
+        return resolved
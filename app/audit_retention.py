@@ -0,0 +1,182 @@
+"""Monthly partitions and archival for ``audit_logs``.
+
+On PostgreSQL ``audit_logs`` is range-partitioned by ``created_at``, one
+partition per calendar month (``audit_logs_y2026m10``) plus a default
+partition that catches anything outside them.  ``ensure_partitions`` creates
+the current and upcoming months ahead of time.  If it has not run for a
+while, the default partition may already hold rows for a month being added,
+and PostgreSQL refuses to create that partition; those rows are moved into
+the new month's table before it is attached.  Other
+backends (SQLite in development and tests) keep a plain table, and every
+function here works the same way against it.
+
+``flask audit-archive`` streams each whole month older than a cutoff into a
+compressed JSON Lines file (``archive_month``), then drops that month's
+partition or deletes its rows, so the table stays bounded and queries for
+recent entries only touch a few small partitions.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+
+from . import db
+from .models import AuditLog
+
+try:
+    import zstandard
+except ImportError:  # optional; archives fall back to gzip
+    zstandard = None
+
+_table = AuditLog.__table__
+_STREAM_BATCH = 1000
+_LOOKUP_COLUMNS = {column for column, _ in AuditLog.LOOKUPS.values()}
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{_table.name}_y{month:%Y}m{month:%m}"
+
+
+def is_partitioned() -> bool:
+    return db.engine.dialect.name == "postgresql"
+
+
+def ensure_partitions(months_ahead: int = 2) -> list:
+    """Create the default partition and this month's and the next few months'.
+
+    Returns the names of partitions created; a no-op on other backends.
+    """
+    if not is_partitioned():
+        return []
+    created = []
+    existing = _existing_partitions()
+    default = f"{_table.name}_default"
+    if default not in existing:
+        db.session.execute(text(
+            f"CREATE TABLE {default} PARTITION OF {_table.name} DEFAULT"
+        ))
+        created.append(default)
+    this_month = month_start(datetime.utcnow())
+    for offset in range(months_ahead + 1):
+        month = add_months(this_month, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        _create_month(month, default)
+        created.append(name)
+    db.session.commit()
+    return created
+
+
+def _create_month(month: datetime, default: str) -> None:
+    name = partition_name(month)
+    bounds = f"FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    in_month = "created_at >= :start AND created_at < :end"
+    params = {"start": month, "end": add_months(month, 1)}
+    # Keeps audit writes out of the default partition until the month is attached.
+    db.session.execute(text(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE"))
+    stranded = db.session.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})"), params
+    ).scalar()
+    if not stranded:
+        db.session.execute(text(f"CREATE TABLE {name} PARTITION OF {_table.name} FOR VALUES {bounds}"))
+        return
+    db.session.execute(text(f"CREATE TABLE {name} (LIKE {_table.name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    db.session.execute(text(
+        f"WITH moved AS (DELETE FROM {default} WHERE {in_month} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), params)
+    db.session.execute(text(f"ALTER TABLE {_table.name} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+
+
+def _existing_partitions() -> set:
+    rows = db.session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :parent"
+    ), {"parent": _table.name})
+    return {name for (name,) in rows}
+
+
+def months_before(cutoff: datetime) -> list:
+    """Start of every month that has entries and ends on or before ``cutoff``."""
+    cutoff = month_start(cutoff)
+    oldest = db.session.execute(
+        select(func.min(_table.c.created_at)).where(_table.c.created_at < cutoff)
+    ).scalar()
+    months = []
+    month = month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def open_archive(path: str, compression: str):
+    """Open ``path`` for writing text through the chosen compressor."""
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression needs the 'zstandard' package.")
+        return zstandard.open(path, "wt", encoding="utf-8")
+    return gzip.open(path, "wt", encoding="utf-8")
+
+
+def _archive_select():
+    """Entries with interned columns expanded back to their text."""
+    query = select(*(c for c in _table.c if c.name not in _LOOKUP_COLUMNS))
+    for name, (column, model) in AuditLog.LOOKUPS.items():
+        lookup = model.__table__.alias(name)
+        query = query.add_columns(lookup.c.value.label(name)).outerjoin(
+            lookup, lookup.c.id == _table.c[column]
+        )
+    return query
+
+
+def archive_month(month: datetime, directory: str, compression: str = "gzip") -> tuple:
+    """Write one month of entries to ``directory`` and remove them from the table.
+
+    Returns ``(path, rows)``.  The file is written under a temporary name and
+    only renamed into place, and the rows only removed, once it is complete,
+    so an interrupted run loses nothing and can simply be repeated.
+    """
+    end = add_months(month, 1)
+    suffix = "zst" if compression == "zstd" else "gz"
+    path = os.path.join(directory, f"{_table.name}-{month:%Y-%m}.jsonl.{suffix}")
+    partial = path + ".part"
+
+    rows = 0
+    result = db.session.execute(
+        _archive_select()
+        .where(_table.c.created_at >= month, _table.c.created_at < end)
+        .order_by(_table.c.created_at, _table.c.id)
+        .execution_options(yield_per=_STREAM_BATCH)
+    )
+    with open_archive(partial, compression) as out:
+        for row in result:
+            out.write(json.dumps(dict(row._mapping), default=str) + "\n")
+            rows += 1
+    os.replace(partial, path)
+
+    if is_partitioned():
+        name = partition_name(month)
+        if name in _existing_partitions():
+            db.session.execute(text(f"ALTER TABLE {_table.name} DETACH PARTITION {name}"))
+            db.session.execute(text(f"DROP TABLE {name}"))
+    # Rows that landed in the default partition (or the plain table).
+    db.session.execute(
+        _table.delete().where(_table.c.created_at >= month, _table.c.created_at < end)
+    )
+    db.session.commit()
+    return path, rows
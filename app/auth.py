@@ -1,9 +1,12 @@
+import math
 import uuid
 import json
+from datetime import datetime
 from functools import wraps
-from flask import Blueprint, request, jsonify, session
-from . import db
-from .models import AuditLog, Student, User
+from flask import Blueprint, current_app, g, request, jsonify, session
+from . import db, metrics
+from .models import Student, User
+from .rate_limit import login_limiter
 
 auth = Blueprint("auth", __name__, url_prefix="/api/auth")
 
@@ -16,9 +19,34 @@ def _valid_ouk_email(email: str) -> bool:
 
 
 def _session_user_id():
-    """Return the session user_id as a UUID object, or None."""
+    """Return the session user_id as a UUID object, or None (parsed once per request)."""
     raw = session.get("user_id")
-    return uuid.UUID(raw) if raw else None
+    parsed = g.get("_session_user_id")
+    if parsed is None or parsed[0] != raw:
+        parsed = g._session_user_id = (raw, uuid.UUID(raw) if raw else None)
+    return parsed[1]
+
+
+def current_user():
+    """The logged-in ``User``, or None; loaded at most once per request."""
+    user_id = _session_user_id()
+    if user_id is None:
+        return None
+    if g.get("_current_user_id") != user_id:
+        g.current_user = db.session.get(User, user_id)
+        g._current_user_id = user_id
+        if g.current_user is not None:
+            current_app.extensions["user_cache"].put(g.current_user)
+    return g.current_user
+
+
+def _identity(user_id):
+    """``(role, student_id)`` for ``user_id``, from the cache when possible."""
+    identity = current_app.extensions["user_cache"].get(user_id)
+    if identity is None:
+        user = current_user()
+        identity = current_app.extensions["user_cache"].put(user) if user else None
+    return identity
 
 
 def _try_link(user: User) -> None:
@@ -46,8 +74,8 @@ def admin_required(f):
         user_id = _session_user_id()
         if not user_id:
             return jsonify({"error": "Authentication required."}), 401
-        user = User.query.get(user_id)
-        if not user or not user.is_admin:
+        identity = _identity(user_id)
+        if not identity or not identity.is_admin:
             return jsonify({"error": "Admin access required."}), 403
         return f(*args, **kwargs)
     return decorated
@@ -62,21 +90,21 @@ def _get_ip() -> str:
 
 
 def _audit(action: str, entity_type: str = None, entity_id=None, detail: dict = None) -> None:
-    """Write an audit log entry capturing full request metadata."""
-    entry = AuditLog(
-        user_id=_session_user_id(),
-        action=action,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        detail=json.dumps(detail) if detail is not None else None,
-        ip_address=_get_ip(),
-        user_agent=request.user_agent.string or None,
-        method=request.method,
-        path=request.path,
-        referrer=request.referrer or None,
-    )
-    db.session.add(entry)
-    db.session.commit()
+    """Queue an audit log entry capturing full request metadata."""
+    current_app.extensions["audit_writer"].submit({
+        "id": uuid.uuid4(),
+        "user_id": _session_user_id(),
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "detail": json.dumps(detail, default=str) if detail is not None else None,
+        "ip_address": _get_ip(),
+        "user_agent": request.user_agent.string or None,
+        "method": request.method,
+        "path": request.path,
+        "referrer": request.referrer or None,
+        "created_at": datetime.utcnow(),
+    })
 
 
 @auth.route("/register", methods=["POST"])
@@ -122,16 +150,32 @@ def login():
     if not _valid_ouk_email(data["email"]):
         return jsonify({"error": f"Email must be a valid OUK email (ending in {OUK_DOMAIN})."}), 400
 
+    limiter = login_limiter()
+    retry_after = limiter.check(_get_ip(), data["email"]) or limiter.is_unknown(data["email"])
+    if retry_after:
+        response = jsonify({"error": "Too many login attempts. Please try again shortly."})
+        response.headers["Retry-After"] = str(math.ceil(retry_after))
+        metrics.LOGINS.labels("throttled").inc()
+        return response, 429
+
     user = User.query.filter_by(email=data["email"]).first()
+    if not user:
+        limiter.remember_unknown(data["email"])
     if not user or not user.check_password(data["password"]):
+        metrics.LOGINS.labels("failure").inc()
         return jsonify({"error": "Invalid email or password."}), 401
 
+    if user.password_needs_rehash():
+        user.set_password(data["password"])
+        db.session.commit()
+
     _try_link(user)
 
     session.permanent = True
     session["user_id"] = str(user.id)
 
     _audit("user.login", "user", user.id, {"email": user.email})
+    metrics.LOGINS.labels("success").inc()
 
     return jsonify({"user": user.to_dict()})
 
@@ -147,10 +191,9 @@ def logout():
 
 @auth.route("/me", methods=["GET"])
 def me():
-    user_id = _session_user_id()
-    if not user_id:
+    if not _session_user_id():
         return jsonify({"error": "Not authenticated."}), 401
-    user = User.query.get(user_id)
+    user = current_user()
     if not user:
         session.pop("user_id", None)
         return jsonify({"error": "Not authenticated."}), 401
@@ -0,0 +1,129 @@
+"""In-process cache of reference data: courses, units and course → unit links.
+
+Courses and units only change through ``seed_db()`` and ``flask link-units``,
+yet every enrolment form load used to query and sort them.  The catalog is
+loaded once (three queries), serves ``/api/courses`` and ``/api/units`` as
+pre-encoded JSON bytes and validates ids in ``/api/register`` without touching
+the database.  Flushes that touch courses or units in this process drop it
+immediately; other processes (e.g. a ``flask link-units`` run) are picked up
+once ``CATALOG_TTL`` seconds have passed.
+"""
+import itertools
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from . import db
+from .models import Course, Unit, course_units
+
+_TOUCHED_KEY = "catalog.touched"
+
+
+class Catalog:
+    """Immutable snapshot of the reference tables."""
+
+    def __init__(self, courses, units, links):
+        self.courses = {c["id"]: c for c in courses}
+        self.units = {u["id"]: u for u in units}
+        encode = current_app.json.dumps
+        self.courses_json = encode(courses).encode()
+        self.units_json = encode(units).encode()
+        self.course_units_json = {
+            course_id: encode(sorted(
+                (self.units[uid] for uid in unit_ids), key=lambda u: u["code"]
+            )).encode()
+            for course_id, unit_ids in links.items()
+        }
+
+    def has_course(self, course_id) -> bool:
+        return str(course_id) in self.courses
+
+    def has_units(self, unit_ids) -> bool:
+        return all(str(uid) in self.units for uid in unit_ids)
+
+    def course_units(self, course_id):
+        """Encoded unit list for a course, or None if the course is unknown."""
+        if not self.has_course(course_id):
+            return None
+        return self.course_units_json.get(str(course_id), b"[]")
+
+    def unit_objects(self, unit_ids) -> list:
+        """Session-attached ``Unit`` instances for ``unit_ids``, without a SELECT."""
+        units = []
+        for uid in unit_ids:
+            data = self.units[str(uid)]
+            unit = Unit(id=uid, code=data["code"], name=data["name"])
+            make_transient_to_detached(unit)
+            units.append(db.session.merge(unit, load=False))
+        return units
+
+
+class CatalogCache:
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._catalog = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Catalog:
+        with self._lock:
+            if self._catalog is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._catalog = _load()
+                self._loaded_at = time.monotonic()
+            return self._catalog
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._catalog = None
+
+
+def catalog() -> Catalog:
+    return current_app.extensions["catalog"].get()
+
+
+def _load() -> Catalog:
+    courses = [c.to_dict() for c in Course.query.order_by(Course.name)]
+    units = [u.to_dict() for u in Unit.query.order_by(Unit.code)]
+    links = {}
+    for course_id, unit_id in db.session.execute(db.select(course_units)):
+        links.setdefault(str(course_id), []).append(str(unit_id))
+    return Catalog(courses, units, links)
+
+
+# ---------------------------------------------------------------------------
+# Session events — drop the catalog when reference data changes
+# ---------------------------------------------------------------------------
+
+def _invalidate():
+    if has_app_context() and "catalog" in current_app.extensions:
+        current_app.extensions["catalog"].invalidate()
+
+
+@event.listens_for(db.session, "after_flush")
+def _after_flush(session, flush_context):
+    if any(isinstance(obj, (Course, Unit))
+           for obj in itertools.chain(session.new, session.dirty, session.deleted)):
+        session.info[_TOUCHED_KEY] = True
+        _invalidate()
+
+
+@event.listens_for(db.session, "after_commit")
+@event.listens_for(db.session, "after_soft_rollback")
+def _after_transaction(session, *args):
+    # The catalog may have been rebuilt from this transaction's uncommitted
+    # rows, or before they were committed; either way, build it again.
+    if session.info.pop(_TOUCHED_KEY, False):
+        _invalidate()
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def _on_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (Course, Unit):
+        _invalidate()
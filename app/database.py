@@ -0,0 +1,107 @@
+"""Engine and connection pool settings, driven by the ``DB_*`` config values.
+
+Pool sizes are per gunicorn worker: a deployment can open up to
+``workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW)`` connections, which must stay
+below the server's ``max_connections`` (or PgBouncer's client limit).
+``DB_POOL_PRE_PING`` tests each connection as it is checked out, so a
+PostgreSQL restart costs one reconnect instead of a 500 per stale connection.
+
+With ``DB_PGBOUNCER`` the database is reached through PgBouncer in
+transaction mode, where session state does not stick to a server
+connection: the statement timeout is set with ``SET LOCAL`` at the start of
+every transaction rather than as a startup option, and psycopg 3's
+server-side prepared statements are turned off.  (psycopg2 never prepares
+statements server-side, so ``DB_PREPARED_STATEMENTS`` only matters for
+``postgresql+psycopg://`` URLs.)
+
+Anything set in ``SQLALCHEMY_ENGINE_OPTIONS`` directly takes precedence.
+"""
+import logging
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from . import db
+
+log = logging.getLogger(__name__)
+
+_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping")
+
+
+def _in_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(config) -> dict:
+    """Build ``create_engine`` keyword arguments from the ``DB_*`` settings."""
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    explicit = config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}
+    options = {}
+    # In-memory SQLite gets a StaticPool, and a custom pool class may not
+    # take queue pool arguments at all.
+    if not _in_memory_sqlite(url) and "poolclass" not in explicit:
+        options.update(
+            pool_size=config["DB_POOL_SIZE"],
+            max_overflow=config["DB_MAX_OVERFLOW"],
+            pool_timeout=config["DB_POOL_TIMEOUT"],
+            pool_recycle=config["DB_POOL_RECYCLE"] or -1,
+            pool_pre_ping=config["DB_POOL_PRE_PING"],
+        )
+    if url.get_backend_name() == "postgresql":
+        connect_args = {}
+        timeout = config["DB_STATEMENT_TIMEOUT_MS"]
+        if timeout and not config["DB_PGBOUNCER"]:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+        if url.get_driver_name() == "psycopg" and (
+            config["DB_PGBOUNCER"] or not config["DB_PREPARED_STATEMENTS"]
+        ):
+            connect_args["prepare_threshold"] = None
+        if connect_args:
+            options["connect_args"] = connect_args
+    return {**options, **explicit}
+
+
+def init_engine_options(app) -> None:
+    """Fill in ``SQLALCHEMY_ENGINE_OPTIONS``; call before ``db.init_app``."""
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+
+
+def init_engine(app) -> None:
+    """Hook up per-transaction settings and log the effective pool; call after ``db.init_app``."""
+    with app.app_context():
+        engine = db.engine
+    timeout = app.config["DB_STATEMENT_TIMEOUT_MS"]
+    if engine.dialect.name == "postgresql" and app.config["DB_PGBOUNCER"] and timeout:
+        event.listen(engine, "begin", _set_local_statement_timeout(timeout))
+    log.info("Database engine: %s", describe_engine(engine, app.config))
+
+
+def _set_local_statement_timeout(timeout_ms: int):
+    def on_begin(conn):
+        # Raw cursor: the SQLAlchemy transaction is not set up yet.  psycopg2
+        # opens the database transaction on this statement, so LOCAL applies.
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+        finally:
+            cursor.close()
+    return on_begin
+
+
+def describe_engine(engine, config) -> str:
+    """One line of effective pool settings, including the worst case per deployment."""
+    pool = engine.pool
+    options = config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}
+    parts = [f"{engine.url.render_as_string(hide_password=True)}", f"pool={type(pool).__name__}"]
+    parts += [f"{name}={options[name]}" for name in _POOL_OPTIONS if name in options]
+    if engine.dialect.name == "postgresql":
+        timeout = config["DB_STATEMENT_TIMEOUT_MS"]
+        parts.append(f"statement_timeout={f'{timeout}ms' if timeout else 'off'}")
+        parts.append(f"pgbouncer={'on' if config['DB_PGBOUNCER'] else 'off'}")
+    if "pool_size" in options:
+        workers = int(os.environ.get("WEB_CONCURRENCY") or 1)
+        per_worker = options["pool_size"] + max(options["max_overflow"], 0)
+        parts.append(f"max_connections={per_worker} per worker, {per_worker * workers} "
+                     f"across {workers} worker{'s' if workers != 1 else ''}")
+    return " ".join(parts)
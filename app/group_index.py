@@ -0,0 +1,259 @@
+"""Per-process index of group membership used by the grouping algorithm.
+
+Instead of walking ``group.students`` and every member's ``units`` on each
+registration, the index keeps one small ``GroupState`` per group (member
+count, gender counts, covered units) plus an inverted unit → groups map, so
+candidate groups for a student come from their own units rather than a scan
+of every group.  It is read from the counters kept by ``app.group_stats``
+and kept current by SQLAlchemy session events: any flush that touches a
+student's group, gender or units marks the affected groups dirty, and only
+those groups are re-read before the next assignment.
+"""
+import itertools
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+
+from . import db
+from .models import Group, Student, group_unit_coverage
+
+_TOUCHED_KEY = "group_index.touched"
+
+
+@dataclass
+class GroupState:
+    id: object
+    name: str
+    member_count: int = 0
+    male_count: int = 0
+    female_count: int = 0
+    unit_counts: Counter = field(default_factory=Counter)
+    # Covered units as a bitmask; bit positions come from GroupIndex.mask().
+    coverage: int = 0
+
+    @property
+    def unit_ids(self) -> set:
+        return {uid for uid, n in self.unit_counts.items() if n > 0}
+
+
+class GroupIndex:
+    """Snapshot of every group's aggregates, refreshed incrementally."""
+
+    def __init__(self, max_members: int, ttl: float = 30.0):
+        self.max_members = max_members
+        # Other worker processes cannot mark our groups dirty, so the whole
+        # index is reloaded once it is older than ``ttl`` seconds.
+        self.ttl = ttl
+        self._groups = {}
+        self._by_unit = {}
+        # Position of each group in the full load (the order of
+        # Group.query.all()); groups first seen later go last.  Everything
+        # handed out follows it, so equal scores resolve as they always have.
+        self._order = {}
+        self._bits = {}
+        self._dirty = set()
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    # Readers take the lock too: another thread's refresh replaces _groups
+    # and drops and adds entries in _by_unit's sets.  GroupState objects are
+    # never changed once loaded, so the ones handed out stay consistent.
+
+    def __len__(self) -> int:
+        self._ensure_fresh()
+        with self._lock:
+            return len(self._groups)
+
+    def groups(self) -> list:
+        """Return the current state of every group."""
+        self._ensure_fresh()
+        with self._lock:
+            return list(self._groups.values())
+
+    def get(self, group_id):
+        self._ensure_fresh()
+        with self._lock:
+            return self._groups.get(group_id)
+
+    def open_capacity(self, state: GroupState) -> int:
+        return max(self.max_members - state.member_count, 0)
+
+    def open_groups(self) -> list:
+        """Every group with at least one free seat."""
+        return [g for g in self.groups() if self.open_capacity(g) > 0]
+
+    def candidates(self, unit_ids) -> list:
+        """Groups with a free seat that already cover at least one of ``unit_ids``."""
+        self._ensure_fresh()
+        with self._lock:
+            group_ids = set()
+            for unit_id in unit_ids:
+                group_ids |= self._by_unit.get(unit_id, set())
+            states = [self._groups[g] for g in sorted(group_ids, key=self._order.__getitem__)]
+        return [g for g in states if self.open_capacity(g) > 0]
+
+    def mask(self, unit_ids) -> int:
+        """Bitmask of ``unit_ids`` comparable with ``GroupState.coverage``."""
+        mask = 0
+        with self._lock:
+            for unit_id in unit_ids:
+                mask |= 1 << self._bits.setdefault(unit_id, len(self._bits))
+        return mask
+
+    @staticmethod
+    def scores(states, mask: int, gender: str) -> list:
+        """``(unit_overlap, gender_score)`` for each state, in order."""
+        if gender == "female":
+            return [((g.coverage & mask).bit_count(), g.male_count - g.female_count) for g in states]
+        if gender == "male":
+            return [((g.coverage & mask).bit_count(), g.female_count - g.male_count) for g in states]
+        return [((g.coverage & mask).bit_count(), 0) for g in states]
+
+    def mark_dirty(self, group_ids) -> None:
+        with self._lock:
+            self._dirty.update(group_ids)
+
+    def invalidate(self) -> None:
+        """Drop everything; the next read reloads all groups."""
+        with self._lock:
+            self._loaded_at = None
+            self._dirty.clear()
+
+    def _ensure_fresh(self) -> None:
+        # Flush first so pending changes are both visible to the refresh
+        # queries and reported through after_flush before we snapshot _dirty.
+        db.session.flush()
+        with self._lock:
+            stale = self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+            if stale:
+                self._groups = {}
+                self._by_unit = {}
+                self._order = {}
+                self._dirty.clear()
+                self._load()
+                self._loaded_at = time.monotonic()
+            elif self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                for group_id in dirty:
+                    self._drop(group_id)
+                self._load(dirty)
+                # Re-read groups were appended; put them back in their place.
+                self._groups = dict(
+                    sorted(self._groups.items(), key=lambda item: self._order[item[0]])
+                )
+
+    def _load(self, group_ids=None) -> None:
+        counts = db.session.query(
+            Group.id, Group.name, Group.member_count, Group.male_count, Group.female_count
+        )
+        coverage = db.session.query(
+            group_unit_coverage.c.group_id,
+            group_unit_coverage.c.unit_id,
+            group_unit_coverage.c.member_count,
+        ).filter(group_unit_coverage.c.member_count > 0)
+        if group_ids is not None:
+            counts = counts.filter(Group.id.in_(group_ids))
+            coverage = coverage.filter(group_unit_coverage.c.group_id.in_(group_ids))
+
+        for group_id, name, member_count, male_count, female_count in counts:
+            self._order.setdefault(group_id, len(self._order))
+            self._groups[group_id] = GroupState(
+                id=group_id,
+                name=name,
+                member_count=member_count,
+                male_count=male_count,
+                female_count=female_count,
+            )
+        for group_id, unit_id, n in coverage:
+            state = self._groups.get(group_id)
+            if state is not None:
+                state.unit_counts[unit_id] = n
+                state.coverage |= self.mask((unit_id,))
+                self._by_unit.setdefault(unit_id, set()).add(group_id)
+
+    def _drop(self, group_id) -> None:
+        state = self._groups.pop(group_id, None)
+        if state is None:
+            return
+        for unit_id in state.unit_counts:
+            members = self._by_unit.get(unit_id)
+            if members is not None:
+                members.discard(group_id)
+                if not members:
+                    del self._by_unit[unit_id]
+
+
+def group_index() -> GroupIndex:
+    """Return the index belonging to the current app."""
+    return current_app.extensions["group_index"]
+
+
+# ---------------------------------------------------------------------------
+# Session events — keep the index in step with ORM writes
+# ---------------------------------------------------------------------------
+
+def _current_index():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get("group_index")
+
+
+def _touched_groups(session) -> set:
+    """Group ids whose aggregates may change with the pending flush."""
+    touched = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Group):
+            touched.add(obj.id)
+        elif isinstance(obj, Student):
+            attrs = inspect(obj).attrs
+            changed = obj in session.new or obj in session.deleted or any(
+                attrs[name].history.has_changes() for name in ("group_id", "gender", "units")
+            )
+            if not changed:
+                continue
+            hist = attrs.group_id.history
+            touched.update(
+                g for g in itertools.chain(hist.added, hist.deleted, hist.unchanged)
+                if g is not None
+            )
+    return touched
+
+
+@event.listens_for(db.session, "after_flush")
+def _after_flush(session, flush_context):
+    index = _current_index()
+    if index is None:
+        return
+    touched = _touched_groups(session)
+    if touched:
+        session.info.setdefault(_TOUCHED_KEY, set()).update(touched)
+        index.mark_dirty(touched)
+
+
+@event.listens_for(db.session, "after_commit")
+@event.listens_for(db.session, "after_soft_rollback")
+def _after_transaction(session, *args):
+    # Another session may have refreshed these groups before our commit (or
+    # from our rolled-back rows), so re-read them once the outcome is final.
+    touched = session.info.pop(_TOUCHED_KEY, None)
+    index = _current_index()
+    if touched and index is not None:
+        index.mark_dirty(touched)
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def _on_bulk_statement(orm_execute_state):
+    # Query.delete()/update() and bulk inserts bypass the unit of work, so we
+    # cannot tell which groups they touched.
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (Group, Student):
+        index = _current_index()
+        if index is not None:
+            index.invalidate()
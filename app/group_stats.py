@@ -0,0 +1,269 @@
+"""Denormalised group counters and seat reservation.
+
+``groups.member_count``, ``male_count`` and ``female_count`` and the per-unit
+counts in ``group_unit_coverage`` are kept in step with students by session
+events, so every ORM write path (registration, switching, admin moves, test
+fixtures) maintains them inside its own transaction.  Writes that bypass the
+ORM call ``record_placements``; anything else that drifts is repaired by
+``recompute_group_stats`` (``flask recompute-group-stats``).
+
+Capacity is enforced by ``reserve_seat``, a single conditional UPDATE: on
+PostgreSQL two workers racing for the last seat serialise on that one group
+row and the loser sees ``rowcount == 0`` instead of overfilling the group.
+``create_group`` does the same for ``MAX_GROUPS`` with a conditional INSERT.
+"""
+import itertools
+import uuid
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import bindparam, event, func, inspect, literal, select
+from sqlalchemy.orm.util import identity_key
+
+from . import db
+from .models import GUID, Group, Student, group_unit_coverage, student_units
+
+_DELTAS_KEY = "group_stats.deltas"
+_RESERVED_KEY = "group_stats.reserved"
+
+_groups = Group.__table__
+_COUNTERS = ("member_count", "male_count", "female_count")
+# pg_advisory_xact_lock key serialising group creation ("GRPC").
+_CREATE_GROUP_LOCK = 0x47525043
+
+
+class _Deltas:
+    """Counter changes accumulated for one flush."""
+
+    def __init__(self):
+        self.groups = {}          # group_id -> Counter over _COUNTERS
+        self.coverage = Counter()  # (group_id, unit_id) -> delta
+
+    def __bool__(self):
+        return bool(self.groups or self.coverage)
+
+    def add(self, group_id, gender, unit_ids, sign, count_member=True):
+        counts = self.groups.setdefault(group_id, Counter())
+        if count_member:
+            counts["member_count"] += sign
+        if gender in ("male", "female"):
+            counts[f"{gender}_count"] += sign
+        for unit_id in unit_ids:
+            self.coverage[(group_id, unit_id)] += sign
+
+
+def reserve_seat(student: Student, group_id) -> bool:
+    """Atomically take a seat in ``group_id`` for ``student``.
+
+    Returns False when the group is already full.  On success the counter is
+    incremented immediately, and the flush that moves ``student`` into the
+    group will not count them a second time.
+    """
+    max_members = current_app.config["MAX_MEMBERS"]
+    db.session.flush()
+    result = db.session.connection().execute(
+        _groups.update()
+        .where(_groups.c.id == group_id, _groups.c.member_count < max_members)
+        .values(member_count=_groups.c.member_count + 1)
+    )
+    if result.rowcount != 1:
+        return False
+    db.session.info.setdefault(_RESERVED_KEY, set()).add((student.id, group_id))
+    _expire_counters(db.session, [group_id])
+    return True
+
+
+def create_group(name: str):
+    """Atomically add a group called ``name`` unless ``MAX_GROUPS`` already exist.
+
+    The cap is checked against the groups table, not the worker's index,
+    which does not see groups other workers created since it was loaded.
+    Returns the new group, or None when the cap has been reached.
+    """
+    max_groups = current_app.config["MAX_GROUPS"]
+    db.session.flush()
+    connection = db.session.connection()
+    if connection.dialect.name == "postgresql":
+        # Under READ COMMITTED two inserts could both count MAX_GROUPS - 1;
+        # holding this lock until commit makes the second one see the first.
+        connection.execute(select(func.pg_advisory_xact_lock(_CREATE_GROUP_LOCK)))
+    group_id = uuid.uuid4()
+    existing = select(func.count()).select_from(_groups).scalar_subquery()
+    result = connection.execute(
+        _groups.insert().from_select(
+            ["id", "name"],
+            select(literal(group_id, GUID()), literal(name)).where(existing < max_groups),
+        )
+    )
+    if result.rowcount != 1:
+        return None
+    return db.session.get(Group, group_id)
+
+
+def record_placements(placements) -> None:
+    """Count ``(student, group_id)`` pairs whose group_id was set outside the ORM."""
+    deltas = _Deltas()
+    for student, group_id in placements:
+        deltas.add(group_id, student.gender, [u.id for u in student.units], +1)
+    _apply(db.session, deltas)
+
+
+def recompute_group_stats() -> int:
+    """Rebuild every counter from the students table; returns groups corrected."""
+    before = _snapshot()
+
+    def count(*criteria):
+        return (
+            select(func.count())
+            .where(Student.group_id == _groups.c.id, *criteria)
+            .scalar_subquery()
+        )
+
+    db.session.execute(
+        _groups.update().values(
+            member_count=count(),
+            male_count=count(Student.gender == "male"),
+            female_count=count(Student.gender == "female"),
+        )
+    )
+    db.session.execute(group_unit_coverage.delete())
+    db.session.execute(
+        group_unit_coverage.insert().from_select(
+            ["group_id", "unit_id", "member_count"],
+            select(Student.group_id, student_units.c.unit_id, func.count())
+            .join(student_units, student_units.c.student_id == Student.id)
+            .join(_groups, _groups.c.id == Student.group_id)
+            .group_by(Student.group_id, student_units.c.unit_id),
+        )
+    )
+    after = _snapshot()
+    return sum(1 for gid in after if before.get(gid) != after[gid])
+
+
+def _snapshot() -> dict:
+    stats = {
+        gid: (counters, {})
+        for gid, *counters in db.session.execute(
+            select(_groups.c.id, *(_groups.c[name] for name in _COUNTERS))
+        )
+    }
+    for gid, unit_id, n in db.session.execute(select(group_unit_coverage)):
+        if gid in stats and n > 0:
+            stats[gid][1][unit_id] = n
+    return {gid: (tuple(counters), units) for gid, (counters, units) in stats.items()}
+
+
+def _apply(session, deltas: _Deltas) -> None:
+    conn = session.connection()
+    for name in _COUNTERS:
+        params = [
+            {"gid": gid, "delta": counts[name]}
+            for gid, counts in deltas.groups.items() if counts[name]
+        ]
+        if params:
+            conn.execute(
+                _groups.update()
+                .where(_groups.c.id == bindparam("gid"))
+                .values({name: _groups.c[name] + bindparam("delta")}),
+                params,
+            )
+
+    coverage = [
+        {"gid": gid, "uid": uid, "delta": delta}
+        for (gid, uid), delta in deltas.coverage.items() if delta
+    ]
+    if coverage:
+        # Rows are few per flush (one per unit of each moved student), so a
+        # portable update-then-insert beats dialect-specific upserts.
+        table = group_unit_coverage
+        for row in coverage:
+            updated = conn.execute(
+                table.update()
+                .where(table.c.group_id == row["gid"], table.c.unit_id == row["uid"])
+                .values(member_count=table.c.member_count + row["delta"])
+            )
+            if updated.rowcount == 0 and row["delta"] > 0:
+                conn.execute(table.insert().values(
+                    group_id=row["gid"], unit_id=row["uid"], member_count=row["delta"]
+                ))
+        conn.execute(table.delete().where(
+            table.c.member_count <= 0,
+            table.c.group_id.in_({row["gid"] for row in coverage}),
+        ))
+
+    _expire_counters(session, deltas.groups)
+
+
+def _expire_counters(session, group_ids) -> None:
+    """Make loaded Group objects re-read their counters on next access."""
+    for gid in group_ids:
+        group = session.identity_map.get(identity_key(Group, gid))
+        if group is not None:
+            session.expire(group, list(_COUNTERS))
+
+
+# ---------------------------------------------------------------------------
+# Session events
+# ---------------------------------------------------------------------------
+
+def _old_and_new(session, student):
+    """Return ``(group_id, gender, unit_ids)`` before and after the pending flush."""
+    if student in session.new:
+        return None, (student.group_id, student.gender, {u.id for u in student.units})
+
+    attrs = inspect(student).attrs
+    group = attrs.group_id.load_history()
+    gender = attrs.gender.load_history()
+    units = attrs.units.load_history()
+    old = (
+        next(iter(itertools.chain(group.deleted, group.unchanged)), None),
+        next(iter(itertools.chain(gender.deleted, gender.unchanged)), None),
+        {u.id for u in itertools.chain(units.deleted, units.unchanged)},
+    )
+    if student in session.deleted:
+        return old, None
+    new = (
+        group.added[0] if group.added else old[0],
+        gender.added[0] if gender.added else old[1],
+        {u.id for u in itertools.chain(units.added, units.unchanged)},
+    )
+    return old, new
+
+
+@event.listens_for(db.session, "before_flush")
+def _collect_deltas(session, flush_context, instances):
+    # History must be read before the flush; the counters are written in
+    # after_flush, once the student rows they describe exist.
+    reserved = session.info.get(_RESERVED_KEY, set())
+    deltas = _Deltas()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Student):
+            continue
+        old, new = _old_and_new(session, obj)
+        if old == new:
+            continue
+        if old is not None and old[0] is not None:
+            deltas.add(*old, sign=-1)
+        if new is not None and new[0] is not None:
+            # A reserved seat was already counted by reserve_seat(); only a
+            # student actually changing group can have one.
+            joining = old is None or old[0] != new[0]
+            already_counted = joining and (obj.id, new[0]) in reserved
+            reserved.discard((obj.id, new[0]))
+            deltas.add(*new, sign=+1, count_member=not already_counted)
+    if deltas:
+        session.info[_DELTAS_KEY] = deltas
+
+
+@event.listens_for(db.session, "after_flush")
+def _write_deltas(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        _apply(session, deltas)
+
+
+@event.listens_for(db.session, "after_commit")
+@event.listens_for(db.session, "after_soft_rollback")
+def _forget_reservations(session, *args):
+    session.info.pop(_RESERVED_KEY, None)
+    session.info.pop(_DELTAS_KEY, None)
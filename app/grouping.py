@@ -1,7 +1,12 @@
 import random
+import time
 from flask import current_app
-from . import db
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from . import db, metrics
 from .models import Group, Student
+from .group_index import group_index
+from .group_stats import create_group, record_placements, reserve_seat
 
 _ADJECTIVES = [
     "ancient", "blazing", "bold", "brave", "bright", "calm", "clever",
@@ -44,6 +49,15 @@ def _unique_name(existing_names: set) -> str:
     return f"group-{random.randint(10000, 99999)}"
 
 
+def _gender_score(male_count: int, female_count: int, gender: str) -> int:
+    """Positive when the group needs more of this gender, zero when balanced."""
+    if gender == "female":
+        return male_count - female_count   # positive → more males, need a female
+    if gender == "male":
+        return female_count - male_count   # positive → more females, need a male
+    return 0
+
+
 def _score(group: Group, student: Student) -> tuple:
     members = group.students
 
@@ -57,41 +71,192 @@ def _score(group: Group, student: Student) -> tuple:
     #    this student's gender, zero when the group is empty.
     male_count = sum(1 for m in members if m.gender == "male")
     female_count = sum(1 for m in members if m.gender == "female")
-    if student.gender == "female":
-        gender_score = male_count - female_count   # positive → more males, need a female
-    elif student.gender == "male":
-        gender_score = female_count - male_count   # positive → more females, need a male
-    else:
-        gender_score = 0
+    gender_score = _gender_score(male_count, female_count, student.gender)
 
     return (unit_overlap, gender_score)
 
 
+def _claim_best(student: Student, states: list, mask: int):
+    """Reserve a seat in the best-scoring group of ``states``.
+
+    Groups are tried best first; one that filled up in another worker since
+    the index was read is skipped (and re-read next time).  Returns None when
+    none of them has a seat left.
+    """
+    index = group_index()
+    scores = index.scores(states, mask, student.gender)
+    # sorted() is stable (reverse=True included) and states come in the
+    # index's load order, so ties go to the first group, as max(key=_score)
+    # over Group.query.all() did.
+    for position in sorted(range(len(states)), key=scores.__getitem__, reverse=True):
+        group_id = states[position].id
+        if reserve_seat(student, group_id):
+            return db.session.get(Group, group_id)
+        index.mark_dirty({group_id})
+    return None
+
+
 def assign_group(student: Student) -> Group:
     max_groups = current_app.config["MAX_GROUPS"]
-    max_members = current_app.config["MAX_MEMBERS"]
+    started = time.perf_counter()
+    scanned = 0
 
-    groups = Group.query.all()
-    available = [g for g in groups if g.member_count() < max_members]
+    try:
+        index = group_index()
+        unit_ids = {u.id for u in student.units}
+        mask = index.mask(unit_ids)
 
-    # Only consider joining an existing group if there is at least one unit in common.
-    with_overlap = [g for g in available if _score(g, student)[0] > 0]
+        # Only consider joining an existing group if there is at least one unit
+        # in common — the inverted index hands us exactly those groups.
+        candidates = index.candidates(unit_ids)
+        scanned += len(candidates)
+        group = _claim_best(student, candidates, mask)
 
-    if with_overlap:
-        # Best existing group that shares at least one unit.
-        group = max(with_overlap, key=lambda g: _score(g, student))
-    elif len(groups) < max_groups:
-        # No overlap anywhere — start a fresh group.
-        existing_names = {g.name for g in groups}
-        group = Group(name=_unique_name(existing_names))
-        db.session.add(group)
-        db.session.flush()
-    elif available:
-        # All groups are at max_groups but none have overlap — fall back to
-        # best available by gender balance so no one is left without a group.
-        group = max(available, key=lambda g: _score(g, student))
-    else:
+        if group is None and len(index) < max_groups:
+            # No overlap anywhere — start a fresh group, unless other workers
+            # have reached max_groups since this index was loaded.
+            existing_names = {g.name for g in index.groups()}
+            group = create_group(_unique_name(existing_names))
+            if group is None:
+                index.invalidate()
+            else:
+                reserve_seat(student, group.id)
+
+        if group is None:
+            # All groups are at max_groups but none have overlap — fall back to
+            # best available by gender balance so no one is left without a group.
+            candidates = index.open_groups()
+            scanned += len(candidates)
+            group = _claim_best(student, candidates, mask)
+    finally:
+        metrics.ASSIGN_GROUP_SECONDS.observe(time.perf_counter() - started)
+        metrics.ASSIGN_GROUP_CANDIDATES.observe(scanned)
+
+    if group is None:
         raise ValueError("Registration is closed — all groups are full.")
 
     student.group_id = group.id
     return group
+
+
+# ---------------------------------------------------------------------------
+# Batch assignment — place a whole cohort in one pass
+# ---------------------------------------------------------------------------
+
+class _Slot:
+    """Mutable per-group state while a batch is being placed."""
+    __slots__ = ("group", "group_id", "member_count", "male_count", "female_count", "mask")
+
+    def __init__(self, group_id, member_count=0, male_count=0, female_count=0, mask=0, group=None):
+        self.group = group
+        self.group_id = group_id
+        self.member_count = member_count
+        self.male_count = male_count
+        self.female_count = female_count
+        self.mask = mask
+
+
+def assign_groups(students: list) -> list:
+    """Assign every (not yet grouped) student in ``students`` in a single pass.
+
+    Unlike calling ``assign_group`` in arrival order, the whole cohort is
+    known up front: the number of groups and an even fill target are decided
+    first, students with the rarest unit combinations are placed first, and
+    the placement is written back with one bulk UPDATE.  Scoring follows
+    ``assign_group`` (unit overlap, then gender balance) on the index's unit
+    bitmasks.
+
+    Students who already have a group are left where they are: placing them
+    again would count them in a second group's counters.
+
+    Returns the students that could not be placed because every group is full.
+    """
+    students = [s for s in students if s.group_id is None]
+    if not students:
+        return []
+    max_groups = current_app.config["MAX_GROUPS"]
+    max_members = current_app.config["MAX_MEMBERS"]
+
+    db.session.flush()  # student ids are needed for the bulk update
+    index = group_index()
+    states = index.groups()
+
+    slots = [
+        _Slot(s.id, s.member_count, s.male_count, s.female_count, s.coverage)
+        for s in states
+    ]
+    masks = {s.id: index.mask(u.id for u in s.units) for s in students}
+    width = max(masks.values()).bit_length()
+
+    # Spread the cohort evenly over as few groups as will hold it.
+    total = sum(slot.member_count for slot in slots) + len(students)
+    group_count = min(max_groups, max(len(slots), -(-total // max_members)))
+    target = min(max_members, -(-total // group_count)) if group_count else 0
+
+    names = {s.name for s in states}
+    for _ in range(group_count - len(slots)):
+        group = Group(name=_unique_name(names))
+        names.add(group.name)
+        db.session.add(group)
+        slots.append(_Slot(None, group=group))
+    db.session.flush()
+    for slot in slots:
+        if slot.group is not None:
+            slot.group_id = slot.group.id
+
+    # Rare unit combinations first, so they seed groups before the common
+    # units have spread everywhere.
+    unit_freq = [0] * width
+    for mask in masks.values():
+        for bit in range(width):
+            if mask >> bit & 1:
+                unit_freq[bit] += 1
+
+    def rarity(student):
+        mask = masks[student.id]
+        return sum(unit_freq[bit] for bit in range(width) if mask >> bit & 1)
+
+    placements = []
+    unplaced = []
+    for student in sorted(students, key=rarity):
+        mask = masks[student.id]
+
+        def score(slot):
+            gender = _gender_score(slot.male_count, slot.female_count, student.gender)
+            return ((slot.mask & mask).bit_count(), gender, -slot.member_count)
+
+        under_target = [s for s in slots if s.member_count < target]
+        with_overlap = [s for s in under_target if s.mask & mask]
+        if with_overlap:
+            slot = max(with_overlap, key=score)
+        elif empty := [s for s in under_target if s.member_count == 0]:
+            slot = max(empty, key=score)
+        elif under_target:
+            slot = max(under_target, key=score)
+        elif open_slots := [s for s in slots if s.member_count < max_members]:
+            slot = max(open_slots, key=score)
+        else:
+            unplaced.append(student)
+            continue
+
+        slot.member_count += 1
+        slot.mask |= mask
+        if student.gender == "male":
+            slot.male_count += 1
+        elif student.gender == "female":
+            slot.female_count += 1
+        placements.append((student, slot.group_id))
+
+    for slot in slots:
+        if slot.group is not None and slot.member_count == 0:
+            db.session.delete(slot.group)
+
+    if placements:
+        db.session.execute(
+            update(Student),
+            [{"id": student.id, "group_id": group_id} for student, group_id in placements],
+        )
+        for student, group_id in placements:
+            set_committed_value(student, "group_id", group_id)
+        record_placements(placements)
+    return unplaced
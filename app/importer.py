@@ -0,0 +1,188 @@
+"""Streaming bulk import of students from CSV or JSON Lines.
+
+Records are read lazily and handled in chunks: each chunk is validated
+against the in-memory reference catalog, checked for existing student ids
+with one ``IN`` query, and written with a single multi-row insert (``COPY``
+on PostgreSQL) before being committed.  Imported students have no group;
+place them afterwards with ``flask assign-batch``.
+
+Each record needs ``name``, ``student_id``, ``gender``, ``email`` and
+``phone``.  The course is given as ``course_id`` or ``course`` (its name);
+units as ``unit_ids`` or ``units`` (codes), either a list (JSONL) or a
+``;``-separated string (CSV).
+"""
+import csv
+import io
+import json
+import uuid
+from dataclasses import dataclass, field
+from itertools import islice
+
+from sqlalchemy import select
+
+from . import db
+from .catalog import catalog
+from .models import Student, email_hash, student_units
+
+REQUIRED = ("name", "student_id", "gender", "email", "phone")
+STUDENT_EMAIL_DOMAIN = "@students.ouk.ac.ke"
+
+_students = Student.__table__
+_STUDENT_COLUMNS = ("id", "name", "student_id", "gender", "email", "email_hash", "phone", "course_id")
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    duplicates: int = 0
+    errors: list = field(default_factory=list)  # (line number, message)
+
+    @property
+    def processed(self) -> int:
+        return self.inserted + self.duplicates + len(self.errors)
+
+
+def read_records(stream, fmt: str):
+    """Yield ``(line_number, record)`` pairs from an open text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "jsonl":
+        for number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, None
+    else:
+        raise ValueError(f"Unknown import format: {fmt!r}")
+
+
+def import_students(records, chunk_size: int = 1000, on_chunk=None) -> ImportResult:
+    """Insert every valid, not yet registered student from ``records``."""
+    result = ImportResult()
+    resolver = _Resolver(catalog())
+    seen = set()
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return result
+        _import_chunk(chunk, resolver, seen, result)
+        if on_chunk:
+            on_chunk(result)
+
+
+class _Resolver:
+    """Maps course names/ids and unit codes/ids to catalog ids."""
+
+    def __init__(self, reference):
+        self.courses = {c["name"].strip().lower(): cid for cid, c in reference.courses.items()}
+        self.courses.update({cid: cid for cid in reference.courses})
+        self.units = {u["code"].strip().lower(): uid for uid, u in reference.units.items()}
+        self.units.update({uid: uid for uid in reference.units})
+
+    def course(self, record):
+        value = record.get("course_id") or record.get("course")
+        if not value:
+            return None, None
+        course_id = self.courses.get(str(value).strip().lower())
+        return course_id, None if course_id else f"unknown course {value!r}"
+
+    def units_of(self, record):
+        value = record.get("unit_ids") or record.get("units") or []
+        if isinstance(value, str):
+            value = [v for v in value.split(";") if v.strip()]
+        unit_ids = []
+        for item in value:
+            unit_id = self.units.get(str(item).strip().lower())
+            if unit_id is None:
+                return None, f"unknown unit {item!r}"
+            if unit_id not in unit_ids:
+                unit_ids.append(unit_id)
+        return unit_ids, None
+
+
+def _validate(record, resolver):
+    """Return ``(row, unit_ids, error)`` for one input record."""
+    if not isinstance(record, dict):
+        return None, None, "not a JSON object"
+    record = {k: v.strip() if isinstance(v, str) else v for k, v in record.items() if k}
+    missing = [name for name in REQUIRED if not record.get(name)]
+    if missing:
+        return None, None, f"missing {', '.join(missing)}"
+    if not record["email"].lower().endswith(STUDENT_EMAIL_DOMAIN):
+        return None, None, f"email must end in {STUDENT_EMAIL_DOMAIN}"
+    course_id, error = resolver.course(record)
+    if error:
+        return None, None, error
+    unit_ids, error = resolver.units_of(record)
+    if error:
+        return None, None, error
+    row = {
+        "id": uuid.uuid4(),
+        "name": record["name"],
+        "student_id": record["student_id"],
+        "gender": record["gender"].lower(),
+        "email": record["email"],
+        "email_hash": email_hash(record["email"]),
+        "phone": str(record["phone"]),
+        "course_id": uuid.UUID(course_id) if course_id else None,
+    }
+    return row, unit_ids, None
+
+
+def _import_chunk(chunk, resolver, seen, result):
+    pending = []
+    for number, record in chunk:
+        row, unit_ids, error = _validate(record, resolver)
+        if error:
+            result.errors.append((number, error))
+        elif row["student_id"] in seen:
+            result.duplicates += 1
+        else:
+            seen.add(row["student_id"])
+            pending.append((row, unit_ids))
+    if not pending:
+        return
+
+    existing = set(db.session.execute(
+        select(_students.c.student_id)
+        .where(_students.c.student_id.in_([row["student_id"] for row, _ in pending]))
+    ).scalars())
+    rows, links = [], []
+    for row, unit_ids in pending:
+        if row["student_id"] in existing:
+            result.duplicates += 1
+            continue
+        rows.append(row)
+        links.extend({"student_id": row["id"], "unit_id": uuid.UUID(uid)} for uid in unit_ids)
+
+    if rows:
+        _insert(_students, _STUDENT_COLUMNS, rows)
+        if links:
+            _insert(student_units, ("student_id", "unit_id"), links)
+    db.session.commit()
+    result.inserted += len(rows)
+
+
+def _insert(table, columns, rows):
+    connection = db.session.connection()
+    driver = connection.dialect.driver if connection.dialect.name == "postgresql" else None
+    if driver not in ("psycopg2", "psycopg"):
+        connection.execute(table.insert(), rows)
+        return
+    # COPY skips per-row statement overhead entirely.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    with connection.connection.cursor() as cursor:
+        if driver == "psycopg2":
+            cursor.copy_expert(statement, buffer)
+        else:
+            with cursor.copy(statement) as copy:
+                copy.write(buffer.getvalue())
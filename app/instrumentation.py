@@ -0,0 +1,158 @@
+"""Opt-in per-request SQL instrumentation.
+
+With ``SQL_INSTRUMENTATION`` enabled every request counts the statements it
+executes and the time spent in them (via the engine's cursor events), and:
+
+* answers with a ``Server-Timing`` header (``db`` and ``app`` durations), so
+  the browser's network panel shows where a slow response went;
+* adds the request to per-endpoint aggregates served by
+  ``GET /api/admin/metrics``, including the slowest statements seen;
+* logs a warning for requests over ``SLOW_REQUEST_QUERIES`` statements or
+  ``SLOW_REQUEST_DB_MS`` milliseconds of database time.
+
+Statements run outside a request (CLI commands, the audit writer thread)
+are not counted.
+"""
+import heapq
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+_STATEMENT_CHARS = 300
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "slowest", "_keep")
+
+    def __init__(self, keep: int):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = []  # min-heap of (seconds, statement)
+        self._keep = keep
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.queries += 1
+        self.db_time += seconds
+        entry = (seconds, statement[:_STATEMENT_CHARS])
+        if len(self.slowest) < self._keep:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+class EndpointMetrics:
+    """Per-endpoint aggregates since the worker started."""
+
+    def __init__(self, keep: int = 5):
+        self.keep = keep
+        self._endpoints = {}
+        self._slowest = []  # min-heap of (seconds, statement, endpoint)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, stats: RequestStats, seconds: float) -> None:
+        with self._lock:
+            agg = self._endpoints.setdefault(endpoint, {
+                "requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0, "total_ms": 0.0,
+            })
+            agg["requests"] += 1
+            agg["queries"] += stats.queries
+            agg["max_queries"] = max(agg["max_queries"], stats.queries)
+            agg["db_ms"] += stats.db_time * 1000
+            agg["total_ms"] += seconds * 1000
+            for duration, statement in stats.slowest:
+                entry = (duration, statement, endpoint)
+                if len(self._slowest) < self.keep:
+                    heapq.heappush(self._slowest, entry)
+                elif duration > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            endpoints = {
+                name: {
+                    "requests": agg["requests"],
+                    "queries_per_request": round(agg["queries"] / agg["requests"], 2),
+                    "max_queries": agg["max_queries"],
+                    "db_ms_per_request": round(agg["db_ms"] / agg["requests"], 2),
+                    "ms_per_request": round(agg["total_ms"] / agg["requests"], 2),
+                }
+                for name, agg in sorted(self._endpoints.items())
+            }
+            slowest = [
+                {"ms": round(duration * 1000, 2), "endpoint": endpoint, "statement": statement}
+                for duration, statement, endpoint in sorted(self._slowest, reverse=True)
+            ]
+        return {"endpoints": endpoints, "slowest_statements": slowest}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+            self._slowest.clear()
+
+
+def init_instrumentation(app) -> None:
+    app.extensions["sql_metrics"] = EndpointMetrics(keep=app.config["SQL_SLOWEST_STATEMENTS"])
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def _start_request():
+    if current_app.config["SQL_INSTRUMENTATION"]:
+        g._sql_stats = RequestStats(current_app.config["SQL_SLOWEST_STATEMENTS"])
+        g._request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    stats = g.pop("_sql_stats", None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - g.pop("_request_started")
+    db_ms = stats.db_time * 1000
+    response.headers.add(
+        "Server-Timing", f'db;dur={db_ms:.2f};desc="{stats.queries} queries"'
+    )
+    response.headers.add("Server-Timing", f"app;dur={elapsed * 1000:.2f}")
+
+    endpoint = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+    current_app.extensions["sql_metrics"].record(endpoint, stats, elapsed)
+
+    config = current_app.config
+    if stats.queries > config["SLOW_REQUEST_QUERIES"] or db_ms > config["SLOW_REQUEST_DB_MS"]:
+        log.warning(
+            "Slow request %s: %d queries, %.1f ms in the database, %.1f ms total. Slowest: %s",
+            endpoint, stats.queries, db_ms, elapsed * 1000,
+            "; ".join(f"{d * 1000:.1f} ms {s}" for d, s in sorted(stats.slowest, reverse=True)),
+        )
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Engine events — time every statement run on behalf of an instrumented request
+# ---------------------------------------------------------------------------
+
+def _current_stats():
+    return g.get("_sql_stats") if has_app_context() else None
+
+
+# The start time lives on the execution context, which is discarded with the
+# statement, so one that raises (and never reaches after_cursor_execute)
+# leaves nothing behind on the pooled connection.
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats() is not None:
+        context._instr_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    started = getattr(context, "_instr_started", None)
+    if stats is not None and started is not None:
+        stats.add(statement, time.perf_counter() - started)
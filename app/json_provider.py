@@ -0,0 +1,80 @@
+"""JSON encoding backed by orjson, with cached pre-encoded fragments.
+
+``OrjsonProvider`` replaces Flask's json-module encoder when orjson is
+installed (and ``JSON_ORJSON`` is on).  It produces the same JSON values
+Flask's does: sorted keys per ``sort_keys``, dates as HTTP dates via
+``DefaultJSONProvider.default``, UUIDs as strings.  Only the bytes differ:
+output is compact and UTF-8 rather than ``\\u``-escaped.
+
+``to_dict(native=True)`` on the models emits ``uuid.UUID`` values as they
+are (both encoders turn them into the same string) and shares immutable
+sub-objects through ``fragment()``: with an orjson new enough to have
+``orjson.Fragment`` they are encoded once and spliced in as raw bytes,
+otherwise the same cached dict is reused instead of being rebuilt.
+"""
+from functools import lru_cache
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_Fragment = getattr(orjson, "Fragment", None)
+
+if orjson is not None:
+    _BASE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson; see the module docstring."""
+
+    def _options(self, indent: bool = False) -> int:
+        options = _BASE_OPTIONS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumpb(self, obj, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.dumpb(obj, indent=bool(kwargs.get("indent"))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumpb(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+def init_json(app) -> None:
+    if orjson is not None and app.config["JSON_ORJSON"]:
+        app.json = OrjsonProvider(app)
+
+
+def native_json() -> bool:
+    """True if ``current_app.json`` accepts what ``to_dict(native=True)`` returns."""
+    return isinstance(current_app.json, OrjsonProvider)
+
+
+def fragment(**fields):
+    """A JSON object of ``fields``, built (and encoded, if possible) once per distinct value.
+
+    The result is shared between callers and must not be modified.
+    """
+    return _fragment(tuple(fields.items()))
+
+
+@lru_cache(maxsize=4096)
+def _fragment(items):
+    obj = dict(items)
+    if _Fragment is None:
+        return obj
+    return _Fragment(orjson.dumps(obj, option=_BASE_OPTIONS | orjson.OPT_SORT_KEYS))
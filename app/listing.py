@@ -0,0 +1,123 @@
+"""Versioned, pre-serialised group listings with ETag support.
+
+``GET /api/groups`` and ``/api/admin/groups`` are polled by the UI.  Every
+transaction that changes something a listing shows bumps the single
+``group_listing_version`` row, so a poll only has to read that integer: an
+unchanged version is answered with 304 (or with the JSON bytes this worker
+already built for it) instead of walking every group and member again.
+"""
+import itertools
+import threading
+
+from flask import Response, current_app, request
+from sqlalchemy import event, inspect, select
+
+from . import db
+from .json_provider import native_json
+from .models import (
+    Course, Group, Student, Unit, User, course_units, group_listing_version, student_units,
+)
+
+_CHANGED_KEY = "listing.changed"
+_LISTED = (Course, Group, Student, Unit, User)
+# Core statements (``table.update()`` etc.) carry no mapper; match them by table.
+_LISTED_TABLES = frozenset(
+    [model.__table__.name for model in _LISTED] + [student_units.name, course_units.name]
+)
+
+
+class ListingCache:
+    """The most recently serialised listing and the version it belongs to."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._body = None
+
+    def get(self, version):
+        with self._lock:
+            return self._body if version == self._version else None
+
+    def put(self, version, body) -> None:
+        with self._lock:
+            self._version, self._body = version, body
+
+
+def current_version() -> int:
+    return db.session.execute(
+        select(group_listing_version.c.version).where(group_listing_version.c.id == 1)
+    ).scalar() or 0
+
+
+def groups_response() -> Response:
+    """Serve the full group listing, honouring ``If-None-Match``."""
+    version = current_version()
+    etag = f"groups-{version}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        cache = current_app.extensions["listing_cache"]
+        body = cache.get(version)
+        if body is None:
+            groups = Group.with_members().order_by(Group.id).all()
+            native = native_json()
+            body = current_app.json.dumps([g.to_dict(native) for g in groups])
+            cache.put(version, body)
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    # Let browsers keep the body but always revalidate it with us.
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# ---------------------------------------------------------------------------
+# Session events — bump the version once per changing transaction
+# ---------------------------------------------------------------------------
+
+def _is_listed_change(session, obj) -> bool:
+    if not isinstance(obj, _LISTED):
+        return False
+    if not isinstance(obj, User):
+        return True
+    # A member's has_account is all the listings show of users, so logins
+    # (password rehashes) and unlinked sign-ups must not bump the version.
+    if obj in session.new or obj in session.deleted:
+        return obj.student_id is not None
+    return inspect(obj).attrs.student_id.history.has_changes()
+
+
+@event.listens_for(db.session, "after_flush")
+def _note_changes(session, flush_context):
+    if any(_is_listed_change(session, obj)
+           for obj in itertools.chain(session.new, session.dirty, session.deleted)):
+        session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def _note_bulk_changes(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update
+            or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    table = getattr(orm_execute_state.statement, "table", None)
+    if (mapper is not None and issubclass(mapper.class_, _LISTED)) or \
+            getattr(table, "name", None) in _LISTED_TABLES:
+        orm_execute_state.session.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(db.session, "before_commit")
+def _bump_version(session):
+    # commit() runs its final flush after this hook, so flush here to learn
+    # about those changes too.  Bumping last keeps the row lock short.
+    session.flush()
+    if session.info.pop(_CHANGED_KEY, False):
+        session.connection().execute(
+            group_listing_version.update()
+            .where(group_listing_version.c.id == 1)
+            .values(version=group_listing_version.c.version + 1)
+        )
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _forget_changes(session, previous_transaction):
+    session.info.pop(_CHANGED_KEY, None)
@@ -0,0 +1,99 @@
+"""Prometheus metrics for grouping, auth, auditing and the database pool.
+
+The metrics live in prometheus_client's process-wide registry and are served
+in the text exposition format by ``GET /api/admin/metrics/prometheus``.
+
+Under gunicorn every worker keeps its own counters, so a scrape would only
+see whichever worker happened to answer it.  When ``PROMETHEUS_MULTIPROC_DIR``
+is set (``entrypoint.sh`` does this), prometheus_client writes each worker's
+values to files in that directory and ``render()`` sums them across workers;
+``gunicorn.conf.py`` removes a worker's live gauges when it exits.  The
+directory must be empty when gunicorn starts.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+ASSIGN_GROUP_SECONDS = Histogram(
+    "grouper_assign_group_seconds",
+    "Time taken to place one student in a group.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+ASSIGN_GROUP_CANDIDATES = Histogram(
+    "grouper_assign_group_candidates",
+    "Candidate groups considered when placing one student.",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+REGISTRATIONS = Counter(
+    "grouper_registrations_total",
+    "Student registrations by outcome.",
+    ["outcome"],  # created (201), closed (403), duplicate (409), invalid (400)
+)
+LOGINS = Counter(
+    "grouper_logins_total",
+    "Login attempts by outcome.",
+    ["outcome"],  # success, failure, throttled
+)
+AUDIT_WRITE_SECONDS = Histogram(
+    "grouper_audit_write_seconds",
+    "Time taken to write one batch of audit log entries.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "grouper_db_pool_checkout_seconds",
+    "Time spent waiting for a pooled database connection, including connecting.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0, 30.0),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "grouper_db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout seconds.",
+)
+POOL_OVERFLOW = Gauge(
+    "grouper_db_pool_overflow",
+    "Connections open beyond pool_size.",
+    multiprocess_mode="livesum",
+)
+
+
+class TimedQueuePool(QueuePool):
+    """``QueuePool`` that records checkout waits and overflow in the metrics above."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+        POOL_OVERFLOW.set(max(self.overflow(), 0))
+        return connection
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        POOL_OVERFLOW.set(max(self.overflow(), 0))
+
+
+def init_metrics(app) -> None:
+    """Use ``TimedQueuePool`` unless the engine options name another pool.
+
+    Flask-SQLAlchemy still switches in-memory SQLite to ``StaticPool``.
+    """
+    options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": TimedQueuePool, **options}
+
+
+def render() -> tuple:
+    """Return ``(body, content_type)`` for a scrape, merged across workers if configured."""
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -2,33 +2,106 @@ import uuid
 import hashlib
 import json
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import String, TypeDecorator
+from sqlalchemy import LargeBinary, String, TypeDecorator
+from sqlalchemy.orm import selectinload, validates
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from . import db
+from .json_provider import fragment
+from .passwords import hash_password, needs_rehash, verify_password
+
+
+_UUID = uuid.UUID
+_SAFE_UNKNOWN = uuid.SafeUUID.unknown
+
+
+def _uuid_from_bytes(value: bytes) -> uuid.UUID:
+    """``uuid.UUID(bytes=value)`` without re-validating what GUID itself stored."""
+    result = object.__new__(_UUID)
+    object.__setattr__(result, "int", int.from_bytes(value, "big"))
+    object.__setattr__(result, "is_safe", _SAFE_UNKNOWN)
+    return result
+
+
+def _to_native(value):
+    if value is None or value.__class__ is _UUID:
+        return value
+    return _UUID(str(value))
+
+
+def _to_bytes(value):
+    if value is None:
+        return None
+    return (value if value.__class__ is _UUID else _UUID(str(value))).bytes
+
+
+def _to_str(value):
+    if value is None:
+        return None
+    return str(value if value.__class__ is _UUID else _UUID(str(value)))
+
+
+def _from_bytes(value):
+    if value is None:
+        return None
+    if value.__class__ is bytes:
+        return _uuid_from_bytes(value)
+    return _UUID(str(value))  # text id in a database not yet migrated to blobs
+
+
+def _from_str(value):
+    if value is None or value.__class__ is _UUID:
+        return value
+    return _UUID(str(value))
+
+
+_BIND = {"postgresql": _to_native, "sqlite": _to_bytes}
+_RESULT = {"sqlite": _from_bytes}
 
 
 class GUID(TypeDecorator):
-    """UUID type: native uuid on PostgreSQL, string on other backends (e.g. SQLite)."""
+    """UUID type: native uuid on PostgreSQL, 16-byte blob on SQLite, string elsewhere.
+
+    The processors are picked once per dialect rather than branching on every
+    value, and PostgreSQL results need none: the driver already returns
+    ``uuid.UUID``.
+    """
     impl = String(36)
     cache_ok = True
 
     def load_dialect_impl(self, dialect):
         if dialect.name == "postgresql":
             return dialect.type_descriptor(PG_UUID(as_uuid=True))
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(LargeBinary(16))
         return dialect.type_descriptor(String(36))
 
     def process_bind_param(self, value, dialect):
-        if value is None:
-            return None
-        if isinstance(value, uuid.UUID):
-            return value if dialect.name == "postgresql" else str(value)
-        return uuid.UUID(str(value)) if dialect.name == "postgresql" else str(uuid.UUID(str(value)))
+        return _BIND.get(dialect.name, _to_str)(value)
 
     def process_result_value(self, value, dialect):
-        if value is None:
-            return None
-        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+        return _RESULT.get(dialect.name, _from_str)(value)
+
+    def bind_processor(self, dialect):
+        convert = _BIND.get(dialect.name, _to_str)
+        impl_processor = self.impl_instance.bind_processor(dialect)
+        if impl_processor is None or dialect.name == "sqlite":
+            # sqlite3 takes bytes as they are; LargeBinary would wrap each one.
+            return convert
+        return lambda value: impl_processor(convert(value))
+
+    def result_processor(self, dialect, coltype):
+        impl_processor = self.impl_instance.result_processor(dialect, coltype)
+        if dialect.name == "postgresql":
+            return impl_processor
+        convert = _RESULT.get(dialect.name, _from_str)
+        if impl_processor is None:
+            return convert
+        return lambda value: convert(impl_processor(value))
+
+
+def email_hash(email: str) -> str:
+    """Gravatar hash of an email address (stored so serializers needn't recompute it)."""
+    return hashlib.md5(email.lower().strip().encode()).hexdigest()
 
 
 class User(db.Model):
@@ -36,6 +109,7 @@ class User(db.Model):
 
     id = db.Column(GUID, primary_key=True, default=uuid.uuid4)
     email = db.Column(db.String(120), nullable=False, unique=True)
+    email_hash = db.Column(db.String(32), nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     role = db.Column(db.String(20), nullable=False, default="user")
 
@@ -54,21 +128,29 @@ class User(db.Model):
         backref=db.backref("user", uselist=False),
     )
 
+    @validates("email")
+    def _set_email_hash(self, key, email):
+        self.email_hash = email_hash(email)
+        return email
+
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
-    def to_dict(self):
-        email_hash = hashlib.md5(self.email.lower().strip().encode()).hexdigest()
+    def password_needs_rehash(self) -> bool:
+        """True if the stored hash predates the configured hashing parameters."""
+        return needs_rehash(self.password_hash)
+
+    def to_dict(self, native: bool = False):
         return {
-            "id": str(self.id),
+            "id": self.id if native else str(self.id),
             "email": self.email,
             "role": self.role,
             "is_admin": self.is_admin,
-            "student": self.student.to_dict() if self.student else None,
-            "gravatar_url": f"https://www.gravatar.com/avatar/{email_hash}?s=80&d=identicon",
+            "student": self.student.to_dict(native) if self.student else None,
+            "gravatar_url": f"https://www.gravatar.com/avatar/{self.email_hash}?s=80&d=identicon",
         }
 
 
@@ -131,12 +213,30 @@ student_units = db.Table(
     "student_units",
     db.Column("student_id", GUID, db.ForeignKey("students.id"), primary_key=True),
     db.Column("unit_id", GUID, db.ForeignKey("units.id"), primary_key=True),
+    # The primary key covers lookups by student; this one those by unit.
+    db.Index("ix_student_units_unit_id", "unit_id"),
 )
 
 course_units = db.Table(
     "course_units",
     db.Column("course_id", GUID, db.ForeignKey("courses.id"), primary_key=True),
     db.Column("unit_id", GUID, db.ForeignKey("units.id"), primary_key=True),
+    db.Index("ix_course_units_unit_id", "unit_id"),
+)
+
+# Single row (id=1) bumped whenever anything shown in a group listing changes
+group_listing_version = db.Table(
+    "group_listing_version",
+    db.Column("id", db.Integer, primary_key=True),
+    db.Column("version", db.Integer, nullable=False, default=0),
+)
+
+# How many members of each group take each unit (maintained by app.group_stats)
+group_unit_coverage = db.Table(
+    "group_unit_coverage",
+    db.Column("group_id", GUID, db.ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("unit_id", GUID, db.ForeignKey("units.id"), primary_key=True),
+    db.Column("member_count", db.Integer, nullable=False, default=0),
 )
 
 
@@ -147,7 +247,9 @@ class Unit(db.Model):
     code = db.Column(db.String(20), nullable=False, unique=True)
     name = db.Column(db.String(200), nullable=False)
 
-    def to_dict(self):
+    def to_dict(self, native: bool = False):
+        if native:
+            return fragment(id=self.id, code=self.code, name=self.name)
         return {"id": str(self.id), "code": self.code, "name": self.name}
 
 
@@ -169,53 +271,129 @@ class Group(db.Model):
     id = db.Column(GUID, primary_key=True, default=uuid.uuid4)
     name = db.Column(db.String(50), nullable=False, unique=True)
     whatsapp_link = db.Column(db.String(500), nullable=True)
+    # Maintained by app.group_stats — never assign directly.
+    member_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    male_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    female_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     students = db.relationship("Student", backref="group", lazy=True)
 
-    def member_count(self):
-        return len(self.students)
-
-    def to_dict(self):
+    @classmethod
+    def with_members(cls):
+        """Group query that eager-loads everything ``to_dict`` touches.
+
+        Members, their units, course and account link come back in a fixed
+        number of SELECTs however many groups and members there are.
+        """
+        members = selectinload(cls.students)
+        return cls.query.options(
+            members.selectinload(Student.units),
+            members.joinedload(Student.course),
+            members.selectinload(Student.user),
+        )
+
+    def to_dict(self, native: bool = False):
         return {
-            "id": str(self.id),
+            "id": self.id if native else str(self.id),
             "name": self.name,
             "whatsapp_link": self.whatsapp_link,
-            "members": [s.to_dict() for s in self.students],
+            "member_count": self.member_count,
+            "male_count": self.male_count,
+            "female_count": self.female_count,
+            "members": [s.to_dict(native) for s in self.students],
         }
 
 
 class Student(db.Model):
     __tablename__ = "students"
+    __table_args__ = (
+        db.Index("ix_students_group_id", "group_id"),    # group.students
+        db.Index("ix_students_course_id", "course_id"),
+        db.Index("ix_students_email", "email"),          # auth._try_link on every login
+    )
 
     id = db.Column(GUID, primary_key=True, default=uuid.uuid4)
     name = db.Column(db.String(100), nullable=False)
     student_id = db.Column(db.String(50), nullable=False, unique=True)
     gender = db.Column(db.String(20), nullable=False)
     email = db.Column(db.String(100), nullable=False)
+    email_hash = db.Column(db.String(32), nullable=False)
     phone = db.Column(db.String(30), nullable=False)
     group_id = db.Column(GUID, db.ForeignKey("groups.id"), nullable=True)
     course_id = db.Column(GUID, db.ForeignKey("courses.id"), nullable=True)
     units = db.relationship("Unit", secondary=student_units, lazy=True)
 
-    def to_dict(self):
-        email_hash = hashlib.md5(self.email.lower().strip().encode()).hexdigest()
+    @validates("email")
+    def _set_email_hash(self, key, email):
+        self.email_hash = email_hash(email)
+        return email
+
+    def to_dict(self, native: bool = False):
+        """JSON-ready dict; ``native`` keeps UUIDs and shared unit fragments for the encoder.
+
+        Only pass ``native`` when the result goes straight to
+        ``current_app.json`` and ``json_provider.native_json()`` is true.
+        """
+        def as_id(value):
+            return value if native or value is None else str(value)
+
         return {
-            "id": str(self.id),
+            "id": as_id(self.id),
             "name": self.name,
             "student_id": self.student_id,
             "gender": self.gender,
             "email": self.email,
             "phone": self.phone,
-            "group_id": str(self.group_id) if self.group_id else None,
-            "course_id": str(self.course_id) if self.course_id else None,
+            "group_id": as_id(self.group_id),
+            "course_id": as_id(self.course_id),
             "course": self.course.name if self.course else None,
-            "units": [u.to_dict() for u in self.units],
+            "units": [u.to_dict(native) for u in self.units],
             "has_account": self.user is not None,
-            "gravatar_url": f"https://www.gravatar.com/avatar/{email_hash}?s=40&d=identicon",
+            "gravatar_url": f"https://www.gravatar.com/avatar/{self.email_hash}?s=40&d=identicon",
         }
 
 
+class _AuditLookup:
+    """Interned request metadata: each distinct string is stored once.
+
+    Rows are looked up by ``value_hash`` (MD5 of the value) so arbitrarily
+    long user agents and referrers can be kept unique without indexing the
+    text itself.  Rows are never updated or deleted, which lets writers cache
+    value → id mappings indefinitely (see ``app.audit.LookupCache``).
+    """
+    id         = db.Column(db.Integer, primary_key=True)
+    value_hash = db.Column(db.String(32), nullable=False, unique=True)
+    value      = db.Column(db.Text, nullable=False)
+
+    @staticmethod
+    def hash(value: str) -> str:
+        return hashlib.md5(value.encode()).hexdigest()
+
+
+class AuditUserAgent(_AuditLookup, db.Model):
+    __tablename__ = "audit_user_agents"
+
+
+class AuditPath(_AuditLookup, db.Model):
+    __tablename__ = "audit_paths"
+
+
+class AuditReferrer(_AuditLookup, db.Model):
+    __tablename__ = "audit_referrers"
+
+
 class AuditLog(db.Model):
     __tablename__ = "audit_logs"
+    # Every listing is newest-first, optionally filtered, and pages by the
+    # (created_at, id) keyset, so each index ends in those two columns.
+    __table_args__ = (
+        db.Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        db.Index("ix_audit_logs_action_created_at", "action", "created_at", "id"),
+        db.Index("ix_audit_logs_entity_created_at", "entity_type", "entity_id", "created_at", "id"),
+        db.Index("ix_audit_logs_user_created_at", "user_id", "created_at", "id"),
+        # Monthly partitions on PostgreSQL (see app.audit_retention); the
+        # partition key has to be part of the table's primary key.
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id          = db.Column(GUID, primary_key=True, default=uuid.uuid4)
     user_id     = db.Column(GUID, db.ForeignKey("users.id"), nullable=True)
@@ -224,12 +402,37 @@ class AuditLog(db.Model):
     entity_id   = db.Column(GUID, nullable=True)
     detail      = db.Column(db.Text, nullable=True)   # business context (JSON)
     ip_address  = db.Column(db.String(45), nullable=True)
-    user_agent  = db.Column(db.Text, nullable=True)
+    user_agent_id = db.Column(db.Integer, db.ForeignKey("audit_user_agents.id"), nullable=True)
     method      = db.Column(db.String(10), nullable=True)
-    path        = db.Column(db.String(255), nullable=True)
-    referrer    = db.Column(db.Text, nullable=True)
-    created_at  = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    path_id     = db.Column(db.Integer, db.ForeignKey("audit_paths.id"), nullable=True)
+    referrer_id = db.Column(db.Integer, db.ForeignKey("audit_referrers.id"), nullable=True)
+    created_at  = db.Column(db.DateTime, primary_key=True, default=datetime.utcnow)
     user        = db.relationship("User", foreign_keys=[user_id])
+    # The lookup tables are tiny, so joining them in every load is cheap.
+    user_agent_ref = db.relationship(AuditUserAgent, lazy="joined")
+    path_ref       = db.relationship(AuditPath, lazy="joined")
+    referrer_ref   = db.relationship(AuditReferrer, lazy="joined")
+
+    __mapper_args__ = {"primary_key": [id]}
+
+    # Interned values keyed by the column that holds the lookup id.
+    LOOKUPS = {
+        "user_agent": ("user_agent_id", AuditUserAgent),
+        "path": ("path_id", AuditPath),
+        "referrer": ("referrer_id", AuditReferrer),
+    }
+
+    @property
+    def user_agent(self):
+        return self.user_agent_ref.value if self.user_agent_ref else None
+
+    @property
+    def path(self):
+        return self.path_ref.value if self.path_ref else None
+
+    @property
+    def referrer(self):
+        return self.referrer_ref.value if self.referrer_ref else None
 
     def to_dict(self):
         return {
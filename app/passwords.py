@@ -0,0 +1,35 @@
+"""Password hashing with parameters taken from the app config.
+
+Hashes use werkzeug's ``method$salt$hash`` format, so the parameters a hash
+was made with are recorded in its prefix.  ``needs_rehash`` compares that
+prefix with the configured method, which lets login upgrade old hashes
+(e.g. after raising ``PASSWORD_SCRYPT_N``) while it has the plain password.
+"""
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+def hash_method(config=None) -> str:
+    """The werkzeug method string for the configured algorithm and cost."""
+    config = config or current_app.config
+    method = config["PASSWORD_HASH_METHOD"]
+    if method == "scrypt":
+        return "scrypt:{}:{}:{}".format(
+            config["PASSWORD_SCRYPT_N"], config["PASSWORD_SCRYPT_R"], config["PASSWORD_SCRYPT_P"]
+        )
+    if method.startswith("pbkdf2"):
+        digest = method.partition(":")[2] or "sha256"
+        return f"pbkdf2:{digest}:{config['PASSWORD_HASH_ITERATIONS']}"
+    raise ValueError(f"Unsupported PASSWORD_HASH_METHOD: {method!r}")
+
+
+def hash_password(password: str, method: str = None) -> str:
+    return generate_password_hash(password, method=method or hash_method())
+
+
+def verify_password(stored: str, password: str) -> bool:
+    return check_password_hash(stored, password)
+
+
+def needs_rehash(stored: str) -> bool:
+    return stored.partition("$")[0] != hash_method()
@@ -0,0 +1,145 @@
+"""Login throttling: token buckets per client IP and per email.
+
+Every ``/api/auth/login`` attempt used to cost a user query and, for known
+emails, a deliberately slow password hash.  ``LoginLimiter`` is consulted
+first: each attempt takes a token from the caller's IP bucket and from the
+email's bucket, and an empty bucket means 429 before any database or hashing
+work.  Emails that matched no account are remembered for
+``LOGIN_NEGATIVE_CACHE_TTL`` seconds, so repeated guesses at them are
+throttled from memory.  A hit is answered with 429 rather than 401: another
+worker may have registered the email since, and only that worker's cache is
+cleared, so the cache must never claim that the credentials are wrong.
+
+State is per worker process, so the effective limit across the deployment
+is the configured one times the number of gunicorn workers.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from . import db
+from .models import User
+
+
+class TokenBuckets:
+    """Token buckets keyed by string, holding at most ``max_keys`` of them.
+
+    A bucket that has not been touched for a while is full again, which is
+    exactly what a new one looks like, so evicting the least recently used
+    buckets never lets anyone through sooner than they should be.
+    """
+
+    def __init__(self, per_minute: float, burst: int, max_keys: int = 100_000):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key: str, now: float) -> float:
+        """Take one token; returns 0 on success, else seconds until one is free."""
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            self._buckets[key] = (tokens, now)
+            wait = (1 - tokens) / self.rate if self.rate else float("inf")
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class LoginLimiter:
+    def __init__(self, enabled: bool = True, ip_per_minute: float = 20, ip_burst: int = 20,
+                 email_per_minute: float = 5, email_burst: int = 5,
+                 negative_ttl: float = 30, max_keys: int = 100_000, clock=time.monotonic):
+        self.enabled = enabled
+        self.negative_ttl = negative_ttl
+        self.max_keys = max_keys
+        self._clock = clock
+        self._ips = TokenBuckets(ip_per_minute, ip_burst, max_keys)
+        self._emails = TokenBuckets(email_per_minute, email_burst, max_keys)
+        # Keyed on the email exactly as given: the account lookup is
+        # case-sensitive, so "Jane@..." missing says nothing about "jane@...".
+        self._unknown = OrderedDict()  # email -> expires_at
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    def check(self, ip: str, email: str) -> float:
+        """Charge one login attempt; returns 0 if allowed, else the Retry-After."""
+        if not self.enabled:
+            return 0.0
+        now = self._clock()
+        with self._lock:
+            wait = self._ips.take(ip or "unknown", now)
+            if wait:
+                self.counters["rejected_ip"] += 1
+                return wait
+            wait = self._emails.take(email.lower(), now)
+            if wait:
+                self.counters["rejected_email"] += 1
+                return wait
+            self.counters["allowed"] += 1
+            return 0.0
+
+    def is_unknown(self, email: str) -> float:
+        """Seconds ``email`` stays cached as matching no account; 0 if it is not."""
+        if not self.enabled or not self.negative_ttl:
+            return 0.0
+        with self._lock:
+            expires = self._unknown.get(email)
+            if expires is None:
+                return 0.0
+            remaining = expires - self._clock()
+            if remaining <= 0:
+                del self._unknown[email]
+                return 0.0
+            self.counters["negative_cache_hits"] += 1
+            return remaining
+
+    def remember_unknown(self, email: str) -> None:
+        if not self.enabled or not self.negative_ttl:
+            return
+        with self._lock:
+            self._unknown[email] = self._clock() + self.negative_ttl
+            self._unknown.move_to_end(email)
+            while len(self._unknown) > self.max_keys:
+                self._unknown.popitem(last=False)
+
+    def forget_unknown(self, email: str) -> None:
+        with self._lock:
+            self._unknown.pop(email, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **{key: self.counters[key] for key in
+                   ("allowed", "rejected_ip", "rejected_email", "negative_cache_hits")},
+                "tracked_ips": len(self._ips),
+                "tracked_emails": len(self._emails),
+                "cached_unknown_emails": len(self._unknown),
+            }
+
+
+def login_limiter() -> LoginLimiter:
+    return current_app.extensions["login_limiter"]
+
+
+# ---------------------------------------------------------------------------
+# Session events — an email that gains an account is no longer unknown
+# ---------------------------------------------------------------------------
+
+@event.listens_for(db.session, "after_flush")
+def _after_flush(session, flush_context):
+    if not (has_app_context() and "login_limiter" in current_app.extensions):
+        return
+    for obj in session.new:
+        if isinstance(obj, User):
+            login_limiter().forget_unknown(obj.email)
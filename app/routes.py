@@ -1,9 +1,12 @@
 import uuid
-from flask import Blueprint, current_app, request, jsonify, session
-from . import db
-from .models import Course, Group, Student, Unit, User
+from flask import Blueprint, Response, current_app, request, jsonify, session
+from . import db, metrics
+from .models import Group, Student, User
+from .catalog import catalog
 from .grouping import assign_group
-from .auth import login_required, _audit, _session_user_id
+from .group_stats import reserve_seat
+from .listing import groups_response
+from .auth import current_user, login_required, _audit
 
 api = Blueprint("api", __name__, url_prefix="/api")
 
@@ -28,11 +31,17 @@ def get_config():
     })
 
 
+def _catalog_response(body: bytes):
+    response = Response(body, mimetype="application/json")
+    response.add_etag()
+    response.headers["Cache-Control"] = f"private, max-age={current_app.config['CATALOG_MAX_AGE']}"
+    return response.make_conditional(request)
+
+
 @api.route("/courses", methods=["GET"])
 @login_required
 def get_courses():
-    courses = Course.query.order_by(Course.name).all()
-    return jsonify([c.to_dict() for c in courses])
+    return _catalog_response(catalog().courses_json)
 
 
 @api.route("/units", methods=["GET"])
@@ -40,19 +49,26 @@ def get_courses():
 def get_units():
     course_id = _to_uuid(request.args.get("course_id"))
     if course_id:
-        course = Course.query.get(course_id)
-        if not course:
+        body = catalog().course_units(course_id)
+        if body is None:
             return jsonify({"error": "Course not found."}), 404
-        units = sorted(course.units, key=lambda u: u.code)
     else:
-        units = Unit.query.order_by(Unit.code).all()
-    return jsonify([u.to_dict() for u in units])
+        body = catalog().units_json
+    return _catalog_response(body)
+
+
+_REGISTRATION_OUTCOMES = {201: "created", 403: "closed", 409: "duplicate"}
 
 
 @api.route("/register", methods=["POST"])
 @login_required
 def register():
-    data = request.get_json(force=True)
+    response, status = _register(request.get_json(force=True))
+    metrics.REGISTRATIONS.labels(_REGISTRATION_OUTCOMES.get(status, "invalid")).inc()
+    return response, status
+
+
+def _register(data):
 
     required = ["name", "student_id", "gender", "email", "phone", "course_id"]
     missing = [f for f in required if not data.get(f)]
@@ -62,15 +78,15 @@ def register():
     if not data["email"].lower().endswith("@students.ouk.ac.ke"):
         return jsonify({"error": "Email must end in @students.ouk.ac.ke."}), 400
 
+    reference = catalog()
     course_id = _to_uuid(data["course_id"])
-    if not course_id or not Course.query.get(course_id):
+    if not course_id or not reference.has_course(course_id):
         return jsonify({"error": "Invalid course selected."}), 400
 
     unit_ids = [_to_uuid(uid) for uid in data.get("unit_ids", [])]
-    unit_ids = [uid for uid in unit_ids if uid]
-    units = Unit.query.filter(Unit.id.in_(unit_ids)).all() if unit_ids else []
-    if data.get("unit_ids") and len(units) != len(data["unit_ids"]):
+    if None in unit_ids or len(set(unit_ids)) != len(unit_ids) or not reference.has_units(unit_ids):
         return jsonify({"error": "One or more selected units are invalid."}), 400
+    units = reference.unit_objects(unit_ids)
 
     if Student.query.filter_by(student_id=data["student_id"]).first():
         return jsonify({"error": "Student ID already registered."}), 409
@@ -88,9 +104,9 @@ def register():
     db.session.flush()  # get student.id before commit
 
     # Always link to the currently logged-in user if they aren't linked yet
-    current_user = User.query.get(_session_user_id())
-    if current_user.student_id is None:
-        current_user.student_id = student.id
+    user = current_user()
+    if user.student_id is None:
+        user.student_id = student.id
     # Also link any other account that shares the student email (e.g. a
     # student who later created their own account with their student address)
     else:
@@ -141,15 +157,14 @@ def public_get_student(student_id):
 @api.route("/groups", methods=["GET"])
 @login_required
 def get_groups():
-    groups = Group.query.order_by(Group.id).all()
-    return jsonify([g.to_dict() for g in groups])
+    return groups_response()
 
 
 @api.route("/student/switch-group", methods=["POST"])
 @login_required
 def switch_group():
-    current_user = User.query.get(_session_user_id())
-    if not current_user or not current_user.student:
+    user = current_user()
+    if not user or not user.student:
         return jsonify({"error": "No student profile linked to this account."}), 403
 
     data = request.get_json(force=True)
@@ -161,12 +176,12 @@ def switch_group():
     if not group:
         return jsonify({"error": "Group not found."}), 404
 
-    student = current_user.student
+    student = user.student
     if student.group_id == group_id:
         return jsonify({"error": "You are already in this group."}), 400
 
-    max_members = current_app.config["MAX_MEMBERS"]
-    if len(group.students) >= max_members:
+    if not reserve_seat(student, group_id):
+        max_members = current_app.config["MAX_MEMBERS"]
         return jsonify({"error": f"That group is full ({max_members} members max)."}), 409
 
     old_group_id = student.group_id
@@ -189,7 +204,10 @@ def get_student(student_id):
     student = Student.query.filter_by(student_id=student_id).first()
     if not student:
         return jsonify({"error": "Student not found."}), 404
-    group = Group.query.get(student.group_id)
+    group = (
+        Group.with_members().filter_by(id=student.group_id).first()
+        if student.group_id else None
+    )
     return jsonify({
         "student": student.to_dict(),
         "group": group.to_dict() if group else None,
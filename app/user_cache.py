@@ -0,0 +1,100 @@
+"""Short-lived cache of who each logged-in user is.
+
+``admin_required`` only needs a user's role, yet it used to load the whole
+``users`` row on every admin request.  ``UserCache`` keeps ``(role,
+student_id)`` per user id for ``USER_CACHE_TTL`` seconds.  Writes to users in
+this process (account linking, ``flask make-admin``, deletions) drop the
+affected entries; changes made by another process are picked up once the
+TTL runs out.  A TTL of 0 disables the cache.
+"""
+import itertools
+import threading
+import time
+from typing import NamedTuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from . import db
+from .models import User
+
+_TOUCHED_KEY = "user_cache.touched"
+
+
+class Identity(NamedTuple):
+    role: str
+    student_id: object
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+
+class UserCache:
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._entries = {}  # user_id -> (Identity, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return entry[0]
+
+    def put(self, user: User) -> Identity:
+        identity = Identity(user.role, user.student_id)
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[user.id] = (identity, time.monotonic() + self.ttl)
+        return identity
+
+    def invalidate(self, user_ids=None) -> None:
+        with self._lock:
+            if user_ids is None:
+                self._entries.clear()
+            else:
+                for user_id in user_ids:
+                    self._entries.pop(user_id, None)
+
+
+# ---------------------------------------------------------------------------
+# Session events — drop entries for users written in this process
+# ---------------------------------------------------------------------------
+
+def _invalidate(user_ids=None):
+    if has_app_context() and "user_cache" in current_app.extensions:
+        current_app.extensions["user_cache"].invalidate(user_ids)
+
+
+@event.listens_for(db.session, "after_flush")
+def _after_flush(session, flush_context):
+    touched = {
+        obj.id for obj in itertools.chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, User)
+    }
+    if touched:
+        session.info.setdefault(_TOUCHED_KEY, set()).update(touched)
+        _invalidate(touched)
+
+
+@event.listens_for(db.session, "after_commit")
+@event.listens_for(db.session, "after_soft_rollback")
+def _after_transaction(session, *args):
+    # A request may have re-cached the uncommitted values in between.
+    touched = session.info.pop(_TOUCHED_KEY, None)
+    if touched:
+        _invalidate(touched)
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def _on_bulk_statement(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is User:
+        _invalidate()
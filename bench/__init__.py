@@ -0,0 +1 @@
+"""Load-generation benchmarks; run with ``flask bench`` or ``python -m bench``."""
@@ -0,0 +1,4 @@
+"""``python -m bench`` — same options as ``flask bench``."""
+from bench.cli import bench
+
+bench(prog_name="python -m bench")
@@ -0,0 +1,77 @@
+import click
+
+from bench.harness import SCENARIOS, Bench, format_results, load_baseline, save_baseline
+
+
+def _parse_value(raw: str):
+    lowered = raw.strip().lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return int(raw)
+    except ValueError:
+        return raw
+
+
+def _parse_setting(ctx, param, values):
+    settings = {}
+    for value in values:
+        name, sep, raw = value.partition("=")
+        if not sep or not name:
+            raise click.BadParameter(f"expected NAME=VALUE, got {value!r}")
+        settings[name.strip()] = _parse_value(raw)
+    return settings
+
+
+def _parse_sweep(ctx, param, value):
+    if value is None:
+        return None
+    name, sep, raw = value.partition("=")
+    if not sep or not name or not raw:
+        raise click.BadParameter(f"expected NAME=VALUE,VALUE,..., got {value!r}")
+    return name.strip(), [_parse_value(v) for v in raw.split(",")]
+
+
+@click.command("bench")
+@click.option("--users", default=200, show_default=True, help="Accounts to seed.")
+@click.option("--students", default=500, show_default=True, help="Grouped students to seed.")
+@click.option("--requests", "requests_", default=500, show_default=True,
+              help="Requests per scenario.")
+@click.option("--concurrency", default=8, show_default=True, help="Client threads.")
+@click.option("--scenario", "scenarios", multiple=True, type=click.Choice(SCENARIOS),
+              help="Scenario to run (repeatable); all by default.")
+@click.option("--set", "settings", multiple=True, callback=_parse_setting, metavar="NAME=VALUE",
+              help="Override an app setting, e.g. DB_POOL_SIZE=2 (repeatable).")
+@click.option("--sweep", callback=_parse_sweep, metavar="NAME=V1,V2,...",
+              help="Run once per value of one setting, each compared with the first.")
+@click.option("--database-url", envvar="BENCH_DATABASE_URL", metavar="URL",
+              help="Benchmark this database instead of a throwaway SQLite file "
+                   "[env: BENCH_DATABASE_URL].  Seeded rows are deleted afterwards.")
+@click.option("--save", type=click.Path(dir_okay=False), help="Write results to this JSON baseline.")
+@click.option("--compare", type=click.Path(exists=True, dir_okay=False),
+              help="Show % change against a saved baseline.")
+def bench(users, students, requests_, concurrency, scenarios, settings, sweep, database_url,
+          save, compare):
+    """Benchmark login, group listing, public student lookup and registration.
+
+    Uses a throwaway SQLite database unless --database-url (or
+    BENCH_DATABASE_URL) names one; the app's own DATABASE_URL is never used.
+    """
+    baseline = load_baseline(compare) if compare else None
+    runs = [settings] if sweep is None else [{**settings, sweep[0]: v} for v in sweep[1]]
+    for run_settings in runs:
+        harness = Bench(
+            users=users, students=students, requests=requests_, concurrency=concurrency,
+            database_url=database_url, settings=run_settings,
+        )
+        try:
+            results = harness.run(scenarios or SCENARIOS)
+        finally:
+            harness.close()
+        click.echo(format_results(results, baseline))
+        click.echo()
+        if sweep is not None and baseline is None:
+            baseline = results
+    if save:
+        save_baseline(results, save)
+        click.secho(f"Saved baseline to {save}", fg="green")
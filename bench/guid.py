@@ -0,0 +1,102 @@
+"""Micro-benchmark of ``GUID`` bind and result conversion on SQLite.
+
+Compares the current type (16-byte blobs, processors chosen per dialect)
+with the previous one, reproduced below as ``LegacyGUID`` (36-character
+text, ``str()``/``uuid.UUID()`` on every value), and with fetching the raw
+blobs unconverted as the floor.
+"""
+import gc
+import time
+import uuid
+
+from sqlalchemy import Column, Integer, LargeBinary, MetaData, String, Table, TypeDecorator
+from sqlalchemy import create_engine, insert, select
+
+from app.models import GUID
+
+
+class LegacyGUID(TypeDecorator):
+    """GUID as it was before the blob storage: string conversion per value."""
+    impl = String(36)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return str(uuid.UUID(str(value)))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+VARIANTS = {
+    "legacy text": LegacyGUID,
+    "binary": GUID,
+}
+
+
+def _timed(fn, repeat: int) -> float:
+    # Like timeit: without the collector, 100k new objects don't trigger GC
+    # passes whose cost depends on whatever else is alive.
+    best = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def run(rows: int = 100_000, repeat: int = 3) -> dict:
+    """Return ``{variant: {"insert_us": ..., "fetch_us": ...}}`` per row, best of ``repeat``."""
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    tables = {
+        name: Table(f"guid_{n}", metadata, Column("pk", Integer, primary_key=True), Column("id", type_))
+        for n, (name, type_) in enumerate(VARIANTS.items())
+    }
+    metadata.create_all(engine)
+    ids = [{"id": uuid.uuid4()} for _ in range(rows)]
+
+    results = {}
+    with engine.connect() as conn:
+        for name, table in tables.items():
+            def load(table=table):
+                conn.execute(table.delete())
+                conn.execute(insert(table), ids)
+
+            def fetch(table=table):
+                conn.execute(select(table.c.id)).all()
+
+            insert_time = _timed(load, repeat)
+            fetch_time = _timed(fetch, repeat)
+            results[name] = {
+                "insert_us": round(insert_time / rows * 1e6, 3),
+                "fetch_us": round(fetch_time / rows * 1e6, 3),
+            }
+
+        raw = select(tables["binary"].c.id.cast(LargeBinary))
+        results["raw blobs"] = {
+            "insert_us": None,
+            "fetch_us": round(_timed(lambda: conn.execute(raw).all(), repeat) / rows * 1e6, 3),
+        }
+    engine.dispose()
+    return results
+
+
+def format_results(results: dict, rows: int) -> str:
+    lines = [f"GUID conversion on SQLite, {rows} rows (µs per row, best run)",
+             f"{'variant':<14}{'insert':>10}{'fetch':>10}"]
+    for name, stats in results.items():
+        insert_us = "-" if stats["insert_us"] is None else f"{stats['insert_us']:.3f}"
+        lines.append(f"{name:<14}{insert_us:>10}{stats['fetch_us']:>10.3f}")
+    return "\n".join(lines)
@@ -0,0 +1,316 @@
+"""Throughput and latency benchmark for the hot API endpoints.
+
+The harness builds a real application with ``create_app`` against its own
+database (a temporary SQLite file, or an explicit ``database_url``, e.g. a
+local PostgreSQL), seeds users and grouped students, and then drives
+each scenario from ``concurrency`` threads, each with its own logged-in test
+client.  Requests go through the full WSGI stack, minus the network.
+
+Each scenario reports p50/p95/p99 latency, requests per second, SQL
+statements per request and the average wait for a pooled connection.
+Config overrides (e.g. ``DB_POOL_SIZE``) are applied to the benchmarked app
+and recorded with the results, which can be saved as a JSON baseline and
+later runs compared against it.
+
+On a database it did not create, ``close`` deletes everything the run
+seeded or registered and recomputes the group counters.
+"""
+import itertools
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event, select
+
+from app import create_app, db, metrics, seed_db
+from app.catalog import catalog
+from app.grouping import assign_groups
+from app.group_stats import recompute_group_stats
+from app.importer import import_students
+from app.models import AuditLog, Group, Student, User, student_units
+
+SCENARIOS = ("login", "groups", "public_student", "register")
+PASSWORD = "bench-password"
+EMAIL_DOMAIN = "bench.ouk.ac.ke"
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def _record(self, *args):
+        with self._lock:
+            self.count += 1
+
+
+def _pool_wait_seconds() -> float:
+    """Total time this process has spent waiting for pooled connections."""
+    return sum(
+        sample.value
+        for family in metrics.POOL_CHECKOUT_SECONDS.collect()
+        for sample in family.samples if sample.name.endswith("_sum")
+    )
+
+
+class Bench:
+    def __init__(self, users: int = 200, students: int = 500, requests: int = 500,
+                 concurrency: int = 8, database_url: str = None, settings: dict = None):
+        self.users = users
+        self.students = students
+        self.requests = requests
+        self.concurrency = concurrency
+        self._tempdir = None
+        if database_url is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix="grouper-bench-")
+            database_url = f"sqlite:///{os.path.join(self._tempdir.name, 'bench.db')}"
+        self.database_url = database_url
+        self.settings = dict(settings or {})
+        max_members = 10
+        self.app = create_app({
+            "SQLALCHEMY_DATABASE_URI": database_url,
+            "LOGIN_RATE_LIMIT": False,
+            "MAX_MEMBERS": max_members,
+            # Room for the seeded cohort plus every registration.
+            "MAX_GROUPS": max(5, -(-(students + requests) // max_members) + 1),
+            **self.settings,
+        })
+        self._run_id = f"{int(time.time()):x}"
+        self._student_ids = []
+        self._emails = []
+        self._register_emails = []
+        self._group_ids = None
+
+    # -- setup ----------------------------------------------------------------
+
+    def seed(self) -> None:
+        with self.app.app_context():
+            db.create_all()
+            seed_db()
+            self._group_ids = set(db.session.scalars(select(Group.id)))
+            template = User(email=f"seed@{EMAIL_DOMAIN}")
+            template.set_password(PASSWORD)
+
+            self._emails = [f"u{n}-{self._run_id}@{EMAIL_DOMAIN}" for n in range(self.users)]
+            self._register_emails = [
+                f"r{n}-{self._run_id}@{EMAIL_DOMAIN}" for n in range(self.concurrency)
+            ]
+            # One shared hash: verification cost is what matters, not the salt.
+            db.session.add_all(
+                User(email=email, password_hash=template.password_hash)
+                for email in self._emails + self._register_emails
+            )
+            db.session.commit()
+
+            reference = catalog()
+            course_ids = list(reference.courses)
+            unit_codes = [u["code"] for u in reference.units.values()]
+            self._student_ids = [f"BENCH/{self._run_id}/{n:06d}" for n in range(self.students)]
+            records = (
+                (n, {
+                    "name": f"Bench Student {n}",
+                    "student_id": sid,
+                    "gender": "female" if n % 5 < 2 else "male",
+                    "email": f"bench{n}-{self._run_id}@students.ouk.ac.ke",
+                    "phone": "0700000000",
+                    "course_id": course_ids[n % len(course_ids)],
+                    "units": unit_codes[n % len(unit_codes):][:4],
+                })
+                for n, sid in enumerate(self._student_ids)
+            )
+            import_students(records)
+            pending = Student.query.filter(Student.student_id.like(f"BENCH/{self._run_id}/%")).all()
+            assign_groups(pending)
+            db.session.commit()
+
+    def _logged_in_client(self, email: str):
+        client = self.app.test_client()
+        res = client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+        if res.status_code != 200:
+            raise RuntimeError(f"Could not log in {email}: {res.status_code}")
+        return client
+
+    # -- scenarios --------------------------------------------------------------
+
+    def _scenario(self, name: str):
+        """Return ``(clients, request_fn)`` where request_fn(client, n) -> response."""
+        if name == "login":
+            clients = [self.app.test_client() for _ in range(self.concurrency)]
+
+            def call(client, n):
+                email = self._emails[n % len(self._emails)]
+                return client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+            return clients, call
+
+        if name == "groups":
+            clients = [self._logged_in_client(e) for e in self._emails[:self.concurrency]]
+            return clients, lambda client, n: client.get("/api/groups")
+
+        if name == "public_student":
+            clients = [self.app.test_client() for _ in range(self.concurrency)]
+
+            def call(client, n):
+                sid = self._student_ids[n % len(self._student_ids)]
+                return client.get(f"/api/public/student/{sid}")
+            return clients, call
+
+        if name == "register":
+            clients = [self._logged_in_client(e) for e in self._register_emails]
+            with self.app.app_context():
+                reference = catalog()
+                course_id = next(iter(reference.courses))
+                unit_ids = list(reference.units)[:3]
+
+            def call(client, n):
+                return client.post("/api/register", json={
+                    "name": f"Bench Register {n}",
+                    "student_id": f"BENCH/{self._run_id}/R{n:06d}",
+                    "gender": "female" if n % 2 else "male",
+                    "email": f"benchr{n}-{self._run_id}@students.ouk.ac.ke",
+                    "phone": "0700000000",
+                    "course_id": course_id,
+                    "unit_ids": unit_ids,
+                })
+            return clients, call
+
+        raise ValueError(f"Unknown scenario: {name!r}")
+
+    def run_scenario(self, name: str) -> dict:
+        clients, call = self._scenario(name)
+        numbers = itertools.count()
+        latencies, errors = [], 0
+        lock = threading.Lock()
+
+        def worker(client):
+            nonlocal errors
+            while True:
+                n = next(numbers)
+                if n >= self.requests:
+                    return
+                started = time.perf_counter()
+                res = call(client, n)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    if res.status_code >= 400:
+                        errors += 1
+
+        with self.app.app_context():
+            engine = db.engine
+        pool_wait = _pool_wait_seconds()
+        with _QueryCounter(engine) as queries:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+                list(pool.map(worker, clients))
+            wall = time.perf_counter() - started
+        pool_wait = _pool_wait_seconds() - pool_wait
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": round(len(latencies) / wall, 1) if wall else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "queries_per_request": round(queries.count / len(latencies), 2) if latencies else 0.0,
+            "pool_wait_ms": round(pool_wait / len(latencies) * 1000, 3) if latencies else 0.0,
+        }
+
+    def run(self, scenarios=SCENARIOS) -> dict:
+        self.seed()
+        results = {name: self.run_scenario(name) for name in scenarios}
+        self.app.extensions["audit_writer"].close()
+        return {
+            "database": self.app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+            "users": self.users,
+            "students": self.students,
+            "requests": self.requests,
+            "concurrency": self.concurrency,
+            "settings": self.settings,
+            "scenarios": results,
+        }
+
+    def close(self) -> None:
+        self.app.extensions["audit_writer"].close()
+        with self.app.app_context():
+            if self._tempdir is None and self._group_ids is not None:
+                self._remove_seeded()
+            db.engine.dispose()
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+    def _remove_seeded(self) -> None:
+        """Delete this run's users, students and groups from a shared database."""
+        users = select(User.id).where(User.email.like(f"%-{self._run_id}@{EMAIL_DOMAIN}"))
+        students = select(Student.id).where(Student.student_id.like(f"BENCH/{self._run_id}/%"))
+        db.session.execute(AuditLog.__table__.delete().where(AuditLog.user_id.in_(users)))
+        db.session.execute(User.__table__.delete().where(User.id.in_(users)))
+        db.session.execute(student_units.delete().where(student_units.c.student_id.in_(students)))
+        db.session.execute(Student.__table__.delete().where(Student.id.in_(students)))
+        recompute_group_stats()
+        db.session.execute(
+            Group.__table__.delete().where(
+                Group.id.not_in(self._group_ids),
+                ~select(Student.id).where(Student.group_id == Group.id).exists(),
+            )
+        )
+        db.session.commit()
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+COLUMNS = ("rps", "p50_ms", "p95_ms", "p99_ms", "queries_per_request", "pool_wait_ms", "errors")
+
+
+def format_results(results: dict, baseline: dict = None) -> str:
+    lines = [
+        f"{results['database']}: {results['users']} users, {results['students']} students, "
+        f"{results['requests']} requests per scenario at concurrency {results['concurrency']}"
+        + "".join(f", {name}={value}" for name, value in sorted(results.get("settings", {}).items())),
+        f"{'scenario':<16}" + "".join(f"{c:>22}" for c in COLUMNS),
+    ]
+    for name, stats in results["scenarios"].items():
+        before = (baseline or {}).get("scenarios", {}).get(name, {})
+        cells = []
+        for column in COLUMNS:
+            cell = f"{stats[column]}"
+            if column in before and before[column]:
+                change = (stats[column] - before[column]) / before[column] * 100
+                cell += f" ({change:+.0f}%)"
+            cells.append(f"{cell:>22}")
+        lines.append(f"{name:<16}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def save_baseline(results: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,72 @@
+"""Micro-benchmark of encoding the ``/api/groups`` payload.
+
+Seeds a throwaway database through ``Bench``, loads the listing once with
+``Group.with_members()`` and then times only building the dicts and encoding
+them, with Flask's default provider (before) and with ``OrjsonProvider``,
+with and without ``to_dict(native=True)``.
+"""
+import gc
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import OrjsonProvider, orjson
+from app.models import Group
+from bench.harness import Bench
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(students: int = 1000, repeat: int = 20) -> dict:
+    """Return ``{variant: {"to_dict_ms", "encode_ms", "total_ms", "bytes"}}``, best of ``repeat``."""
+    harness = Bench(users=1, students=students, requests=0, concurrency=1)
+    try:
+        harness.seed()
+        app = harness.app
+        variants = {"flask json (before)": (DefaultJSONProvider(app), False)}
+        if orjson is not None:
+            variants["orjson"] = (OrjsonProvider(app), False)
+            variants["orjson + native to_dict"] = (OrjsonProvider(app), True)
+
+        results = {}
+        with app.app_context():
+            groups = Group.with_members().order_by(Group.id).all()
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for name, (provider, native) in variants.items():
+                    payload = [g.to_dict(native) for g in groups]
+                    body = provider.dumps(payload)
+                    to_dict = _best(lambda: [g.to_dict(native) for g in groups], repeat)
+                    encode = _best(lambda: provider.dumps(payload), repeat)
+                    total = _best(lambda: provider.dumps([g.to_dict(native) for g in groups]), repeat)
+                    results[name] = {
+                        "to_dict_ms": round(to_dict * 1000, 3),
+                        "encode_ms": round(encode * 1000, 3),
+                        "total_ms": round(total * 1000, 3),
+                        "bytes": len(body.encode()),
+                    }
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+    finally:
+        harness.close()
+    return results
+
+
+def format_results(results: dict, students: int) -> str:
+    lines = [f"/api/groups payload, {students} students (ms, best run)",
+             f"{'variant':<26}{'to_dict':>10}{'encode':>10}{'total':>10}{'bytes':>10}"]
+    for name, stats in results.items():
+        lines.append(
+            f"{name:<26}{stats['to_dict_ms']:>10.3f}{stats['encode_ms']:>10.3f}"
+            f"{stats['total_ms']:>10.3f}{stats['bytes']:>10}"
+        )
+    return "\n".join(lines)
@@ -10,15 +10,78 @@ def _int_env(name: str, default: int) -> int:
     return int(digits) if digits else default
 
 
+def _bool_env(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes", "on")
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get(
         "DATABASE_URL", "sqlite:///grouper.db"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool, per gunicorn worker (see app/database.py).
+    DB_POOL_SIZE = _int_env("DB_POOL_SIZE", 5)
+    DB_MAX_OVERFLOW = _int_env("DB_MAX_OVERFLOW", 10)
+    DB_POOL_TIMEOUT = _int_env("DB_POOL_TIMEOUT", 30)
+    DB_POOL_RECYCLE = _int_env("DB_POOL_RECYCLE", 1800)  # seconds; 0 = never
+    DB_POOL_PRE_PING = _bool_env("DB_POOL_PRE_PING", True)
+    # PostgreSQL only. entrypoint.sh sets a timeout for the web workers, so
+    # migrations and CLI commands are not cut short.
+    DB_STATEMENT_TIMEOUT_MS = _int_env("DB_STATEMENT_TIMEOUT_MS", 0)
+    DB_PREPARED_STATEMENTS = _bool_env("DB_PREPARED_STATEMENTS", True)  # psycopg 3 only
+    DB_PGBOUNCER = _bool_env("DB_PGBOUNCER", False)  # PgBouncer in transaction mode
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret")
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
     SESSION_COOKIE_SAMESITE = "None"
     SESSION_COOKIE_SECURE = True
     MAX_GROUPS = _int_env("MAX_GROUPS", 5)
     MAX_MEMBERS = _int_env("MAX_MEMBERS", 10)
+    # Seconds before a worker reloads its in-memory group index from scratch
+    # (catches registrations handled by other gunicorn workers).
+    GROUP_INDEX_TTL = _int_env("GROUP_INDEX_TTL", 30)
+    # Courses/units are cached per worker; changes made by another process
+    # (e.g. `flask link-units`) show up after CATALOG_TTL seconds.
+    CATALOG_TTL = _int_env("CATALOG_TTL", 300)
+    # Browser cache lifetime for /api/courses and /api/units responses.
+    CATALOG_MAX_AGE = _int_env("CATALOG_MAX_AGE", 3600)
+    # Seconds a worker trusts its cached user role/student link; role changes
+    # made elsewhere (e.g. `flask make-admin`) apply within this window.
+    USER_CACHE_TTL = _int_env("USER_CACHE_TTL", 30)
     ALLOWED_ORIGINS = os.environ.get("ALLOWED_ORIGINS", "")
+    # Encode responses with orjson when it is installed.
+    JSON_ORJSON = _bool_env("JSON_ORJSON", True)
+    # Per-request SQL counting/timing: Server-Timing headers, /api/admin/metrics
+    # and a warning log for requests over either threshold.
+    SQL_INSTRUMENTATION = _bool_env("SQL_INSTRUMENTATION", False)
+    SQL_SLOWEST_STATEMENTS = _int_env("SQL_SLOWEST_STATEMENTS", 5)
+    SLOW_REQUEST_QUERIES = _int_env("SLOW_REQUEST_QUERIES", 25)
+    SLOW_REQUEST_DB_MS = _int_env("SLOW_REQUEST_DB_MS", 200)
+    # Lets Prometheus scrape /api/admin/metrics/prometheus without an admin
+    # session, by sending "Authorization: Bearer <token>". Unset = admins only.
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+    # Login throttling, per gunicorn worker: token buckets per client IP and
+    # per email, plus a short memory of emails that matched no account.
+    LOGIN_RATE_LIMIT = _bool_env("LOGIN_RATE_LIMIT", True)
+    LOGIN_IP_PER_MINUTE = _int_env("LOGIN_IP_PER_MINUTE", 20)
+    LOGIN_IP_BURST = _int_env("LOGIN_IP_BURST", 20)
+    LOGIN_EMAIL_PER_MINUTE = _int_env("LOGIN_EMAIL_PER_MINUTE", 5)
+    LOGIN_EMAIL_BURST = _int_env("LOGIN_EMAIL_BURST", 5)
+    LOGIN_NEGATIVE_CACHE_TTL = _int_env("LOGIN_NEGATIVE_CACHE_TTL", 30)
+    # Password hashing cost. Use `flask bench-hash` to size these; existing
+    # hashes are upgraded to the current settings on each user's next login.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")  # or pbkdf2[:sha256]
+    PASSWORD_HASH_ITERATIONS = _int_env("PASSWORD_HASH_ITERATIONS", 1_000_000)  # pbkdf2 only
+    PASSWORD_SCRYPT_N = _int_env("PASSWORD_SCRYPT_N", 32768)
+    PASSWORD_SCRYPT_R = _int_env("PASSWORD_SCRYPT_R", 8)
+    PASSWORD_SCRYPT_P = _int_env("PASSWORD_SCRYPT_P", 1)
+    # Audit entries are queued and bulk-inserted by a background thread;
+    # set AUDIT_ASYNC=0 to write each one synchronously (as tests do).
+    AUDIT_ASYNC = _bool_env("AUDIT_ASYNC", True)
+    AUDIT_BATCH_SIZE = _int_env("AUDIT_BATCH_SIZE", 100)
+    AUDIT_FLUSH_INTERVAL_MS = _int_env("AUDIT_FLUSH_INTERVAL_MS", 1000)
+    AUDIT_QUEUE_SIZE = _int_env("AUDIT_QUEUE_SIZE", 10000)
+    # Distinct user agents/paths/referrers each writer remembers the ids of.
+    AUDIT_LOOKUP_CACHE_SIZE = _int_env("AUDIT_LOOKUP_CACHE_SIZE", 1024)
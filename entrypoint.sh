@@ -10,4 +10,15 @@ if ! flask db upgrade; then
 fi
 
 flask db-create
-exec gunicorn --bind 0.0.0.0:8080 --workers 2 manage:app
+
+# Workers share metric values through this directory; stale files from a
+# previous run would be summed in, so start from an empty one.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-multiproc}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Pool sizes are per worker; WEB_CONCURRENCY is also what gunicorn reads.
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-2}"
+export DB_STATEMENT_TIMEOUT_MS="${DB_STATEMENT_TIMEOUT_MS:-30000}"
+
+exec gunicorn --bind 0.0.0.0:8080 --workers "$WEB_CONCURRENCY" manage:app
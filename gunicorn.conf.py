@@ -0,0 +1,15 @@
+"""Gunicorn settings, loaded automatically from the working directory."""
+import logging
+import os
+
+
+def on_starting(server):
+    # Workers inherit this, so app INFO logs (e.g. the pool settings) show up.
+    logging.basicConfig(level=logging.INFO, format="[%(process)d] %(levelname)s %(name)s: %(message)s")
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared metrics directory.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
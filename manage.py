@@ -1,10 +1,20 @@
+import os
 import random
+import time
+from datetime import datetime, timedelta
 import click
+from sqlalchemy.orm import selectinload
 from app import create_app, db, seed_db
+from bench.cli import bench
 from app.models import Course, Student, Group, Unit, User
-from app.grouping import assign_group
+from app import audit_retention
+from app.grouping import assign_groups
+from app.importer import import_students, read_records
+from app.group_stats import recompute_group_stats
+from app.passwords import hash_method, hash_password, verify_password
 
 app = create_app()
+app.cli.add_command(bench)
 
 
 # ---------------------------------------------------------------------------
@@ -111,6 +121,109 @@ def make_admin(email: str) -> None:
     db.session.commit()
     click.secho(f"✓ {email} is now an admin.", fg="green")
 
+
+@app.cli.command("recompute-group-stats")
+def recompute_group_stats_command() -> None:
+    """Rebuild group member, gender and unit-coverage counters from the students table."""
+    repaired = recompute_group_stats()
+    db.session.commit()
+    if repaired:
+        click.secho(f"Repaired counters on {repaired} group(s).", fg="yellow")
+    else:
+        click.secho("All group counters were already correct.", fg="green")
+
+
+@app.cli.command("audit-archive")
+@click.option("--older-than", default=180, show_default=True,
+              help="Archive whole months ending at least this many days ago.")
+@click.option("--out", "directory", default="audit-archive", show_default=True,
+              type=click.Path(file_okay=False), help="Directory for the archive files.")
+@click.option("--compression", type=click.Choice(["auto", "zstd", "gzip"]), default="auto",
+              show_default=True, help="auto uses zstd when the zstandard package is installed.")
+def audit_archive(older_than: int, directory: str, compression: str) -> None:
+    """Move old audit log months to compressed JSONL files and drop them from the database."""
+    if compression == "auto":
+        compression = "zstd" if audit_retention.zstandard is not None else "gzip"
+    os.makedirs(directory, exist_ok=True)
+
+    cutoff = datetime.utcnow() - timedelta(days=older_than)
+    months = audit_retention.months_before(cutoff)
+    if not months:
+        click.echo("Nothing to archive.")
+    for month in months:
+        path, rows = audit_retention.archive_month(month, directory, compression)
+        click.secho(f"  {month:%Y-%m}: {rows} entries → {path}", fg="green")
+
+    created = audit_retention.ensure_partitions()
+    for name in created:
+        click.echo(f"  + partition {name}")
+
+
+@app.cli.command("import-students")
+@click.argument("file", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default=None,
+              help="Input format; guessed from the file extension by default.")
+@click.option("--chunk-size", default=1000, show_default=True, help="Rows validated and inserted per batch.")
+def import_students_command(file, fmt: str, chunk_size: int) -> None:
+    """Bulk-load students from a CSV or JSONL FILE (use '-' for stdin)."""
+    fmt = fmt or ("jsonl" if file.name.endswith((".jsonl", ".ndjson")) else "csv")
+    started = time.perf_counter()
+
+    def progress(result):
+        rate = result.processed / (time.perf_counter() - started)
+        click.echo(f"  {result.processed} rows read, {result.inserted} inserted ({rate:.0f} rows/s)")
+
+    result = import_students(read_records(file, fmt), chunk_size=chunk_size, on_chunk=progress)
+    elapsed = time.perf_counter() - started
+
+    for line, message in result.errors[:20]:
+        click.secho(f"  ! line {line}: {message}", fg="red")
+    if len(result.errors) > 20:
+        click.secho(f"  ! … and {len(result.errors) - 20} more invalid rows", fg="red")
+    click.secho(
+        f"Imported {result.inserted} student(s) in {elapsed:.2f}s "
+        f"({result.processed / elapsed if elapsed else 0:.0f} rows/s); "
+        f"{result.duplicates} already registered, {len(result.errors)} invalid.",
+        fg="green",
+    )
+    if result.inserted:
+        click.echo("Run 'flask assign-batch' to place the new students in groups.")
+
+
+@app.cli.command("bench-hash")
+@click.option("--seconds", default=2.0, show_default=True, help="How long to hash for.")
+@click.option("--method", default=None,
+              help="werkzeug method to try instead of the configured one, e.g. scrypt:16384:8:1.")
+def bench_hash(seconds: float, method: str) -> None:
+    """Measure password hashes per second for one worker."""
+    method = method or hash_method()
+    stored = hash_password("benchmark-password", method)
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        verify_password(stored, "benchmark-password")
+        count += 1
+    elapsed = time.perf_counter() - started
+    click.echo(f"{method}: {count / elapsed:.1f} hashes/s per worker ({elapsed / count * 1000:.1f} ms each)")
+
+
+@app.cli.command("bench-guid")
+@click.option("--rows", default=100_000, show_default=True, help="Rows to insert and fetch.")
+@click.option("--repeat", default=3, show_default=True, help="Runs per variant; the best counts.")
+def bench_guid(rows: int, repeat: int) -> None:
+    """Measure per-row GUID conversion cost on SQLite, old text storage vs blobs."""
+    from bench import guid
+    click.echo(guid.format_results(guid.run(rows, repeat), rows))
+
+
+@app.cli.command("bench-json")
+@click.option("--students", default=1000, show_default=True, help="Grouped students to seed.")
+@click.option("--repeat", default=20, show_default=True, help="Runs per variant; the best counts.")
+def bench_json(students: int, repeat: int) -> None:
+    """Measure /api/groups payload encoding with Flask's encoder vs orjson."""
+    from bench import json_encoding
+    click.echo(json_encoding.format_results(json_encoding.run(students, repeat), students))
+
+
 # ---------------------------------------------------------------------------
 # Fake data pools
 # ---------------------------------------------------------------------------
@@ -184,8 +297,8 @@ def fake(count: int, reset: bool) -> None:
     # Find the next available serial number
     start_serial = 34000 + Student.query.count() + 1
 
-    created = 0
     skipped = 0
+    students = []
 
     course_ids = [c.id for c in Course.query.all()]
     if not course_ids:
@@ -210,22 +323,51 @@ def fake(count: int, reset: bool) -> None:
             continue
 
         db.session.add(student)
+        students.append(student)
 
-        try:
-            assign_group(student)
-            db.session.commit()
-            created += 1
+    unplaced = assign_groups(students)
+    for student in unplaced:
+        db.session.delete(student)
+    db.session.commit()
+
+    for student in students:
+        if student not in unplaced:
             click.echo(f"  + {student.name} ({student.gender}, {student.course.name}) → {student.group.name}")
-        except ValueError as exc:
-            db.session.rollback()
-            click.secho(f"  ! {exc}", fg="yellow")
-            break
+    if unplaced:
+        click.secho(
+            f"  ! Registration is closed — {len(unplaced)} student(s) could not be placed.",
+            fg="yellow",
+        )
 
     click.secho(
-        f"\nDone — {created} student(s) created, {skipped} skipped.",
+        f"\nDone — {len(students) - len(unplaced)} student(s) created, {skipped} skipped.",
         fg="green",
     )
 
 
+@app.cli.command("assign-batch")
+def assign_batch() -> None:
+    """Place every student without a group, balancing the whole cohort at once."""
+    started = time.perf_counter()
+    students = (
+        Student.query
+        .filter(Student.group_id.is_(None))
+        .options(selectinload(Student.units))
+        .all()
+    )
+    if not students:
+        click.echo("No unassigned students.")
+        return
+
+    unplaced = assign_groups(students)
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+
+    placed = len(students) - len(unplaced)
+    click.secho(f"Placed {placed} student(s) in {elapsed:.2f}s.", fg="green")
+    if unplaced:
+        click.secho(f"{len(unplaced)} student(s) left unplaced — all groups are full.", fg="yellow")
+
+
 if __name__ == "__main__":
     app.cli.main()
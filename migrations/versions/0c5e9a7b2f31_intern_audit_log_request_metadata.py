@@ -0,0 +1,101 @@
+"""intern audit_logs user_agent, path and referrer into lookup tables
+
+Revision ID: 0c5e9a7b2f31
+Revises: f2a8d6c3b719
+Create Date: 2026-10-17 17:12:44.630958
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c5e9a7b2f31'
+down_revision = 'f2a8d6c3b719'
+branch_labels = None
+depends_on = None
+
+
+# text column on audit_logs -> lookup table
+LOOKUPS = {
+    'user_agent': 'audit_user_agents',
+    'path': 'audit_paths',
+    'referrer': 'audit_referrers',
+}
+
+
+def _lookup_table(name):
+    return sa.table(name, sa.column('id'), sa.column('value_hash'), sa.column('value'))
+
+
+def upgrade():
+    conn = op.get_bind()
+    audit_logs = sa.table(
+        'audit_logs', *(sa.column(c) for c in LOOKUPS), *(sa.column(f'{c}_id') for c in LOOKUPS)
+    )
+
+    for column, table_name in LOOKUPS.items():
+        op.create_table(table_name,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('value_hash', sa.String(length=32), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('value_hash')
+        )
+        with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+            batch_op.add_column(sa.Column(f'{column}_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(
+                f'fk_audit_logs_{column}_id', table_name, [f'{column}_id'], ['id']
+            )
+
+        # The distinct values number in the hundreds, so intern them in Python
+        # and let one correlated UPDATE point every row at its lookup id.
+        lookup = _lookup_table(table_name)
+        values = conn.execute(
+            sa.select(audit_logs.c[column]).where(audit_logs.c[column].isnot(None)).distinct()
+        ).scalars().all()
+        if values:
+            conn.execute(lookup.insert(), [
+                {'value_hash': hashlib.md5(v.encode()).hexdigest(), 'value': v} for v in values
+            ])
+            conn.execute(
+                audit_logs.update()
+                .where(audit_logs.c[column].isnot(None))
+                .values({f'{column}_id': (
+                    sa.select(lookup.c.id)
+                    .where(lookup.c.value == audit_logs.c[column])
+                    .scalar_subquery()
+                )})
+            )
+
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        for column in LOOKUPS:
+            batch_op.drop_column(column)
+
+
+def downgrade():
+    audit_logs = sa.table(
+        'audit_logs', *(sa.column(c) for c in LOOKUPS), *(sa.column(f'{c}_id') for c in LOOKUPS)
+    )
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_agent', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('path', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('referrer', sa.Text(), nullable=True))
+
+    for column, table_name in LOOKUPS.items():
+        lookup = _lookup_table(table_name)
+        op.get_bind().execute(
+            audit_logs.update()
+            .where(audit_logs.c[f'{column}_id'].isnot(None))
+            .values({column: (
+                sa.select(lookup.c.value)
+                .where(lookup.c.id == audit_logs.c[f'{column}_id'])
+                .scalar_subquery()
+            )})
+        )
+        with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_audit_logs_{column}_id', type_='foreignkey')
+            batch_op.drop_column(f'{column}_id')
+        op.drop_table(table_name)
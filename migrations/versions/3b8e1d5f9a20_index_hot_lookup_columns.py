@@ -0,0 +1,70 @@
+"""index students.group_id/course_id/email and the unit side of the link tables
+
+Revision ID: 3b8e1d5f9a20
+Revises: 7f3b2c9d1e64
+Create Date: 2026-10-17 22:31:05.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e1d5f9a20'
+down_revision = '7f3b2c9d1e64'
+branch_labels = None
+depends_on = None
+
+
+# users.student_id and the audit_logs lookups are already covered by unique
+# constraints and the e7b4c1a9d052 indexes.
+INDEXES = {
+    'ix_students_group_id': ('students', ['group_id']),
+    'ix_students_course_id': ('students', ['course_id']),
+    'ix_students_email': ('students', ['email']),
+    'ix_student_units_unit_id': ('student_units', ['unit_id']),
+    'ix_course_units_unit_id': ('course_units', ['unit_id']),
+}
+
+
+def _drop_invalid_indexes(conn):
+    # A CONCURRENTLY build that failed part way leaves an INVALID index
+    # behind; drop it so the retry builds it again instead of skipping it.
+    invalid = conn.execute(sa.text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+    ), {'names': list(INDEXES)}).scalars().all()
+    for name in invalid:
+        op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction, but it doesn't block
+        # registrations and logins while the indexes build.
+        with op.get_context().autocommit_block():
+            _drop_invalid_indexes(conn)
+            for name, (table, columns) in INDEXES.items():
+                op.create_index(
+                    name, table, columns, unique=False,
+                    postgresql_concurrently=True, if_not_exists=True,
+                )
+        return
+
+    inspector = sa.inspect(conn)
+    for name, (table, columns) in INDEXES.items():
+        if name not in {ix['name'] for ix in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, (table, _) in reversed(list(INDEXES.items())):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name, (table, _) in reversed(list(INDEXES.items())):
+        op.drop_index(name, table_name=table)
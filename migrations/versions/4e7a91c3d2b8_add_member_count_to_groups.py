@@ -0,0 +1,31 @@
+"""add member_count to groups
+
+Revision ID: 4e7a91c3d2b8
+Revises: bbf8fd4d3a81
+Create Date: 2026-10-17 09:12:41.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7a91c3d2b8'
+down_revision = 'bbf8fd4d3a81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        "UPDATE groups SET member_count = "
+        "(SELECT COUNT(*) FROM students WHERE students.group_id = groups.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.drop_column('member_count')
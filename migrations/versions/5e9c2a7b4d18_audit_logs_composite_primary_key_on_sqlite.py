@@ -0,0 +1,42 @@
+"""give audit_logs the (id, created_at) primary key on SQLite too
+
+Revision ID: 5e9c2a7b4d18
+Revises: 3b8e1d5f9a20
+Create Date: 2026-10-18 10:12:44.506381
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9c2a7b4d18'
+down_revision = '3b8e1d5f9a20'
+branch_labels = None
+depends_on = None
+
+
+# f2a8d6c3b719 only changed the key on PostgreSQL, where the partition key
+# must be part of it; the model declares it on every backend, so databases
+# built by create_all and by migrations must agree.
+
+
+def _rebuild(*primary_key):
+    # SQLite cannot alter a primary key in place; batch mode copies the table,
+    # with this key and everything else as reflected.
+    created_at = sa.Column('created_at', sa.DateTime(), nullable=False,
+                           primary_key='created_at' in primary_key)
+    with op.batch_alter_table('audit_logs', recreate='always', reflect_args=[
+        created_at, sa.PrimaryKeyConstraint(*primary_key),
+    ]):
+        pass
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        _rebuild('id', 'created_at')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        _rebuild('id')
@@ -0,0 +1,49 @@
+"""add email_hash to users and students
+
+Revision ID: 6a2d9f4c8e17
+Revises: d41b8e6f0a93
+Create Date: 2026-10-17 13:22:50.118734
+
+"""
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a2d9f4c8e17'
+down_revision = 'd41b8e6f0a93'
+branch_labels = None
+depends_on = None
+
+
+def _backfill(conn, table_name):
+    table = sa.table(table_name, sa.column('id'), sa.column('email'), sa.column('email_hash'))
+    rows = conn.execute(sa.select(table.c.id, table.c.email)).fetchall()
+    params = [
+        {'row_id': row_id, 'hash': hashlib.md5(email.lower().strip().encode()).hexdigest()}
+        for row_id, email in rows
+    ]
+    if params:
+        conn.execute(
+            table.update().where(table.c.id == sa.bindparam('row_id'))
+            .values(email_hash=sa.bindparam('hash')),
+            params,
+        )
+
+
+def upgrade():
+    conn = op.get_bind()
+    for table_name in ('users', 'students'):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('email_hash', sa.String(length=32), nullable=True))
+        _backfill(conn, table_name)
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.alter_column('email_hash', existing_type=sa.String(length=32), nullable=False)
+
+
+def downgrade():
+    for table_name in ('students', 'users'):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_column('email_hash')
@@ -0,0 +1,77 @@
+"""store GUID columns on SQLite as 16-byte blobs instead of 36-character text
+
+Revision ID: 7f3b2c9d1e64
+Revises: 0c5e9a7b2f31
+Create Date: 2026-10-17 21:04:18.512309
+
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3b2c9d1e64'
+down_revision = '0c5e9a7b2f31'
+branch_labels = None
+depends_on = None
+
+
+GUID_COLUMNS = {
+    'users': ('id', 'student_id'),
+    'courses': ('id',),
+    'units': ('id',),
+    'groups': ('id',),
+    'students': ('id', 'group_id', 'course_id'),
+    'student_units': ('student_id', 'unit_id'),
+    'course_units': ('course_id', 'unit_id'),
+    'group_unit_coverage': ('group_id', 'unit_id'),
+    'audit_logs': ('id', 'user_id', 'entity_id'),
+}
+
+BATCH_SIZE = 5000
+
+
+def _existing_tables(conn):
+    return set(sa.inspect(conn).get_table_names())
+
+
+def upgrade():
+    # PostgreSQL stores native uuids already.  SQLite keeps whatever storage
+    # class a value was written with whatever the declared column type, so
+    # rewriting the values is enough: no table rebuilds needed.
+    conn = op.get_bind()
+    if conn.dialect.name != 'sqlite':
+        return
+    existing = _existing_tables(conn)
+    for table, columns in GUID_COLUMNS.items():
+        if table not in existing:
+            continue
+        for column in columns:
+            rows = conn.exec_driver_sql(
+                f'SELECT rowid, {column} FROM {table} WHERE typeof({column}) = \'text\''
+            ).fetchall()
+            for start in range(0, len(rows), BATCH_SIZE):
+                conn.exec_driver_sql(
+                    f'UPDATE {table} SET {column} = ? WHERE rowid = ?',
+                    [(uuid.UUID(value).bytes, rowid) for rowid, value in rows[start:start + BATCH_SIZE]],
+                )
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'sqlite':
+        return
+    existing = _existing_tables(conn)
+    for table, columns in GUID_COLUMNS.items():
+        if table not in existing:
+            continue
+        for column in columns:
+            h = f'lower(hex({column}))'
+            conn.exec_driver_sql(
+                f'UPDATE {table} SET {column} = '
+                f"substr({h}, 1, 8) || '-' || substr({h}, 9, 4) || '-' || substr({h}, 13, 4) "
+                f"|| '-' || substr({h}, 17, 4) || '-' || substr({h}, 21, 12) "
+                f"WHERE typeof({column}) = 'blob'"
+            )
@@ -0,0 +1,58 @@
+"""add gender counts and unit coverage to groups
+
+Revision ID: 9c0f5e2a7d14
+Revises: 4e7a91c3d2b8
+Create Date: 2026-10-17 10:41:03.552907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c0f5e2a7d14'
+down_revision = '4e7a91c3d2b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('male_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('female_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Match the key types actually in the database (legacy DBs use integers).
+    insp = sa.inspect(op.get_bind())
+    group_id_type = next(c['type'] for c in insp.get_columns('groups') if c['name'] == 'id')
+    unit_id_type = next(c['type'] for c in insp.get_columns('units') if c['name'] == 'id')
+
+    op.create_table('group_unit_coverage',
+    sa.Column('group_id', group_id_type, nullable=False),
+    sa.Column('unit_id', unit_id_type, nullable=False),
+    sa.Column('member_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['unit_id'], ['units.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'unit_id')
+    )
+
+    op.execute(
+        "UPDATE groups SET "
+        "male_count = (SELECT COUNT(*) FROM students "
+        "WHERE students.group_id = groups.id AND students.gender = 'male'), "
+        "female_count = (SELECT COUNT(*) FROM students "
+        "WHERE students.group_id = groups.id AND students.gender = 'female')"
+    )
+    op.execute(
+        "INSERT INTO group_unit_coverage (group_id, unit_id, member_count) "
+        "SELECT students.group_id, student_units.unit_id, COUNT(*) "
+        "FROM students JOIN student_units ON student_units.student_id = students.id "
+        "JOIN groups ON groups.id = students.group_id "
+        "GROUP BY students.group_id, student_units.unit_id"
+    )
+
+
+def downgrade():
+    op.drop_table('group_unit_coverage')
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.drop_column('female_count')
+        batch_op.drop_column('male_count')
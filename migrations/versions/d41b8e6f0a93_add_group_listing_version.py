@@ -0,0 +1,29 @@
+"""add group_listing_version
+
+Revision ID: d41b8e6f0a93
+Revises: 9c0f5e2a7d14
+Create Date: 2026-10-17 12:05:27.913046
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41b8e6f0a93'
+down_revision = '9c0f5e2a7d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('group_listing_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO group_listing_version (id, version) VALUES (1, 0)")
+
+
+def downgrade():
+    op.drop_table('group_listing_version')
@@ -0,0 +1,36 @@
+"""add audit_logs listing indexes
+
+Revision ID: e7b4c1a9d052
+Revises: 6a2d9f4c8e17
+Create Date: 2026-10-17 14:41:08.502317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b4c1a9d052'
+down_revision = '6a2d9f4c8e17'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_audit_logs_created_at_id': ['created_at', 'id'],
+    'ix_audit_logs_action_created_at': ['action', 'created_at', 'id'],
+    'ix_audit_logs_entity_created_at': ['entity_type', 'entity_id', 'created_at', 'id'],
+    'ix_audit_logs_user_created_at': ['user_id', 'created_at', 'id'],
+}
+
+
+def upgrade():
+    existing = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('audit_logs')}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, 'audit_logs', columns, unique=False)
+
+
+def downgrade():
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name='audit_logs')
@@ -0,0 +1,89 @@
+"""partition audit_logs by month (PostgreSQL only)
+
+Revision ID: f2a8d6c3b719
+Revises: e7b4c1a9d052
+Create Date: 2026-10-17 15:56:31.284410
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a8d6c3b719'
+down_revision = 'e7b4c1a9d052'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_audit_logs_created_at_id': ['created_at', 'id'],
+    'ix_audit_logs_action_created_at': ['action', 'created_at', 'id'],
+    'ix_audit_logs_entity_created_at': ['entity_type', 'entity_id', 'created_at', 'id'],
+    'ix_audit_logs_user_created_at': ['user_id', 'created_at', 'id'],
+}
+
+# Months ahead of today to pre-create; `flask audit-archive` and
+# `flask db-create` keep extending this afterwards.
+MONTHS_AHEAD = 2
+
+
+def _month(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1)
+
+
+def _swap_out_old_table():
+    for name in INDEXES:
+        op.drop_index(name, table_name='audit_logs')
+    op.rename_table('audit_logs', 'audit_logs_old')
+    op.execute('ALTER TABLE audit_logs_old RENAME CONSTRAINT audit_logs_pkey TO audit_logs_old_pkey')
+
+
+def _copy_and_drop_old_table():
+    op.execute('INSERT INTO audit_logs SELECT * FROM audit_logs_old')
+    op.drop_table('audit_logs_old')
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'audit_logs', columns, unique=False)
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return  # SQLite keeps the plain table
+
+    _swap_out_old_table()
+    op.execute(
+        'CREATE TABLE audit_logs (LIKE audit_logs_old INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (created_at)'
+    )
+    op.create_primary_key('audit_logs_pkey', 'audit_logs', ['id', 'created_at'])
+    op.create_foreign_key(None, 'audit_logs', 'users', ['user_id'], ['id'])
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+
+    oldest = conn.execute(sa.text('SELECT min(created_at) FROM audit_logs_old')).scalar()
+    today = datetime.utcnow()
+    month = _month((oldest or today).year, (oldest or today).month)
+    last = _month(today.year, today.month + MONTHS_AHEAD)
+    while month <= last:
+        upper = _month(month.year, month.month + 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{month:%Y}m{month:%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        )
+        month = upper
+
+    _copy_and_drop_old_table()
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    _swap_out_old_table()
+    op.execute('CREATE TABLE audit_logs (LIKE audit_logs_old INCLUDING DEFAULTS)')
+    op.create_primary_key('audit_logs_pkey', 'audit_logs', ['id'])
+    op.create_foreign_key(None, 'audit_logs', 'users', ['user_id'], ['id'])
+    _copy_and_drop_old_table()
@@ -10,6 +10,11 @@ def app():
             "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
             "SECRET_KEY": "test-secret",
             "WTF_CSRF_ENABLED": False,
+            "AUDIT_ASYNC": False,
+            "LOGIN_RATE_LIMIT": False,
+            # Cheap hashes keep the many register/login calls fast.
+            "PASSWORD_HASH_METHOD": "pbkdf2",
+            "PASSWORD_HASH_ITERATIONS": 1000,
         }
     )
     with application.app_context():
@@ -1,6 +1,10 @@
 """Tests for /api/admin/* endpoints (app/admin.py)."""
 
+import uuid
+from datetime import datetime
+
 import pytest
+from sqlalchemy import event
 from app import db
 from app.models import AuditLog, Group, Student, User
 
@@ -35,6 +39,26 @@ def _cleanup_user(app, email):
             db.session.commit()
 
 
+def _add_entries(app, action, count, entity_id=None):
+    """Insert ``count`` entries sharing one timestamp; returns their ids."""
+    created_at = datetime.utcnow()
+    with app.app_context():
+        entries = [
+            AuditLog(action=action, entity_type="student", entity_id=entity_id,
+                     created_at=created_at)
+            for _ in range(count)
+        ]
+        db.session.add_all(entries)
+        db.session.commit()
+        return [str(e.id) for e in entries]
+
+
+def _remove_entries(app, action):
+    with app.app_context():
+        AuditLog.query.filter_by(action=action).delete()
+        db.session.commit()
+
+
 # ---------------------------------------------------------------------------
 # GET /api/admin/groups
 # ---------------------------------------------------------------------------
@@ -92,11 +116,74 @@ class TestAdminAuditLog:
         assert res.status_code == 200
         data = res.get_json()
         assert "entries" in data
-        assert "total" in data
-        assert "pages" in data
+        assert "next" in data
         assert isinstance(data["entries"], list)
         _cleanup_user(app, self.EMAIL)
 
+    def test_page_parameter_still_counts(self, client, app):
+        _register(client, self.EMAIL)
+        _make_admin(app, self.EMAIL)
+        _login(client, self.EMAIL)
+        data = client.get("/api/admin/audit-log?page=1").get_json()
+        assert {"entries", "total", "pages", "page"} <= set(data)
+        _cleanup_user(app, self.EMAIL)
+
+    def test_after_cursor_walks_every_entry_once(self, client, app):
+        _register(client, self.EMAIL)
+        _make_admin(app, self.EMAIL)
+        _login(client, self.EMAIL)
+        expected = _add_entries(app, "test.keyset", 7)
+
+        seen, url = [], "/api/admin/audit-log?action=test.keyset&per_page=3"
+        while url:
+            data = client.get(url).get_json()
+            seen += [e["id"] for e in data["entries"]]
+            url = data["next"] and f"/api/admin/audit-log?action=test.keyset&per_page=3&after={data['next']}"
+        assert sorted(seen) == sorted(expected)
+        assert len(seen) == len(set(seen))
+        _remove_entries(app, "test.keyset")
+        _cleanup_user(app, self.EMAIL)
+
+    def test_filters_by_entity(self, client, app):
+        _register(client, self.EMAIL)
+        _make_admin(app, self.EMAIL)
+        _login(client, self.EMAIL)
+        _add_entries(app, "test.filter", 2)
+        target = _add_entries(app, "test.filter", 1, entity_id=uuid.uuid4())[0]
+        with app.app_context():
+            entity_id = db.session.get(AuditLog, uuid.UUID(target)).entity_id
+
+        data = client.get(
+            f"/api/admin/audit-log?entity_type=student&entity_id={entity_id}"
+        ).get_json()
+        assert [e["id"] for e in data["entries"]] == [target]
+        _remove_entries(app, "test.filter")
+        _cleanup_user(app, self.EMAIL)
+
+    def test_rejects_bad_cursor_and_ids(self, client, app):
+        _register(client, self.EMAIL)
+        _make_admin(app, self.EMAIL)
+        _login(client, self.EMAIL)
+        assert client.get("/api/admin/audit-log?after=not-a-cursor").status_code == 400
+        assert client.get("/api/admin/audit-log?user_id=42").status_code == 400
+        _cleanup_user(app, self.EMAIL)
+
+    def test_includes_user_email_without_extra_queries(self, client, app):
+        _register(client, self.EMAIL)
+        _make_admin(app, self.EMAIL)
+        _login(client, self.EMAIL)
+        with app.app_context():
+            statements = []
+            listener = lambda *args: statements.append(args[2])  # noqa: E731
+            event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                data = client.get("/api/admin/audit-log?action=user.login").get_json()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", listener)
+        assert self.EMAIL in [e["user_email"] for e in data["entries"]]
+        assert sum("audit_logs" in sql for sql in statements) == 1
+        _cleanup_user(app, self.EMAIL)
+
     def test_register_creates_audit_entry(self, client, app):
         _register(client, self.EMAIL)
         _make_admin(app, self.EMAIL)
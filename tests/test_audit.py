@@ -0,0 +1,153 @@
+"""Tests for the batched audit log writer (app/audit.py)."""
+
+import time
+import uuid
+from datetime import datetime
+from sqlalchemy import event
+from app import db
+from app.audit import AuditWriter
+from app.models import AuditLog, AuditPath, AuditUserAgent, User
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _row(action, **extra):
+    return {
+        "id": uuid.uuid4(),
+        "action": action,
+        "method": "POST",
+        "path": "/api/test",
+        "created_at": datetime.utcnow(),
+        **extra,
+    }
+
+
+def _count(action):
+    return AuditLog.query.filter_by(action=action).count()
+
+
+def _cleanup(action):
+    AuditLog.query.filter_by(action=action).delete()
+    db.session.commit()
+
+
+# ---------------------------------------------------------------------------
+# AuditWriter
+# ---------------------------------------------------------------------------
+
+
+class TestAuditWriter:
+    def test_sync_mode_writes_immediately(self, app):
+        with app.app_context():
+            writer = AuditWriter(app, enabled=False)
+            writer.submit(_row("audit_sync"))
+            assert _count("audit_sync") == 1
+            _cleanup("audit_sync")
+
+    def test_async_mode_queues_until_flushed(self, app):
+        with app.app_context():
+            writer = AuditWriter(app, enabled=True, flush_interval=60)
+            writer._ensure_thread = lambda: None  # no background thread
+            for _ in range(3):
+                writer.submit(_row("audit_queued"))
+            assert _count("audit_queued") == 0
+
+            writer.flush()
+            assert _count("audit_queued") == 3
+            _cleanup("audit_queued")
+
+    def test_background_thread_writes_batches(self, app):
+        with app.app_context():
+            writer = AuditWriter(app, enabled=True, batch_size=5, flush_interval=0.05)
+            for _ in range(7):
+                writer.submit(_row("audit_background"))
+
+            # Wait without touching the database, which the writer thread
+            # shares with this one under the in-memory test engine.
+            deadline = time.monotonic() + 5
+            while not writer._queue.empty() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            writer.close()
+            assert writer._queue.empty()
+            assert _count("audit_background") == 7
+            _cleanup("audit_background")
+
+    def test_full_queue_falls_back_to_sync_write(self, app):
+        with app.app_context():
+            writer = AuditWriter(app, enabled=True, queue_size=1, flush_interval=60)
+            writer._ensure_thread = lambda: None
+            writer.submit(_row("audit_overflow"))
+            writer.submit(_row("audit_overflow"))
+            assert _count("audit_overflow") == 1
+
+            writer.flush()
+            assert _count("audit_overflow") == 2
+            _cleanup("audit_overflow")
+
+
+# ---------------------------------------------------------------------------
+# Interned user agent / path / referrer
+# ---------------------------------------------------------------------------
+
+
+class TestLookupInterning:
+    def test_values_are_stored_once_and_read_back(self, app):
+        with app.app_context():
+            writer = AuditWriter(app, enabled=False)
+            agent = "Mozilla/5.0 (Interning Test)"
+            for _ in range(3):
+                writer.submit(_row("audit_intern", user_agent=agent, referrer="https://ouk.ac.ke/"))
+
+            assert AuditUserAgent.query.filter_by(value=agent).count() == 1
+            entries = AuditLog.query.filter_by(action="audit_intern").all()
+            assert len({e.user_agent_id for e in entries}) == 1
+            data = entries[0].to_dict()
+            assert data["user_agent"] == agent
+            assert data["path"] == "/api/test"
+            assert data["referrer"] == "https://ouk.ac.ke/"
+            _cleanup("audit_intern")
+
+    def test_cached_values_skip_lookup_queries(self, app):
+        with app.app_context():
+            writer = AuditWriter(app, enabled=False)
+            writer.submit(_row("audit_cached", user_agent="Cached Agent"))
+
+            statements = []
+            listener = lambda *args: statements.append(args[2])  # noqa: E731
+            event.listen(db.engine, "before_cursor_execute", listener)
+            try:
+                writer.submit(_row("audit_cached", user_agent="Cached Agent"))
+            finally:
+                event.remove(db.engine, "before_cursor_execute", listener)
+            assert not any("audit_user_agents" in sql or "audit_paths" in sql
+                           for sql in statements)
+            _cleanup("audit_cached")
+
+    def test_lru_evicts_oldest_value(self, app):
+        with app.app_context():
+            writer = AuditWriter(app, enabled=False, lookup_cache_size=2)
+            for path in ("/lru/a", "/lru/b", "/lru/c"):
+                writer.submit(_row("audit_lru", path=path))
+            cache = writer._lookups["path"][1]
+            assert cache.get("/lru/a") is None
+            assert cache.get("/lru/c") == AuditPath.query.filter_by(value="/lru/c").one().id
+            _cleanup("audit_lru")
+
+    def test_request_metadata_round_trips(self, client, app):
+        res = client.post(
+            "/api/auth/register",
+            json={"email": "audit-roundtrip@ouk.ac.ke", "password": "pass1234"},
+            headers={"User-Agent": "RoundTrip/1.0", "Referer": "https://example.test/"},
+        )
+        with app.app_context():
+            user_id = uuid.UUID(res.get_json()["user"]["id"])
+            entry = AuditLog.query.filter_by(action="user.register", entity_id=user_id).one()
+            assert entry.user_agent == "RoundTrip/1.0"
+            assert entry.path == "/api/auth/register"
+            assert entry.referrer == "https://example.test/"
+
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
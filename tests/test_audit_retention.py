@@ -0,0 +1,108 @@
+"""Tests for audit log partitions and archival (app/audit_retention.py)."""
+
+import gzip
+import json
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+from app import audit_retention, db, seed_db
+from app.audit_retention import (
+    add_months, archive_month, ensure_partitions, month_start, months_before,
+)
+from app.models import AuditLog, AuditPath
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _add(action, *timestamps):
+    db.session.add_all(AuditLog(action=action, created_at=ts) for ts in timestamps)
+    db.session.commit()
+
+
+def _count(action):
+    return AuditLog.query.filter_by(action=action).count()
+
+
+def _cleanup(action):
+    AuditLog.query.filter_by(action=action).delete()
+    db.session.commit()
+
+
+# ---------------------------------------------------------------------------
+# Month arithmetic
+# ---------------------------------------------------------------------------
+
+
+class TestMonths:
+    def test_add_months_crosses_years(self):
+        assert add_months(datetime(2025, 11, 1), 3) == datetime(2026, 2, 1)
+        assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+
+    def test_month_start(self):
+        assert month_start(datetime(2026, 3, 17, 9, 30, 5, 12)) == datetime(2026, 3, 1)
+
+    def test_months_before_only_lists_whole_months(self, app):
+        with app.app_context():
+            _add("retention.months", datetime(2001, 1, 20), datetime(2001, 3, 2))
+            months = months_before(datetime(2001, 3, 15))
+            assert months == [datetime(2001, 1, 1), datetime(2001, 2, 1)]
+            _cleanup("retention.months")
+
+    def test_sqlite_has_no_partitions(self, app):
+        with app.app_context():
+            assert ensure_partitions() == []
+
+    def test_partition_failure_does_not_stop_seeding(self, app, monkeypatch, caplog):
+        def fail(*args, **kwargs):
+            raise OperationalError("CREATE TABLE audit_logs_y2026m10 ...", {}, Exception("overlap"))
+
+        monkeypatch.setattr(audit_retention, "ensure_partitions", fail)
+        with app.app_context():
+            seed_db()
+        assert "Could not create audit log partitions" in caplog.text
+
+
+# ---------------------------------------------------------------------------
+# archive_month()
+# ---------------------------------------------------------------------------
+
+
+class TestArchiveMonth:
+    def test_writes_jsonl_and_removes_rows(self, app, tmp_path):
+        with app.app_context():
+            _add(
+                "retention.archive",
+                datetime(2002, 5, 1), datetime(2002, 5, 31, 23, 59), datetime(2002, 6, 1),
+            )
+            path = AuditPath(value_hash=AuditPath.hash("/archive/test"), value="/archive/test")
+            db.session.add(path)
+            db.session.flush()
+            first = (
+                AuditLog.query.filter_by(action="retention.archive")
+                .order_by(AuditLog.created_at).first()
+            )
+            first.path_id = path.id
+            db.session.commit()
+            path, rows = archive_month(datetime(2002, 5, 1), str(tmp_path))
+
+            assert rows == 2
+            assert path.endswith("audit_logs-2002-05.jsonl.gz")
+            with gzip.open(path, "rt") as f:
+                entries = [json.loads(line) for line in f]
+            assert [e["action"] for e in entries] == ["retention.archive"] * 2
+            assert entries[0]["created_at"].startswith("2002-05-01")
+            assert entries[0]["path"] == "/archive/test"
+            assert entries[1]["path"] is None
+            assert not list(tmp_path.glob("*.part"))
+
+            assert _count("retention.archive") == 1  # June is untouched
+            _cleanup("retention.archive")
+
+    def test_empty_month_writes_empty_file(self, app, tmp_path):
+        with app.app_context():
+            path, rows = archive_month(datetime(1999, 1, 1), str(tmp_path))
+            assert rows == 0
+            with gzip.open(path, "rt") as f:
+                assert f.read() == ""
@@ -1,8 +1,14 @@
 """Tests for /api/auth/* endpoints (app/auth.py)."""
 
+import hashlib
+import time
+import uuid
 import pytest
+from sqlalchemy import event
 from app import db
 from app.models import Student, User
+from app.passwords import hash_method, hash_password
+from app.user_cache import UserCache
 
 
 # ---------------------------------------------------------------------------
@@ -231,3 +237,121 @@ class TestMe:
     def test_returns_401_when_not_authenticated(self, client):
         r = _me(client)
         assert r.status_code == 401
+
+    def test_gravatar_uses_stored_email_hash(self, client, app):
+        email = "GravTest@ouk.ac.ke"
+        _register(client, email)
+        expected = hashlib.md5(email.lower().encode()).hexdigest()
+        assert expected in _me(client).get_json()["user"]["gravatar_url"]
+
+        with app.app_context():
+            u = User.query.filter_by(email=email).first()
+            assert u.email_hash == expected
+            u.email = "gravtest2@ouk.ac.ke"
+            assert u.email_hash == hashlib.md5(b"gravtest2@ouk.ac.ke").hexdigest()
+            db.session.rollback()
+
+        _logout(client)
+        _cleanup_user(app, email)
+
+
+# ---------------------------------------------------------------------------
+# Current-user memoisation and role cache
+# ---------------------------------------------------------------------------
+
+
+class TestUserCache:
+    EMAIL = "cached-admin@ouk.ac.ke"
+
+    def _user_selects(self, app, fn):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            fn()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return sum("FROM users" in sql for sql in statements)
+
+    def _admin_client(self, client, app):
+        _register(client, self.EMAIL)
+        with app.app_context():
+            User.query.filter_by(email=self.EMAIL).first().role = "admin"
+            db.session.commit()
+
+    def test_admin_check_is_served_from_cache(self, client, app):
+        self._admin_client(client, app)
+        url = "/api/admin/audit-log?action=none"
+        assert self._user_selects(app, lambda: client.get(url)) == 1
+        assert self._user_selects(app, lambda: client.get(url)) == 0
+        assert client.get(url).status_code == 200
+        _logout(client)
+        _cleanup_user(app, self.EMAIL)
+
+    def test_role_change_invalidates_cache(self, client, app):
+        self._admin_client(client, app)
+        assert client.get("/api/admin/audit-log").status_code == 200
+
+        cache = app.extensions["user_cache"]
+        with app.app_context():
+            user = User.query.filter_by(email=self.EMAIL).first()
+            assert cache.get(user.id).is_admin
+            user.role = "user"
+            db.session.commit()
+            assert cache.get(user.id) is None
+        _logout(client)
+        _cleanup_user(app, self.EMAIL)
+
+    def test_entries_expire(self, app):
+        with app.app_context():
+            cache = UserCache(ttl=0.01)
+            user = User(id=uuid.uuid4(), role="admin")
+            assert cache.put(user).is_admin
+            assert cache.get(user.id).is_admin
+            time.sleep(0.02)
+            assert cache.get(user.id) is None
+
+            disabled = UserCache(ttl=0)
+            disabled.put(user)
+            assert disabled.get(user.id) is None
+
+
+# ---------------------------------------------------------------------------
+# Password hashing
+# ---------------------------------------------------------------------------
+
+
+class TestPasswordHashing:
+    def test_method_follows_config(self, app):
+        config = {
+            "PASSWORD_HASH_METHOD": "scrypt", "PASSWORD_HASH_ITERATIONS": 1,
+            "PASSWORD_SCRYPT_N": 16384, "PASSWORD_SCRYPT_R": 8, "PASSWORD_SCRYPT_P": 2,
+        }
+        assert hash_method(config) == "scrypt:16384:8:2"
+        config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha512"
+        assert hash_method(config) == "pbkdf2:sha512:1"
+        config["PASSWORD_HASH_METHOD"] = "md5"
+        with pytest.raises(ValueError):
+            hash_method(config)
+
+    def test_login_upgrades_outdated_hash(self, client, app):
+        email = "rehash@ouk.ac.ke"
+        _register(client, email)
+        _logout(client)
+        with app.app_context():
+            user = User.query.filter_by(email=email).first()
+            user.password_hash = hash_password("pass1234", "pbkdf2:sha256:500")
+            db.session.commit()
+
+        assert _login(client, email).status_code == 200
+        with app.app_context():
+            user = User.query.filter_by(email=email).first()
+            assert user.password_hash.startswith(hash_method() + "$")
+            assert user.check_password("pass1234")
+        _logout(client)
+        _cleanup_user(app, email)
@@ -0,0 +1,79 @@
+"""Smoke tests for the benchmark harness (bench/harness.py)."""
+
+from sqlalchemy import create_engine, text
+from bench import guid, json_encoding
+from bench.harness import Bench, format_results, percentile
+
+
+class TestPercentile:
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([7], 95) == 7
+        assert percentile([], 50) == 0.0
+
+
+class TestBench:
+    def test_runs_every_scenario(self):
+        harness = Bench(users=3, students=12, requests=6, concurrency=2)
+        try:
+            results = harness.run()
+        finally:
+            harness.close()
+
+        assert results["database"] == "sqlite"
+        for name, stats in results["scenarios"].items():
+            assert stats["requests"] == 6, name
+            assert stats["errors"] == 0, name
+            assert stats["queries_per_request"] > 0, name
+            assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+
+        report = format_results(results, baseline=results)
+        assert "(+0%)" in report
+
+    def test_shared_database_is_left_as_found(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'shared.db'}"
+        harness = Bench(users=3, students=12, requests=4, concurrency=2, database_url=url)
+        try:
+            harness.run()
+        finally:
+            harness.close()
+
+        engine = create_engine(url)
+        try:
+            with engine.connect() as conn:
+                for table in ("users", "students", "student_units", "groups", "audit_logs"):
+                    assert conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() == 0, table
+        finally:
+            engine.dispose()
+
+    def test_settings_are_applied_and_reported(self):
+        harness = Bench(users=2, students=4, requests=4, concurrency=2,
+                        settings={"DB_POOL_SIZE": 1})
+        try:
+            assert harness.app.config["DB_POOL_SIZE"] == 1
+            results = harness.run(["groups"])
+        finally:
+            harness.close()
+
+        assert results["settings"] == {"DB_POOL_SIZE": 1}
+        assert results["scenarios"]["groups"]["pool_wait_ms"] >= 0
+        assert "DB_POOL_SIZE=1" in format_results(results)
+
+
+class TestGUIDBench:
+    def test_reports_every_variant(self):
+        results = guid.run(rows=200, repeat=1)
+        assert set(results) == {"legacy text", "binary", "raw blobs"}
+        assert all(stats["fetch_us"] > 0 for stats in results.values())
+        assert "legacy text" in guid.format_results(results, 200)
+
+
+class TestJSONBench:
+    def test_reports_every_variant(self):
+        results = json_encoding.run(students=12, repeat=1)
+        assert "flask json (before)" in results
+        sizes = {stats["bytes"] for name, stats in results.items() if name.startswith("orjson")}
+        assert len(sizes) <= 1
+        assert "total" in json_encoding.format_results(results, 12)
@@ -0,0 +1,98 @@
+"""Tests for engine and pool settings (app/database.py)."""
+
+import logging
+from config import Config
+from app import create_app
+from app.database import engine_options
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _config(uri, **overrides):
+    config = {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+    config.update(SQLALCHEMY_DATABASE_URI=uri, **overrides)
+    return config
+
+
+# ---------------------------------------------------------------------------
+# engine_options
+# ---------------------------------------------------------------------------
+
+
+class TestEngineOptions:
+    def test_pool_settings_from_config(self):
+        options = engine_options(_config(
+            "postgresql+psycopg2://u:p@db/grouper",
+            DB_POOL_SIZE=3, DB_MAX_OVERFLOW=2, DB_POOL_RECYCLE=0, DB_POOL_PRE_PING=True,
+        ))
+        assert options["pool_size"] == 3
+        assert options["max_overflow"] == 2
+        assert options["pool_recycle"] == -1
+        assert options["pool_pre_ping"] is True
+        assert "connect_args" not in options
+
+    def test_statement_timeout_is_a_startup_option(self):
+        options = engine_options(_config(
+            "postgresql+psycopg2://u:p@db/grouper", DB_STATEMENT_TIMEOUT_MS=5000,
+        ))
+        assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    def test_pgbouncer_mode(self):
+        options = engine_options(_config(
+            "postgresql+psycopg://u:p@pgbouncer/grouper",
+            DB_PGBOUNCER=True, DB_STATEMENT_TIMEOUT_MS=5000,
+        ))
+        # No startup options through PgBouncer, and no server-side prepares.
+        assert options["connect_args"] == {"prepare_threshold": None}
+
+    def test_prepared_statements_switch_only_affects_psycopg3(self):
+        psycopg2 = engine_options(_config(
+            "postgresql+psycopg2://u:p@db/grouper", DB_PREPARED_STATEMENTS=False,
+        ))
+        psycopg3 = engine_options(_config(
+            "postgresql+psycopg://u:p@db/grouper", DB_PREPARED_STATEMENTS=False,
+        ))
+        assert "connect_args" not in psycopg2
+        assert psycopg3["connect_args"] == {"prepare_threshold": None}
+
+    def test_in_memory_sqlite_has_no_pool_sizing(self):
+        assert engine_options(_config("sqlite:///:memory:")) == {}
+
+    def test_explicit_engine_options_win(self):
+        options = engine_options(_config(
+            "sqlite:///grouper.db",
+            SQLALCHEMY_ENGINE_OPTIONS={"pool_size": 1, "echo": True},
+        ))
+        assert options["pool_size"] == 1
+        assert options["echo"] is True
+        assert options["max_overflow"] == Config.DB_MAX_OVERFLOW
+
+    def test_custom_pool_class_skips_sizing(self):
+        from sqlalchemy.pool import NullPool
+
+        options = engine_options(_config(
+            "sqlite:///grouper.db", SQLALCHEMY_ENGINE_OPTIONS={"poolclass": NullPool},
+        ))
+        assert options == {"poolclass": NullPool}
+
+
+class TestStartup:
+    def test_logs_effective_pool_settings(self, tmp_path, caplog, monkeypatch):
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        with caplog.at_level(logging.INFO, logger="app.database"):
+            app = create_app({
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'pool.db'}",
+                "AUDIT_ASYNC": False,
+                "DB_POOL_SIZE": 4,
+                "DB_MAX_OVERFLOW": 2,
+            })
+        with app.app_context():
+            from app import db
+            db.engine.dispose()
+        message = next(r.getMessage() for r in caplog.records if r.name == "app.database")
+        assert "pool=TimedQueuePool" in message
+        assert "pool_size=4" in message
+        assert "max_connections=6 per worker, 18 across 3 workers" in message
@@ -0,0 +1,214 @@
+"""Tests for the in-memory group index (app/group_index.py)."""
+
+import itertools
+from sqlalchemy import event
+from app import db
+from app.models import Group, Student, Unit
+from app.grouping import _score, assign_group
+from app.group_index import group_index
+
+_counter = itertools.count(1)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _make_unit(code):
+    u = Unit(code=code, name=f"Index {code}")
+    db.session.add(u)
+    db.session.flush()
+    return u
+
+
+def _make_student(gender="male", units=None, group=None):
+    n = next(_counter)
+    s = Student(
+        name="Index Student",
+        student_id=f"OUK/IDX/{n:06d}",
+        gender=gender,
+        email=f"idx{n}@students.ouk.ac.ke",
+        phone="0700000000",
+        units=units or [],
+        group_id=group.id if group else None,
+    )
+    db.session.add(s)
+    db.session.flush()
+    return s
+
+
+def _make_group(name):
+    g = Group(name=name)
+    db.session.add(g)
+    db.session.flush()
+    return g
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(db.engine, "before_cursor_execute", self._hook)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, "before_cursor_execute", self._hook)
+
+    def _hook(self, *args):
+        self.count += 1
+
+
+# ---------------------------------------------------------------------------
+# GroupIndex
+# ---------------------------------------------------------------------------
+
+
+class TestGroupIndex:
+    def test_aggregates_match_members(self, app):
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            u1, u2 = _make_unit("IDX 001"), _make_unit("IDX 002")
+            group = _make_group("Index Group")
+            _make_student("male", [u1], group)
+            _make_student("female", [u1, u2], group)
+            _make_student("female", [], group)
+
+            state = group_index().get(group.id)
+            assert state.member_count == 3
+            assert state.male_count == 1
+            assert state.female_count == 2
+            assert state.unit_ids == {u1.id, u2.id}
+            assert state.unit_counts[u1.id] == 2
+
+            db.session.rollback()
+
+    def test_follows_moves_between_groups(self, app):
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            unit = _make_unit("IDX 003")
+            a, b = _make_group("Index A"), _make_group("Index B")
+            student = _make_student("male", [unit], a)
+            assert group_index().get(a.id).member_count == 1
+
+            student.group_id = b.id
+            assert group_index().get(a.id).member_count == 0
+            assert group_index().get(a.id).unit_ids == set()
+            assert group_index().get(b.id).unit_ids == {unit.id}
+
+            db.session.rollback()
+
+    def test_rollback_restores_state(self, app):
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            db.session.commit()
+            group = _make_group("Index Rollback")
+            db.session.commit()
+
+            _make_student("male", [], group)
+            assert group_index().get(group.id).member_count == 1
+            db.session.rollback()
+            assert group_index().get(group.id).member_count == 0
+
+            Group.query.delete()
+            db.session.commit()
+
+    def test_assign_does_not_lazy_load_members(self, app):
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            unit = _make_unit("IDX 004")
+            for i in range(4):
+                g = _make_group(f"Index Load {i}")
+                for _ in range(3):
+                    _make_student("female", [unit], g)
+            group_index().groups()  # warm
+
+            incoming = _make_student("male", [unit])
+            with _QueryCounter() as first:
+                assign_group(incoming)
+            another = _make_student("male", [unit])
+            with _QueryCounter() as second:
+                assign_group(another)
+
+            # Only the groups touched by the previous assignment are re-read.
+            assert first.count <= 4
+            assert second.count <= 4
+
+            db.session.rollback()
+
+    def test_candidates_come_from_student_units(self, app):
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            u1, u2, u3 = _make_unit("IDX 005"), _make_unit("IDX 006"), _make_unit("IDX 007")
+            a, b, c = _make_group("Cand A"), _make_group("Cand B"), _make_group("Cand C")
+            _make_student("male", [u1], a)
+            _make_student("male", [u2], b)
+            _make_student("male", [u3], c)
+
+            ids = {g.id for g in group_index().candidates({u1.id, u2.id})}
+            assert ids == {a.id, b.id}
+
+            db.session.rollback()
+
+    def test_full_groups_are_not_candidates(self, app):
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            unit = _make_unit("IDX 008")
+            group = _make_group("Cand Full")
+            for _ in range(group_index().max_members):
+                _make_student("male", [unit], group)
+
+            state = group_index().get(group.id)
+            assert group_index().open_capacity(state) == 0
+            assert group_index().candidates({unit.id}) == []
+
+            db.session.rollback()
+
+    def test_scores_match_reference_score(self, app):
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            u1, u2, u3 = _make_unit("IDX 009"), _make_unit("IDX 010"), _make_unit("IDX 011")
+            a, b, c = _make_group("Score A"), _make_group("Score B"), _make_group("Score C")
+            _make_student("male", [u1, u2], a)
+            _make_student("male", [u2], a)
+            _make_student("female", [u3], b)
+            _make_student("other", [u1, u3], c)
+
+            index = group_index()
+            groups = [a, b, c]
+            states = [index.get(g.id) for g in groups]
+            for gender in ("male", "female", "other"):
+                incoming = _make_student(gender, [u1, u3])
+                mask = index.mask({u1.id, u3.id})
+                expected = [_score(g, incoming) for g in groups]
+                assert index.scores(states, mask, gender) == expected
+
+            db.session.rollback()
+
+    def test_ties_go_to_the_same_group_as_reference_score(self, app):
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            unit = _make_unit("IDX 012")
+            for n in range(12):
+                _make_student("male", [unit], _make_group(f"Tie {n:02d}"))
+            index = group_index()
+            index.groups()  # warm the index
+            # Re-reading a group must not move it to the back.
+            first = Group.query.all()[0]
+            index.mark_dirty({first.id})
+
+            incoming = _make_student("male", [unit])
+            expected = max(Group.query.all(), key=lambda g: _score(g, incoming))
+            assert [g.id for g in index.candidates({unit.id})] == [g.id for g in Group.query.all()]
+            assert assign_group(incoming).id == expected.id == first.id
+
+            db.session.rollback()
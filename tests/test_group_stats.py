@@ -0,0 +1,250 @@
+"""Tests for group counters and seat reservation (app/group_stats.py)."""
+
+import itertools
+import uuid
+from flask import current_app
+from app import db
+from app.models import Group, Student, Unit, group_unit_coverage
+from app.grouping import assign_group
+from app.group_index import group_index
+from app.group_stats import create_group, recompute_group_stats, reserve_seat
+
+_counter = itertools.count(1)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _make_student(gender="male", units=None, group=None):
+    n = next(_counter)
+    s = Student(
+        name="Stats Student",
+        student_id=f"OUK/STS/{n:06d}",
+        gender=gender,
+        email=f"sts{n}@students.ouk.ac.ke",
+        phone="0700000000",
+        units=units or [],
+        group_id=group.id if group else None,
+    )
+    db.session.add(s)
+    db.session.flush()
+    return s
+
+
+def _make_group(name):
+    g = Group(name=name)
+    db.session.add(g)
+    db.session.flush()
+    return g
+
+
+def _make_unit(code):
+    u = Unit(code=code, name=f"Stats {code}")
+    db.session.add(u)
+    db.session.flush()
+    return u
+
+
+def _count(group):
+    return db.session.get(Group, group.id).member_count
+
+
+def _coverage(group):
+    table = group_unit_coverage
+    rows = db.session.execute(
+        table.select().where(table.c.group_id == group.id)
+    )
+    return {row.unit_id: row.member_count for row in rows}
+
+
+# ---------------------------------------------------------------------------
+# Counter maintenance
+# ---------------------------------------------------------------------------
+
+
+class TestMemberCount:
+    def test_tracks_joins_moves_and_deletes(self, app):
+        with app.app_context():
+            a, b = _make_group("Stats A"), _make_group("Stats B")
+            s1 = _make_student(group=a)
+            s2 = _make_student(group=a)
+            assert _count(a) == 2
+
+            s1.group_id = b.id
+            db.session.flush()
+            assert (_count(a), _count(b)) == (1, 1)
+
+            db.session.delete(s2)
+            db.session.flush()
+            assert _count(a) == 0
+
+            db.session.rollback()
+
+    def test_rollback_discards_counts(self, app):
+        with app.app_context():
+            group = _make_group("Stats Rollback")
+            db.session.commit()
+            _make_student(group=group)
+            db.session.rollback()
+            assert _count(group) == 0
+
+            db.session.delete(db.session.get(Group, group.id))
+            db.session.commit()
+
+
+class TestGenderAndCoverage:
+    def test_tracks_gender_counts(self, app):
+        with app.app_context():
+            group = _make_group("Stats Gender")
+            _make_student("male", group=group)
+            f = _make_student("female", group=group)
+            _make_student("other", group=group)
+            g = db.session.get(Group, group.id)
+            assert (g.member_count, g.male_count, g.female_count) == (3, 1, 1)
+
+            f.gender = "male"
+            db.session.flush()
+            g = db.session.get(Group, group.id)
+            assert (g.male_count, g.female_count) == (2, 0)
+
+            db.session.rollback()
+
+    def test_tracks_unit_coverage(self, app):
+        with app.app_context():
+            u1, u2 = _make_unit("STS 010"), _make_unit("STS 011")
+            a, b = _make_group("Stats Cover A"), _make_group("Stats Cover B")
+            s1 = _make_student(units=[u1, u2], group=a)
+            _make_student(units=[u1], group=a)
+            assert _coverage(a) == {u1.id: 2, u2.id: 1}
+
+            s1.group_id = b.id
+            db.session.flush()
+            assert _coverage(a) == {u1.id: 1}
+            assert _coverage(b) == {u1.id: 1, u2.id: 1}
+
+            s1.units = [u2]
+            db.session.flush()
+            assert _coverage(b) == {u2.id: 1}
+
+            db.session.rollback()
+
+    def test_recompute_repairs_drift(self, app):
+        with app.app_context():
+            unit = _make_unit("STS 012")
+            group = _make_group("Stats Drift")
+            _make_student("female", units=[unit], group=group)
+            db.session.execute(
+                Group.__table__.update()
+                .where(Group.__table__.c.id == group.id)
+                .values(member_count=7, female_count=0)
+            )
+            db.session.execute(group_unit_coverage.delete())
+
+            assert recompute_group_stats() >= 1
+            g = db.session.get(Group, group.id)
+            db.session.refresh(g)
+            assert (g.member_count, g.female_count) == (1, 1)
+            assert _coverage(group) == {unit.id: 1}
+
+            db.session.rollback()
+
+
+# ---------------------------------------------------------------------------
+# reserve_seat()
+# ---------------------------------------------------------------------------
+
+
+class TestReserveSeat:
+    def test_counts_reserved_student_once(self, app):
+        with app.app_context():
+            group = _make_group("Reserve Once")
+            student = _make_student()
+            assert reserve_seat(student, group.id)
+            student.group_id = group.id
+            db.session.flush()
+            assert _count(group) == 1
+
+            db.session.rollback()
+
+    def test_refuses_full_group(self, app):
+        with app.app_context():
+            group = _make_group("Reserve Full")
+            for _ in range(current_app.config["MAX_MEMBERS"]):
+                _make_student(group=group)
+            assert not reserve_seat(_make_student(), group.id)
+            assert _count(group) == current_app.config["MAX_MEMBERS"]
+
+            db.session.rollback()
+
+    def test_assign_skips_group_filled_elsewhere(self, app):
+        """A stale index must not overfill a group another worker just filled."""
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            unit = Unit(code="STS 001", name="Stats Unit")
+            db.session.add(unit)
+            popular = _make_group("Reserve Popular")
+            _make_student(units=[unit], group=popular)
+            group_index().groups()  # warm the index
+
+            # Simulate the other worker's registrations: only the counter moves.
+            db.session.execute(
+                Group.__table__.update()
+                .where(Group.__table__.c.id == popular.id)
+                .values(member_count=current_app.config["MAX_MEMBERS"])
+            )
+
+            result = assign_group(_make_student(units=[unit]))
+            assert result.id != popular.id
+
+            db.session.rollback()
+
+
+# ---------------------------------------------------------------------------
+# create_group()
+# ---------------------------------------------------------------------------
+
+
+class TestCreateGroup:
+    def test_creates_below_the_cap(self, app):
+        with app.app_context():
+            group = create_group("Create Below Cap")
+            assert group is not None
+            assert group.name == "Create Below Cap"
+            assert group.member_count == 0
+
+            db.session.rollback()
+
+    def test_refuses_at_the_cap(self, app):
+        with app.app_context():
+            existing = Group.query.count()
+            current_app.config["MAX_GROUPS"], max_groups = existing, current_app.config["MAX_GROUPS"]
+            try:
+                assert create_group("Create Over Cap") is None
+                assert Group.query.count() == existing
+            finally:
+                current_app.config["MAX_GROUPS"] = max_groups
+                db.session.rollback()
+
+    def test_assign_respects_groups_created_elsewhere(self, app):
+        """A stale index must not push the group count past MAX_GROUPS."""
+        with app.app_context():
+            Student.query.delete()
+            Group.query.delete()
+            first, second = _make_unit("STS 101"), _make_unit("STS 102")
+            mine = _make_group("Create Mine")
+            _make_student(units=[first], group=mine)
+            group_index().groups()  # warm the index
+
+            # Simulate the other worker creating the last allowed group.
+            db.session.execute(Group.__table__.insert().values(id=uuid.uuid4(), name="Create Theirs"))
+            current_app.config["MAX_GROUPS"], max_groups = 2, current_app.config["MAX_GROUPS"]
+            try:
+                assign_group(_make_student(units=[second]))
+                db.session.flush()
+                assert Group.query.count() == 2
+            finally:
+                current_app.config["MAX_GROUPS"] = max_groups
+                db.session.rollback()
@@ -5,7 +5,7 @@ import pytest
 from flask import current_app
 from app import db
 from app.models import Course, Group, Student, Unit
-from app.grouping import _score, assign_group
+from app.grouping import _score, assign_group, assign_groups
 
 _counter = itertools.count(1)
 
@@ -282,3 +282,80 @@ class TestAssignGroup:
             assert result.id == group_a.id
 
             db.session.rollback()
+
+
+# ---------------------------------------------------------------------------
+# assign_groups() tests
+# ---------------------------------------------------------------------------
+
+
+class TestAssignGroups:
+    def test_places_whole_cohort(self, app):
+        with app.app_context():
+            Group.query.delete()
+            Student.query.delete()
+            db.session.flush()
+
+            unit = _make_unit("BAT 001", "Batch Unit")
+            cohort = [_make_student(units=[unit]) for _ in range(12)]
+            unplaced = assign_groups(cohort)
+
+            assert unplaced == []
+            assert all(s.group_id is not None for s in cohort)
+            sizes = [g.member_count for g in Group.query.all()]
+            assert max(sizes) <= current_app.config["MAX_MEMBERS"]
+            assert max(sizes) - min(sizes) <= 1
+
+            db.session.rollback()
+
+    def test_leaves_grouped_students_in_place(self, app):
+        with app.app_context():
+            Group.query.delete()
+            Student.query.delete()
+            db.session.flush()
+
+            unit = _make_unit("BAT 010", "Batch Unit 10")
+            grouped = _make_student(units=[unit])
+            home = _make_group("Batch Home", members=[grouped])
+            newcomer = _make_student(units=[unit])
+
+            assert assign_groups([grouped, newcomer]) == []
+            assert grouped.group_id == home.id
+            assert newcomer.group_id is not None
+            counts = {g.id: g.member_count for g in Group.query.all()}
+            assert sum(counts.values()) == 2
+            assert counts[home.id] == Student.query.filter_by(group_id=home.id).count()
+
+            db.session.rollback()
+
+    def test_keeps_shared_units_together(self, app):
+        with app.app_context():
+            Group.query.delete()
+            Student.query.delete()
+            db.session.flush()
+
+            u1 = _make_unit("BAT 002", "Batch Unit 2")
+            u2 = _make_unit("BAT 003", "Batch Unit 3")
+            first = [_make_student(units=[u1]) for _ in range(3)]
+            second = [_make_student(units=[u2]) for _ in range(3)]
+            assign_groups(first + second)
+
+            assert len({s.group_id for s in first}) == 1
+            assert len({s.group_id for s in second}) == 1
+
+            db.session.rollback()
+
+    def test_returns_overflow_when_all_groups_full(self, app):
+        with app.app_context():
+            Group.query.delete()
+            Student.query.delete()
+            db.session.flush()
+
+            seats = current_app.config["MAX_GROUPS"] * current_app.config["MAX_MEMBERS"]
+            cohort = [_make_student() for _ in range(seats + 2)]
+            unplaced = assign_groups(cohort)
+
+            assert len(unplaced) == 2
+            assert all(s.group_id is None for s in unplaced)
+
+            db.session.rollback()
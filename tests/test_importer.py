@@ -0,0 +1,85 @@
+"""Tests for bulk student import (app/importer.py)."""
+
+import io
+import json
+from app import db
+from app.importer import import_students, read_records
+from app.models import Course, Student, Unit, email_hash
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _csv(*rows):
+    header = "name,student_id,gender,email,phone,course,units\n"
+    return io.StringIO(header + "".join(",".join(r) + "\n" for r in rows))
+
+
+def _cleanup(prefix):
+    for student in Student.query.filter(Student.student_id.like(f"{prefix}%")):
+        student.units = []
+        db.session.delete(student)
+    db.session.commit()
+
+
+# ---------------------------------------------------------------------------
+# import_students()
+# ---------------------------------------------------------------------------
+
+
+class TestImportStudents:
+    def test_imports_csv_with_course_name_and_unit_codes(self, app):
+        with app.app_context():
+            course = Course.query.first()
+            u1, u2 = Unit.query.order_by(Unit.code).limit(2).all()
+            stream = _csv(
+                ("Ann Imp", "IMP/CSV/1", "Female", "impcsv1@students.ouk.ac.ke", "0700",
+                 course.name, f"{u1.code};{u2.code}"),
+                ("Ben Imp", "IMP/CSV/2", "male", "impcsv2@students.ouk.ac.ke", "0711", "", ""),
+            )
+            result = import_students(read_records(stream, "csv"))
+            assert (result.inserted, result.duplicates, result.errors) == (2, 0, [])
+
+            ann = Student.query.filter_by(student_id="IMP/CSV/1").one()
+            assert ann.gender == "female"
+            assert ann.course_id == course.id
+            assert {u.id for u in ann.units} == {u1.id, u2.id}
+            assert ann.email_hash == email_hash(ann.email)
+            assert ann.group_id is None
+            _cleanup("IMP/CSV/")
+
+    def test_skips_duplicates_in_file_and_database(self, app):
+        with app.app_context():
+            lines = [
+                json.dumps({"name": f"Dup {n}", "student_id": f"IMP/DUP/{n % 3}",
+                            "gender": "male", "email": f"impdup{n}@students.ouk.ac.ke",
+                            "phone": "0700"})
+                for n in range(5)
+            ]
+            records = list(read_records(io.StringIO("\n".join(lines)), "jsonl"))
+            first = import_students(records, chunk_size=2)
+            assert (first.inserted, first.duplicates) == (3, 2)
+
+            again = import_students(records, chunk_size=2)
+            assert (again.inserted, again.duplicates) == (0, 5)
+            _cleanup("IMP/DUP/")
+
+    def test_reports_invalid_rows_with_line_numbers(self, app):
+        with app.app_context():
+            stream = io.StringIO("\n".join([
+                json.dumps({"name": "No Email", "student_id": "IMP/BAD/1", "gender": "male",
+                            "phone": "0700"}),
+                json.dumps({"name": "Wrong Domain", "student_id": "IMP/BAD/2", "gender": "male",
+                            "email": "x@gmail.com", "phone": "0700"}),
+                json.dumps({"name": "Bad Unit", "student_id": "IMP/BAD/3", "gender": "male",
+                            "email": "impbad3@students.ouk.ac.ke", "phone": "0700",
+                            "units": ["NOPE 999"]}),
+                "{not json",
+            ]))
+            result = import_students(read_records(stream, "jsonl"))
+            assert result.inserted == 0
+            assert [line for line, _ in result.errors] == [1, 2, 3, 4]
+            assert "email" in result.errors[0][1]
+            assert "NOPE 999" in result.errors[2][1]
@@ -0,0 +1,104 @@
+"""Tests for per-request SQL instrumentation (app/instrumentation.py)."""
+
+import logging
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.instrumentation import RequestStats
+from app.models import User
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def instrumented(app):
+    app.config["SQL_INSTRUMENTATION"] = True
+    app.extensions["sql_metrics"].reset()
+    yield app
+    app.config["SQL_INSTRUMENTATION"] = False
+    app.extensions["sql_metrics"].reset()
+
+
+def _login_admin(client, app, email="metrics-admin@ouk.ac.ke"):
+    client.post("/api/auth/register", json={"email": email, "password": "pass1234"})
+    with app.app_context():
+        User.query.filter_by(email=email).first().role = "admin"
+        db.session.commit()
+
+
+def _cleanup_user(app, email="metrics-admin@ouk.ac.ke"):
+    with app.app_context():
+        user = User.query.filter_by(email=email).first()
+        if user:
+            db.session.delete(user)
+            db.session.commit()
+
+
+def _timings(response):
+    return dict(
+        (entry.split(";")[0], entry) for entry in response.headers.getlist("Server-Timing")
+    )
+
+
+# ---------------------------------------------------------------------------
+# Server-Timing and aggregates
+# ---------------------------------------------------------------------------
+
+
+class TestInstrumentation:
+    def test_disabled_by_default(self, client):
+        res = client.get("/api/courses")
+        assert "Server-Timing" not in res.headers
+
+    def test_reports_server_timing(self, client, instrumented):
+        res = client.get("/api/public/student/NO-SUCH-STUDENT")
+        timings = _timings(res)
+        assert 'desc="1 queries"' in timings["db"]
+        assert "app" in timings
+
+    def test_aggregates_per_endpoint(self, client, instrumented):
+        _login_admin(client, instrumented)
+        for _ in range(2):
+            client.get("/api/public/student/NO-SUCH-STUDENT")
+
+        data = client.get("/api/admin/metrics").get_json()
+        assert data["enabled"] is True
+        stats = data["endpoints"]["GET /api/public/student/<path:student_id>"]
+        assert stats["requests"] == 2
+        assert stats["queries_per_request"] == 1
+        slowest = data["slowest_statements"]
+        assert slowest and slowest[0]["ms"] >= slowest[-1]["ms"]
+        assert {"endpoint", "statement"} <= set(slowest[0])
+        _cleanup_user(instrumented)
+
+    def test_metrics_require_admin(self, client):
+        assert client.get("/api/admin/metrics").status_code == 401
+
+    def test_logs_slow_requests(self, client, instrumented, caplog):
+        instrumented.config["SLOW_REQUEST_QUERIES"] = 0
+        try:
+            with caplog.at_level(logging.WARNING, logger="app.instrumentation"):
+                client.get("/api/public/student/NO-SUCH-STUDENT")
+        finally:
+            instrumented.config["SLOW_REQUEST_QUERIES"] = 25
+        assert "Slow request GET /api/public/student/<path:student_id>: 1 queries" in caplog.text
+
+    def test_failed_statements_leave_nothing_on_the_connection(self, app):
+        with app.app_context():  # its own g, as a request would have
+            g._sql_stats = RequestStats(5)
+            connection = db.session.connection()
+            info_before = dict(connection.info)
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    connection.execute(text("SELECT * FROM no_such_table"))
+                db.session.rollback()
+                connection = db.session.connection()
+            connection.execute(text("SELECT 1"))
+            assert dict(connection.info) == info_before
+            assert g._sql_stats.queries == 1
+            db.session.rollback()
@@ -0,0 +1,126 @@
+"""Tests for the orjson JSON provider (app/json_provider.py)."""
+
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from app import db, json_provider
+from app.json_provider import OrjsonProvider, fragment, native_json, orjson
+from app.listing import ListingCache
+from app.models import Course, Group, Student, Unit, User
+
+pytestmark = pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _listing_body(client, app, fragment_type):
+    """GET /api/groups with fragments built as ``fragment_type`` (None = dicts)."""
+    json_provider._fragment.cache_clear()
+    app.extensions["listing_cache"] = ListingCache()
+    original = json_provider._Fragment
+    json_provider._Fragment = fragment_type
+    try:
+        res = client.get("/api/groups")
+    finally:
+        json_provider._Fragment = original
+        json_provider._fragment.cache_clear()
+    assert res.status_code == 200
+    return res.get_data()
+
+
+def _enroll(client, app, student_id):
+    with app.app_context():
+        course = Course.query.first()
+        unit_ids = [u.id for u in Unit.query.limit(2)]
+    client.post("/api/register", json={
+        "name": "Fragment Student", "student_id": student_id, "gender": "female",
+        "email": "fragment@students.ouk.ac.ke", "phone": "0700000000",
+        "course_id": course.id, "unit_ids": unit_ids,
+    })
+
+
+def _cleanup_student(app, student_id):
+    with app.app_context():
+        student = Student.query.filter_by(student_id=student_id).first()
+        if student:
+            User.query.filter_by(student_id=student.id).update({"student_id": None})
+            db.session.delete(student)
+            db.session.commit()
+
+
+# ---------------------------------------------------------------------------
+# Provider
+# ---------------------------------------------------------------------------
+
+
+class TestOrjsonProvider:
+    def test_is_the_app_provider(self, app):
+        assert isinstance(app.json, OrjsonProvider)
+        assert native_json()
+
+    def test_same_values_as_flask_provider(self, app):
+        payload = {
+            "id": uuid.uuid4(),
+            "when": datetime(2026, 10, 17, 12, 30),
+            "day": date(2026, 10, 17),
+            "amount": Decimal("1.50"),
+            "name": "Wanjikũ",
+            "nested": [{"b": 1, "a": None}],
+        }
+        expected = json.loads(DefaultJSONProvider(app).dumps(payload))
+        assert json.loads(OrjsonProvider(app).dumps(payload)) == expected
+
+    def test_sorts_keys_like_flask(self, app):
+        assert OrjsonProvider(app).dumps({"b": 1, "a": 2}) == '{"a":2,"b":1}'
+
+    def test_response(self, app):
+        response = app.json.response({"ok": True})
+        assert response.mimetype == "application/json"
+        assert response.get_data() == b'{"ok":true}\n'
+
+    def test_invalid_request_body_is_a_400(self, auth_client):
+        res = auth_client.post("/api/register", data="{not json",
+                               content_type="application/json")
+        assert res.status_code == 400
+
+
+# ---------------------------------------------------------------------------
+# Native to_dict and fragments
+# ---------------------------------------------------------------------------
+
+
+class TestNativeDicts:
+    def test_fragments_are_built_once(self):
+        unit_id = uuid.uuid4()
+        first = fragment(id=unit_id, code="CSC 101", name="Intro")
+        assert fragment(id=unit_id, code="CSC 101", name="Intro") is first
+        assert fragment(id=unit_id, code="CSC 101", name="Renamed") is not first
+
+    def test_unit_fragment_encodes_like_to_dict(self, app):
+        with app.app_context():
+            unit = Unit.query.first()
+            assert json.loads(app.json.dumps(unit.to_dict(native=True))) == unit.to_dict()
+
+    def test_group_listing_matches_text_dicts(self, app):
+        with app.app_context():
+            groups = Group.with_members().order_by(Group.id).all()
+            native = json.loads(app.json.dumps([g.to_dict(native=True) for g in groups]))
+            text = json.loads(DefaultJSONProvider(app).dumps([g.to_dict() for g in groups]))
+        assert native == text
+
+    @pytest.mark.skipif(not hasattr(orjson, "Fragment"), reason="orjson has no Fragment")
+    def test_listing_bytes_match_with_pre_encoded_fragments(self, auth_client, app):
+        _enroll(auth_client, app, "OUK/FRAG/001")
+        try:
+            as_dicts = _listing_body(auth_client, app, None)
+            as_fragments = _listing_body(auth_client, app, orjson.Fragment)
+        finally:
+            _cleanup_student(app, "OUK/FRAG/001")
+        assert b"OUK/FRAG/001" in as_dicts
+        assert as_fragments == as_dicts
@@ -0,0 +1,180 @@
+"""Tests for the Prometheus metrics (app/metrics.py)."""
+
+import os
+import subprocess
+import sys
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+from sqlalchemy import create_engine, text
+from app import db, metrics
+from app.models import Student, User
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _login_admin(client, app, email="prom-admin@ouk.ac.ke"):
+    client.post("/api/auth/register", json={"email": email, "password": "pass1234"})
+    with app.app_context():
+        User.query.filter_by(email=email).first().role = "admin"
+        db.session.commit()
+
+
+def _cleanup(app, emails, student_ids=()):
+    with app.app_context():
+        for sid in student_ids:
+            student = Student.query.filter_by(student_id=sid).first()
+            if student:
+                User.query.filter_by(student_id=student.id).update({"student_id": None})
+                db.session.delete(student)
+        for email in emails:
+            user = User.query.filter_by(email=email).first()
+            if user:
+                db.session.delete(user)
+        db.session.commit()
+
+
+def _register_payload(client, student_id):
+    course = client.get("/api/courses").get_json()[0]
+    units = client.get(f"/api/units?course_id={course['id']}").get_json()
+    return {
+        "name": "Prom Student",
+        "student_id": student_id,
+        "gender": "female",
+        "email": "prom@students.ouk.ac.ke",
+        "phone": "0700000000",
+        "course_id": course["id"],
+        "unit_ids": [u["id"] for u in units[:2]],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Endpoint
+# ---------------------------------------------------------------------------
+
+
+class TestPrometheusEndpoint:
+    def test_requires_admin(self, auth_client):
+        assert auth_client.get("/api/admin/metrics/prometheus").status_code == 403
+
+    def test_admin_can_scrape(self, client, app):
+        _login_admin(client, app)
+        try:
+            res = client.get("/api/admin/metrics/prometheus")
+            assert res.status_code == 200
+            assert res.content_type.startswith("text/plain")
+            body = res.get_data(as_text=True)
+            for name in ("grouper_assign_group_seconds", "grouper_logins_total",
+                         "grouper_db_pool_checkout_seconds"):
+                assert f"# TYPE {name}" in body
+        finally:
+            _cleanup(app, ["prom-admin@ouk.ac.ke"])
+
+    def test_bearer_token(self, client, app):
+        app.config["METRICS_TOKEN"] = "scrape-secret"
+        try:
+            ok = client.get("/api/admin/metrics/prometheus",
+                            headers={"Authorization": "Bearer scrape-secret"})
+            wrong = client.get("/api/admin/metrics/prometheus",
+                               headers={"Authorization": "Bearer nope"})
+        finally:
+            app.config["METRICS_TOKEN"] = ""
+        assert ok.status_code == 200
+        assert wrong.status_code == 401
+
+
+# ---------------------------------------------------------------------------
+# Instrumented code paths
+# ---------------------------------------------------------------------------
+
+
+class TestCounters:
+    def test_login_outcomes(self, client):
+        email = "prom-login@ouk.ac.ke"
+        client.post("/api/auth/register", json={"email": email, "password": "pass1234"})
+        success = _sample("grouper_logins_total", outcome="success")
+        failure = _sample("grouper_logins_total", outcome="failure")
+        try:
+            client.post("/api/auth/login", json={"email": email, "password": "pass1234"})
+            client.post("/api/auth/login", json={"email": email, "password": "wrong"})
+        finally:
+            _cleanup(client.application, [email])
+        assert _sample("grouper_logins_total", outcome="success") == success + 1
+        assert _sample("grouper_logins_total", outcome="failure") == failure + 1
+
+    def test_registration_outcomes_and_assignment(self, auth_client):
+        payload = _register_payload(auth_client, "PROM/0001")
+        created = _sample("grouper_registrations_total", outcome="created")
+        duplicate = _sample("grouper_registrations_total", outcome="duplicate")
+        invalid = _sample("grouper_registrations_total", outcome="invalid")
+        assignments = _sample("grouper_assign_group_seconds_count")
+        audit_writes = _sample("grouper_audit_write_seconds_count")
+        try:
+            assert auth_client.post("/api/register", json=payload).status_code == 201
+            assert auth_client.post("/api/register", json=payload).status_code == 409
+            assert auth_client.post("/api/register", json={**payload, "phone": ""}).status_code == 400
+        finally:
+            _cleanup(auth_client.application, [], ["PROM/0001"])
+        assert _sample("grouper_registrations_total", outcome="created") == created + 1
+        assert _sample("grouper_registrations_total", outcome="duplicate") == duplicate + 1
+        assert _sample("grouper_registrations_total", outcome="invalid") == invalid + 1
+        assert _sample("grouper_assign_group_seconds_count") == assignments + 1
+        assert _sample("grouper_assign_group_candidates_count") >= 1
+        assert _sample("grouper_audit_write_seconds_count") > audit_writes
+
+
+class TestTimedQueuePool:
+    def test_records_checkout_wait_and_overflow(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=metrics.TimedQueuePool, pool_size=1, max_overflow=1,
+        )
+        checkouts = _sample("grouper_db_pool_checkout_seconds_count")
+        try:
+            with engine.connect() as first, engine.connect() as second:
+                first.execute(text("SELECT 1"))
+                second.execute(text("SELECT 1"))
+                assert _sample("grouper_db_pool_overflow") == 1
+            assert _sample("grouper_db_pool_overflow") == 0
+        finally:
+            engine.dispose()
+        assert _sample("grouper_db_pool_checkout_seconds_count") == checkouts + 2
+
+    def test_app_engine_uses_it_by_default(self, tmp_path):
+        from app import create_app
+
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}", "AUDIT_ASYNC": False,
+        })
+        with app.app_context():
+            assert isinstance(db.engine.pool, metrics.TimedQueuePool)
+            db.engine.dispose()
+
+
+# ---------------------------------------------------------------------------
+# Multiprocess aggregation
+# ---------------------------------------------------------------------------
+
+_WORKER = """
+from app import metrics
+metrics.LOGINS.labels("success").inc(3)
+metrics.ASSIGN_GROUP_CANDIDATES.observe(4)
+"""
+
+
+class TestMultiprocess:
+    def test_values_are_summed_across_workers(self, tmp_path):
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", _WORKER], env=env, cwd=root, check=True)
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+        assert registry.get_sample_value("grouper_logins_total", {"outcome": "success"}) == 6
+        assert registry.get_sample_value("grouper_assign_group_candidates_count") == 2
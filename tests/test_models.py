@@ -0,0 +1,39 @@
+"""Tests for the GUID column type (app/models.py)."""
+
+import uuid
+from sqlalchemy.dialects.postgresql import psycopg2
+from app import db
+from app.models import GUID, Course
+
+
+class TestGUID:
+    def test_stored_as_16_byte_blob_on_sqlite(self, app):
+        with app.app_context():
+            course = Course.query.first()
+            stored = db.session.execute(
+                db.text("SELECT typeof(id), id FROM courses WHERE name = :name"),
+                {"name": course.name},
+            ).one()
+        assert stored[0] == "blob"
+        assert stored[1] == course.id.bytes
+
+    def test_round_trips_uuids_and_strings(self, app):
+        with app.app_context():
+            course = Course.query.first()
+            assert isinstance(course.id, uuid.UUID)
+            assert db.session.get(Course, str(course.id)).id == course.id
+            assert Course.query.filter(Course.id == str(course.id)).one() is course
+
+    def test_reads_text_ids_left_by_an_unmigrated_database(self):
+        value = uuid.uuid4()
+        processor = GUID().dialect_impl(db.engine.dialect).result_processor(db.engine.dialect, None)
+        assert processor(str(value)) == value
+        assert processor(value.bytes) == value
+        assert processor(None) is None
+
+    def test_no_result_conversion_on_postgresql(self):
+        dialect = psycopg2.dialect()
+        impl = GUID().dialect_impl(dialect)
+        assert impl.result_processor(dialect, None) is None
+        value = uuid.uuid4()
+        assert impl.bind_processor(dialect)(str(value)) == value
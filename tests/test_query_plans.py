@@ -0,0 +1,67 @@
+"""Query-plan tests: the hot lookups must be served by an index, not a scan."""
+
+import uuid
+import pytest
+from sqlalchemy import select
+from app import db
+from app.models import AuditLog, Student, User, course_units, student_units
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _plan(statement) -> str:
+    """SQLite's ``EXPLAIN QUERY PLAN`` for ``statement``, one step per line."""
+    compiled = statement.compile(dialect=db.engine.dialect)
+    # The plan doesn't depend on the values, only on which columns are bound.
+    params = tuple(None for _ in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return "\n".join(row[-1] for row in rows)
+
+
+HOT_QUERIES = {
+    # Group.students / Group.with_members()
+    "students by group": (
+        select(Student).where(Student.group_id == uuid.uuid4()), "ix_students_group_id",
+    ),
+    "students by course": (
+        select(Student.id).where(Student.course_id == uuid.uuid4()), "ix_students_course_id",
+    ),
+    # auth._try_link on every login
+    "student by email": (
+        select(Student).where(Student.email == "someone@students.ouk.ac.ke"), "ix_students_email",
+    ),
+    "students taking a unit": (
+        select(student_units.c.student_id).where(student_units.c.unit_id == uuid.uuid4()),
+        "ix_student_units_unit_id",
+    ),
+    "courses offering a unit": (
+        select(course_units.c.course_id).where(course_units.c.unit_id == uuid.uuid4()),
+        "ix_course_units_unit_id",
+    ),
+    # Student.user backref, account linking on registration
+    "user by student": (
+        select(User).where(User.student_id == uuid.uuid4()), "sqlite_autoindex_users",
+    ),
+    "audit log by user": (
+        select(AuditLog.id).where(AuditLog.user_id == uuid.uuid4())
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc()),
+        "ix_audit_logs_user_created_at",
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Plans
+# ---------------------------------------------------------------------------
+
+
+class TestQueryPlans:
+    @pytest.mark.parametrize("name", list(HOT_QUERIES))
+    def test_uses_index(self, app, name):
+        statement, index = HOT_QUERIES[name]
+        plan = _plan(statement)
+        assert not any(step.startswith("SCAN") for step in plan.split("\n")), plan
+        assert f"INDEX {index}" in plan, plan
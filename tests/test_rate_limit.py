@@ -0,0 +1,192 @@
+"""Tests for login throttling (app/rate_limit.py)."""
+
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User
+from app.rate_limit import LoginLimiter, TokenBuckets
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _login(client, email, password="wrong-password"):
+    return client.post("/api/auth/login", json={"email": email, "password": password})
+
+
+def _count_queries(app, fn):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+@pytest.fixture()
+def limiter(app):
+    """Swap in an enabled limiter for the duration of one test."""
+    original = app.extensions["login_limiter"]
+    app.extensions["login_limiter"] = LoginLimiter(
+        ip_per_minute=60, ip_burst=3, email_per_minute=60, email_burst=2, negative_ttl=30,
+    )
+    yield app.extensions["login_limiter"]
+    app.extensions["login_limiter"] = original
+
+
+# ---------------------------------------------------------------------------
+# Token buckets
+# ---------------------------------------------------------------------------
+
+
+class TestTokenBuckets:
+    def test_burst_then_refill(self):
+        buckets = TokenBuckets(per_minute=60, burst=2)
+        assert buckets.take("a", 0.0) == 0
+        assert buckets.take("a", 0.0) == 0
+        assert buckets.take("a", 0.0) == pytest.approx(1.0)
+        assert buckets.take("a", 1.0) == 0
+        assert buckets.take("b", 1.0) == 0  # keys are independent
+
+    def test_evicts_least_recently_used(self):
+        buckets = TokenBuckets(per_minute=60, burst=1, max_keys=2)
+        for key in ("a", "b", "c"):
+            buckets.take(key, 0.0)
+        assert len(buckets) == 2
+        assert buckets.take("a", 0.0) == 0  # evicted, so full again
+
+
+class TestLoginLimiter:
+    def test_negative_cache_expires(self):
+        clock = _Clock()
+        limiter = LoginLimiter(negative_ttl=30, clock=clock)
+        limiter.remember_unknown("ghost@ouk.ac.ke")
+        assert limiter.is_unknown("ghost@ouk.ac.ke")
+        clock.now += 31
+        assert not limiter.is_unknown("ghost@ouk.ac.ke")
+
+    def test_negative_cache_is_case_sensitive_like_the_lookup(self):
+        limiter = LoginLimiter(negative_ttl=30)
+        limiter.remember_unknown("Jane@ouk.ac.ke")
+        assert not limiter.is_unknown("jane@ouk.ac.ke")
+
+    def test_disabled_limiter_allows_everything(self):
+        limiter = LoginLimiter(enabled=False, ip_burst=0)
+        assert limiter.check("1.2.3.4", "a@ouk.ac.ke") == 0
+        limiter.remember_unknown("a@ouk.ac.ke")
+        assert not limiter.is_unknown("a@ouk.ac.ke")
+
+
+# ---------------------------------------------------------------------------
+# POST /api/auth/login
+# ---------------------------------------------------------------------------
+
+
+class TestLoginThrottling:
+    def test_rejects_ip_before_touching_the_database(self, client, app, limiter):
+        for n in range(3):
+            _login(client, f"ip{n}@ouk.ac.ke")
+        res = None
+
+        def attempt():
+            nonlocal res
+            res = _login(client, "ip-last@ouk.ac.ke")
+
+        assert _count_queries(app, attempt) == 0
+        assert res.status_code == 429
+        assert int(res.headers["Retry-After"]) >= 1
+        assert limiter.stats()["rejected_ip"] == 1
+
+    def test_rejects_repeated_email(self, client, limiter):
+        limiter.negative_ttl = 0  # only the email bucket
+        headers = [{"X-Forwarded-For": f"10.0.0.{n}"} for n in range(3)]
+        codes = [
+            client.post("/api/auth/login", headers=h,
+                        json={"email": "same@ouk.ac.ke", "password": "x"}).status_code
+            for h in headers
+        ]
+        assert codes == [401, 401, 429]
+        assert limiter.stats()["rejected_email"] == 1
+
+    def test_unknown_email_is_answered_from_memory(self, client, app, limiter):
+        assert _login(client, "ghost@ouk.ac.ke").status_code == 401
+        res = None
+
+        def attempt():
+            nonlocal res
+            res = _login(client, "ghost@ouk.ac.ke")
+
+        assert _count_queries(app, attempt) == 0
+        assert res.status_code == 429
+        assert 1 <= int(res.headers["Retry-After"]) <= 30
+        assert limiter.stats()["negative_cache_hits"] == 1
+
+    def test_account_registered_on_another_worker_is_not_refused(self, tmp_path):
+        config = {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'workers.db'}",
+            "AUDIT_ASYNC": False,
+            "PASSWORD_HASH_METHOD": "pbkdf2",
+            "PASSWORD_HASH_ITERATIONS": 1000,
+        }
+        worker_a, worker_b = create_app(config), create_app(config)
+        with worker_a.app_context():
+            db.create_all()
+        clock = _Clock()
+        worker_a.extensions["login_limiter"] = LoginLimiter(negative_ttl=30, clock=clock)
+        email = "two-workers@ouk.ac.ke"
+        try:
+            assert _login(worker_a.test_client(), email, "pass1234").status_code == 401
+            worker_b.test_client().post(
+                "/api/auth/register", json={"email": email, "password": "pass1234"}
+            )
+
+            res = _login(worker_a.test_client(), email, "pass1234")
+            assert res.status_code == 429
+            assert "Retry-After" in res.headers
+            clock.now += 31
+            assert _login(worker_a.test_client(), email, "pass1234").status_code == 200
+        finally:
+            for worker in (worker_a, worker_b):
+                with worker.app_context():
+                    db.engine.dispose()
+
+    def test_miscased_email_does_not_lock_out_the_account(self, client, app, limiter):
+        email = "jane-case@ouk.ac.ke"
+        client.post("/api/auth/register", json={"email": email, "password": "pass1234"})
+        client.post("/api/auth/logout")
+        try:
+            assert _login(client, "Jane-Case@ouk.ac.ke", "pass1234").status_code == 401
+            assert _login(client, email, "pass1234").status_code == 200
+        finally:
+            client.post("/api/auth/logout")
+            with app.app_context():
+                db.session.delete(User.query.filter_by(email=email).first())
+                db.session.commit()
+
+    def test_registration_clears_negative_cache(self, client, app, limiter):
+        email = "late-signup@ouk.ac.ke"
+        _login(client, email)
+        client.post("/api/auth/register", json={"email": email, "password": "pass1234"})
+        client.post("/api/auth/logout")
+        assert not limiter.is_unknown(email)
+
+        with app.app_context():
+            db.session.delete(User.query.filter_by(email=email).first())
+            db.session.commit()
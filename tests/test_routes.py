@@ -2,7 +2,9 @@
 
 import pytest
 from flask import current_app
+from sqlalchemy import event
 from app import db
+from app.group_stats import recompute_group_stats
 from app.models import Course, Group, Student, Unit, User
 
 
@@ -44,6 +46,23 @@ def _cleanup_student(app, student_id_str):
             db.session.commit()
 
 
+def _count_queries(app, fn):
+    """Run ``fn`` and return how many SQL statements it executed."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(statements)
+
+
 def _valid_enroll_payload(app, student_id="OUK/RT/001"):
     """Return a minimal valid enroll payload using real DB IDs."""
     with app.app_context():
@@ -104,6 +123,57 @@ class TestGetUnits:
         assert r.status_code == 401
 
 
+class TestCatalogCaching:
+    def test_units_for_course_sorted_by_code(self, client, app):
+        _register_and_login(client)
+        with app.app_context():
+            course = Course.query.filter(Course.units.any()).first()
+            expected = sorted(u.code for u in course.units)
+        r = client.get(f"/api/units?course_id={course.id}")
+        assert r.status_code == 200
+        assert [u["code"] for u in r.get_json()] == expected
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+
+    def test_unknown_course_returns_404(self, client, app):
+        _register_and_login(client)
+        r = client.get("/api/units?course_id=00000000-0000-0000-0000-000000000000")
+        assert r.status_code == 404
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+
+    def test_cache_headers_and_revalidation(self, client, app):
+        _register_and_login(client)
+        r = client.get("/api/courses")
+        assert "max-age" in r.headers["Cache-Control"]
+        again = client.get("/api/courses", headers={"If-None-Match": r.headers["ETag"]})
+        assert again.status_code == 304
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+
+    def test_served_without_queries_once_loaded(self, client, app):
+        _register_and_login(client)
+        client.get("/api/units")
+        assert _count_queries(app, lambda: client.get("/api/units")) == 0
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+
+    def test_new_unit_invalidates_catalog(self, client, app):
+        _register_and_login(client)
+        client.get("/api/units")
+        with app.app_context():
+            db.session.add(Unit(code="CAT 001", name="Catalog Unit"))
+            db.session.commit()
+        codes = [u["code"] for u in client.get("/api/units").get_json()]
+        assert "CAT 001" in codes
+
+        with app.app_context():
+            Unit.query.filter_by(code="CAT 001").delete()
+            db.session.commit()
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+
+
 # ---------------------------------------------------------------------------
 # POST /api/register  (student enrolment)
 # ---------------------------------------------------------------------------
@@ -293,6 +363,101 @@ class TestGetGroups:
         _cleanup_student(app, "OUK/GRP/001")
 
 
+    def test_unchanged_listing_returns_304(self, client, app):
+        _register_and_login(client)
+        first = client.get("/api/groups")
+        etag = first.headers["ETag"]
+
+        r = client.get("/api/groups", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.headers["ETag"] == etag
+
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+
+    def test_registration_changes_etag(self, client, app):
+        _register_and_login(client)
+        etag = client.get("/api/groups").headers["ETag"]
+
+        client.post("/api/register", json=_valid_enroll_payload(app, "OUK/ET/001"))
+        r = client.get("/api/groups", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["ETag"] != etag
+        assert any(
+            m["student_id"] == "OUK/ET/001" for g in r.get_json() for m in g["members"]
+        )
+
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+        _cleanup_student(app, "OUK/ET/001")
+
+    def test_accounts_without_students_keep_etag(self, client, app):
+        _register_and_login(client)
+        etag = client.get("/api/groups").headers["ETag"]
+
+        other = app.test_client()
+        _register_and_login(other, "bystander@ouk.ac.ke")
+        r = client.get("/api/groups", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+        _cleanup_user(app, "bystander@ouk.ac.ke")
+
+    def test_linking_an_account_changes_etag(self, client, app):
+        _register_and_login(client)
+        client.post("/api/register", json=_valid_enroll_payload(app, "OUK/LNK/001"))
+        with app.app_context():
+            student = Student.query.filter_by(student_id="OUK/LNK/001").first()
+            User.query.filter_by(student_id=student.id).update({"student_id": None})
+            db.session.commit()
+        etag = client.get("/api/groups").headers["ETag"]
+
+        with app.app_context():
+            student = Student.query.filter_by(student_id="OUK/LNK/001").first()
+            User.query.filter_by(email="coord@ouk.ac.ke").first().student_id = student.id
+            db.session.commit()
+        r = client.get("/api/groups", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+        _cleanup_student(app, "OUK/LNK/001")
+
+    def test_recompute_group_stats_changes_etag(self, client, app):
+        _register_and_login(client)
+        etag = client.get("/api/groups").headers["ETag"]
+
+        with app.app_context():
+            recompute_group_stats()
+            db.session.commit()
+        r = client.get("/api/groups", headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["ETag"] != etag
+
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+
+    def test_query_count_does_not_grow_with_members(self, client, app):
+        _register_and_login(client)
+        for i in range(2):
+            client.post("/api/register", json=_valid_enroll_payload(app, f"OUK/QC/{i:03d}"))
+        before = _count_queries(app, lambda: client.get("/api/groups"))
+
+        for i in range(2, 12):
+            payload = _valid_enroll_payload(app, f"OUK/QC/{i:03d}")
+            payload["gender"] = "female" if i % 2 else "male"
+            client.post("/api/register", json=payload)
+        after = _count_queries(app, lambda: client.get("/api/groups"))
+
+        assert after == before
+
+        _logout(client)
+        _cleanup_user(app, "coord@ouk.ac.ke")
+        for i in range(12):
+            _cleanup_student(app, f"OUK/QC/{i:03d}")
+
+
 # ---------------------------------------------------------------------------
 # GET /api/student/<student_id>
 # ---------------------------------------------------------------------------
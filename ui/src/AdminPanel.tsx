@@ -166,19 +166,22 @@ export function AdminGroups() {
 export function AuditLogView() {
   const [entries, setEntries] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
-  const [page, setPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
+  // Cursors of the pages visited so far; the last one is the current page.
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
+  const [next, setNext] = useState<string | null>(null);
+  const cursor = cursors[cursors.length - 1];
 
   useEffect(() => {
     setLoading(true);
-    apiFetch(`/api/admin/audit-log?page=${page}&per_page=50`)
+    const after = cursor ? `&after=${encodeURIComponent(cursor)}` : "";
+    apiFetch(`/api/admin/audit-log?per_page=50${after}`)
       .then((r) => r.json())
       .then((data) => {
         setEntries(data.entries ?? []);
-        setTotalPages(data.pages ?? 1);
+        setNext(data.next ?? null);
       })
       .finally(() => setLoading(false));
-  }, [page]);
+  }, [cursor]);
 
   if (loading) {
     return (
@@ -257,13 +260,13 @@ export function AuditLogView() {
         </div>
       )}
 
-      {totalPages > 1 && (
+      {(cursors.length > 1 || next) && (
         <div className="flex items-center gap-2 justify-end">
-          <Button variant="outline" size="sm" disabled={page <= 1} onClick={() => setPage((p) => p - 1)}>
+          <Button variant="outline" size="sm" disabled={cursors.length <= 1} onClick={() => setCursors((c) => c.slice(0, -1))}>
             Previous
           </Button>
-          <span className="text-xs text-muted-foreground">Page {page} of {totalPages}</span>
-          <Button variant="outline" size="sm" disabled={page >= totalPages} onClick={() => setPage((p) => p + 1)}>
+          <span className="text-xs text-muted-foreground">Page {cursors.length}</span>
+          <Button variant="outline" size="sm" disabled={!next} onClick={() => setCursors((c) => [...c, next])}>
             Next
           </Button>
         </div>